@@ -1,7 +1,14 @@
+import json
 import webbrowser
 import os
 
-def create_verified_rumen_simulation():
+import feed_library
+
+# Slider order in the page; the library may hold any number of other feeds
+SLIDER_FEEDS = ("hay", "alf", "dry", "wet", "sbm", "fat")
+
+def create_verified_rumen_simulation(library_path=feed_library.PROFESSIONAL):
+    library = feed_library.load_feed_library(library_path).subset(SLIDER_FEEDS)
     html_content = """
 <!DOCTYPE html>
 <html lang="en">
@@ -440,70 +447,25 @@ def create_verified_rumen_simulation():
 </div>
 
 <script>
-    // VERIFIED FEED LIBRARY (NASEM 2016)
-    // All values cross-referenced with published nutrient tables
-    const feeds = {
-        hay: { 
-            cp: 6,    // Typical mature grass hay
-            fat: 2.0, 
-            tdn: 52,  // Low quality forage
-            ndf: 65,  // High cell wall
-            starch: 1, 
-            peNDF: 55, // Long particle size
-            fermentRate: 0.02,  // Slow Kd for mature forage
-            rdp: 70   // % of CP that's rumen degradable
-        }, 
-        alf: { 
-            cp: 17,   // Mid-maturity alfalfa
-            fat: 2.5, 
-            tdn: 58, 
-            ndf: 42,  // Lower than grass
-            starch: 2, 
-            peNDF: 35, // Moderate particle effectiveness
-            fermentRate: 0.04,
-            rdp: 75
-        },  
-        dry: { 
-            cp: 9, 
-            fat: 4.0, 
-            tdn: 88,  // High energy
-            ndf: 9,   // Low fiber
-            starch: 70, 
-            peNDF: 5,  // Fine particle
-            fermentRate: 0.15, // Moderate Kd for dry corn
-            rdp: 60
-        }, 
-        wet: { 
-            cp: 9, 
-            fat: 4.0, 
-            tdn: 92,  // Highest energy (gelatinized)
-            ndf: 8, 
-            starch: 75, 
-            peNDF: 2,  // Very fine
-            fermentRate: 0.40, // HIGH Kd - gelatinization increases rate
-            rdp: 60
-        },
-        sbm: { 
-            cp: 48,   // Soybean meal 44-48% CP
-            fat: 1.5, 
-            tdn: 84, 
-            ndf: 12, 
-            starch: 2, 
-            peNDF: 0,  // No effective fiber
-            fermentRate: 0.10,
-            rdp: 70   // 70% RDP in SBM
-        }, 
-        fat: { 
-            cp: 0, 
-            fat: 100, 
-            tdn: 225, // 2.25x energy of carbs
-            ndf: 0, 
-            starch: 0, 
-            peNDF: 0, 
-            fermentRate: 0,
-            rdp: 0
-        } 
-    };
+    // Feed library - columnar table injected from feeds/professional.csv (NASEM 2016)
+    // forage: 1 for fiber sources (hay, alfalfa); buffer: cation buffering (alfalfa)
+    const FEED_LIB = __FEED_LIBRARY__;
+    const feeds = {};
+    FEED_LIB.names.forEach((k, i) => {
+        feeds[k] = {};
+        FEED_LIB.attributes.forEach((attr, j) => feeds[k][attr] = FEED_LIB.matrix[i][j]);
+    });
+
+    // Diet composition: every attribute as a DM-weighted mean in one pass over the nutrient matrix
+    function dietComposition(x, dm) {
+        const diet = {};
+        FEED_LIB.attributes.forEach((attr, j) => {
+            let total = 0;
+            for(let i = 0; i < x.length; i++) total += x[i] * FEED_LIB.matrix[i][j];
+            diet[attr] = total / dm;
+        });
+        return diet;
+    }
 
     let chart;
 
@@ -551,18 +513,16 @@ def create_verified_rumen_simulation():
         }
 
         // CALCULATE DIET COMPOSITION (weighted averages)
-        function chem(attr) {
-            return ((h*feeds.hay[attr]) + (a*feeds.alf[attr]) + (d*feeds.dry[attr]) + 
-                    (w*feeds.wet[attr]) + (s*feeds.sbm[attr]) + (f*feeds.fat[attr])) / dm;
-        }
+        const x = [h, a, d, w, s, f];
+        const diet = dietComposition(x, dm);
 
-        let cp = chem('cp');
-        let fat_pct = chem('fat');
-        let ndf = chem('ndf');
-        let starch = chem('starch');
-        let peNDF = chem('peNDF');
-        let avg_ferment = chem('fermentRate');
-        let rdp = chem('rdp');
+        let cp = diet.cp;
+        let fat_pct = diet.fat;
+        let ndf = diet.ndf;
+        let starch = diet.starch;
+        let peNDF = diet.peNDF;
+        let avg_ferment = diet.fermentRate;
+        let rdp = diet.rdp;
 
         // IMPROVED pH MODEL
         // Based on acid production vs buffering capacity
@@ -577,7 +537,7 @@ def create_verified_rumen_simulation():
         let saliva_buffer = peNDF * 0.014; // ~280 mL saliva per kg peNDF
         
         // 2. Alfalfa cation exchange (Ca, K, Mg)
-        let alfalfa_buffer = (a/dm) * 0.18;
+        let alfalfa_buffer = diet.buffer * 0.18;
         
         // 3. Additional buffering from protein degradation (amino acids)
         let protein_buffer = (cp / 100) * 0.05;
@@ -762,11 +722,13 @@ def create_verified_rumen_simulation():
 
         // === ENERGY PARTITIONING ===
         // Fiber sources: heavily affected by pH, N, fat, passage
-        let fiber_tdn = (h * feeds.hay.tdn) + (a * feeds.alf.tdn);
-        
         // Non-fiber sources: starch, protein, fat (more robust)
-        let nonfiber_tdn = (d * feeds.dry.tdn) + (w * feeds.wet.tdn) + 
-                           (s * feeds.sbm.tdn) + (f * feeds.fat.tdn);
+        let fiber_tdn = 0, nonfiber_tdn = 0;
+        x.forEach((kg, i) => {
+            const feed = feeds[FEED_LIB.names[i]];
+            fiber_tdn += kg * feed.tdn * feed.forage;
+            nonfiber_tdn += kg * feed.tdn * (1 - feed.forage);
+        });
         
         // Apply efficiency factors
         let net_fiber_eff = fiber_health - passage_loss;
@@ -929,7 +891,7 @@ def create_verified_rumen_simulation():
 </script>
 </body>
 </html>
-"""
+""".replace("__FEED_LIBRARY__", json.dumps(library.to_js()))
     
     filename = "rumen_verified.html"
     with open(filename, "w", encoding='utf-8') as f:
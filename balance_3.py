@@ -1,7 +1,30 @@
+import json
 import webbrowser
 import os
 
-def create_professional_rumen_simulation():
+import feed_library
+import findings_rules
+import page_worker
+import response_surface
+
+# Slider order in the page; the library may hold any number of other feeds
+SLIDER_FEEDS = ("hay", "alf", "dry", "wet", "sbm", "fat")
+
+# Diet metrics the rule groups read, and the library column each is a DM-weighted mean of
+METRIC_COLUMNS = (("cp", "cp"), ("fat_pct", "fat"), ("peNDF", "peNDF"))
+PH_CLIP = (5.2, 7.0)
+
+def build_rule_tables(library):
+    """Tabulate the findings rule groups over the metric ranges the slider feeds can reach."""
+    domains = {"ph": PH_CLIP}
+    for metric, attr in METRIC_COLUMNS:
+        column = library.column(attr)
+        domains[metric] = (float(column.min()), float(column.max()))
+    return response_surface.build_rule_tables(findings_rules.default_rules(), domains)
+
+def create_professional_rumen_simulation(library_path=feed_library.PROFESSIONAL):
+    library = feed_library.load_feed_library(library_path).subset(SLIDER_FEEDS)
+    rule_tables = build_rule_tables(library)
     html_content = """
 <!DOCTYPE html>
 <html lang="en">
@@ -499,7 +522,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>65% NDF</code> <code>6% CP</code> Slow digestion rate, requires nitrogen supplementation
                 </div>
-                <input type="range" id="hay" min="0" max="12" step="0.5" value="8" oninput="update()">
+                <input type="range" id="hay" min="0" max="12" step="0.5" value="8" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
 
             <div class="feed-control">
@@ -510,7 +533,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>17% CP</code> High buffering capacity (Ca, K, Mg)
                 </div>
-                <input type="range" id="alf" min="0" max="8" step="0.5" value="0" oninput="update()">
+                <input type="range" id="alf" min="0" max="8" step="0.5" value="0" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
 
             <div class="feed-control">
@@ -521,7 +544,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>70% Starch</code> <code>K<sub>d</sub>=0.15</code> Moderate fermentation rate
                 </div>
-                <input type="range" id="dry" min="0" max="10" step="0.5" value="0" oninput="update()">
+                <input type="range" id="dry" min="0" max="10" step="0.5" value="0" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
 
             <div class="feed-control">
@@ -532,7 +555,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>75% Starch</code> <code>K<sub>d</sub>=0.40</code> Rapid acid production
                 </div>
-                <input type="range" id="wet" min="0" max="10" step="0.5" value="0" oninput="update()">
+                <input type="range" id="wet" min="0" max="10" step="0.5" value="0" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
 
             <div class="feed-control">
@@ -543,7 +566,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>48% CP</code> High RDP content, supports microbial growth
                 </div>
-                <input type="range" id="sbm" min="0" max="4" step="0.1" value="0" oninput="update()">
+                <input type="range" id="sbm" min="0" max="4" step="0.1" value="0" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
 
             <div class="feed-control">
@@ -554,7 +577,7 @@ def create_professional_rumen_simulation():
                 <div class="feed-meta">
                     <code>225% TDN</code> Microbial toxicity above 6-7% dietary inclusion
                 </div>
-                <input type="range" id="fat" min="0" max="1.5" step="0.1" value="0" oninput="update()">
+                <input type="range" id="fat" min="0" max="1.5" step="0.1" value="0" oninput="schedule(preview)" onchange="schedule(update)">
             </div>
         </div>
 
@@ -630,15 +653,169 @@ def create_professional_rumen_simulation():
 
 </div>
 
+<script id="model-core">
+    // Model core - pure math, no DOM. Runs in the compute worker (page_worker.py) and, as a
+    // fallback, on the page. Row in: kg DM of the slider feeds; row out: TDN_OUT fields.
+    // Feed library - columnar table injected from feeds/professional.csv (NASEM 2016)
+    // forage: 1 for fiber sources (hay, alfalfa); buffer: cation buffering (alfalfa)
+    const FEED_LIB = __FEED_LIBRARY__;
+    const feeds = {};
+    FEED_LIB.names.forEach((k, i) => {
+        feeds[k] = {};
+        FEED_LIB.attributes.forEach((attr, j) => feeds[k][attr] = FEED_LIB.matrix[i][j]);
+    });
+
+    // Diet composition: every attribute as a DM-weighted mean in one pass over the nutrient matrix
+    function dietComposition(x, dm) {
+        const diet = {};
+        FEED_LIB.attributes.forEach((attr, j) => {
+            let total = 0;
+            for(let i = 0; i < x.length; i++) total += x[i] * FEED_LIB.matrix[i][j];
+            diet[attr] = total / dm;
+        });
+        return diet;
+    }
+
+    // Findings rule table - injected from rules/tdn_findings.json (see findings_rules.py).
+    // Per group the first band whose conditions hold applies its effect and emits its finding.
+    const RULES = __FINDING_RULES__;
+    const RULE_OPS = { '<': (a, b) => a < b, '<=': (a, b) => a <= b, '>': (a, b) => a > b, '>=': (a, b) => a >= b };
+
+    // Numeric pass of the rule table, as findings_rules.apply_rules(): state plus the
+    // selected band index and effect amount per group (the prose is built on the page)
+    function applyRules(values) {
+        const state = Object.assign({}, RULES.state);
+        const codes = [], amounts = [];
+        RULES.groups.forEach(group => {
+            const b = group.bands.findIndex(band => band.when.every(([name, op, bound]) => RULE_OPS[op](values[name], bound)));
+            const band = group.bands[b];
+            let amount = 0;
+            if(band.effect) {
+                const e = band.effect;
+                amount = ('value' in e) ? e.value : e.slope * (values[group.metric] - e.ref);
+                if(e.min != null && amount < e.min) amount = e.min;
+                if(e.max != null && amount > e.max) amount = e.max;
+                state[e.on] = (e.op === 'subtract') ? state[e.on] - amount
+                            : (e.op === 'multiply') ? state[e.on] * amount : amount;
+            }
+            codes.push(b);
+            amounts.push(amount);
+        });
+        return { state, codes, amounts };
+    }
+
+    const TDN_IN = FEED_LIB.names.length;
+    const TDN_OUT = ['dm', 'cp', 'fat_pct', 'ndf', 'starch', 'peNDF', 'ph', 'fiber_health',
+                     'captured_fiber', 'captured_nonfiber', 'total_potential', 'total_realized', 'total_waste']
+        .concat(RULES.groups.map(g => 'code_' + g.group), RULES.groups.map(g => 'amount_' + g.group));
+
+    // pH Model - linear in the diet means, clipped to PH_CLIP
+    function dietPh(diet) {
+        let base_ph = 6.8;
+        let acid_load = diet.starch * diet.fermentRate * 0.85;
+        let buffer_from_peNDF = diet.peNDF * 0.014;
+        let buffer_from_alfalfa = diet.buffer * 0.18;
+        let total_buffer = buffer_from_peNDF + buffer_from_alfalfa;
+        let ph = base_ph - acid_load + total_buffer;
+        if(ph > __PH_MAX__) ph = __PH_MAX__;
+        if(ph < __PH_MIN__) ph = __PH_MIN__;
+        return ph;
+    }
+
+    // Energy Partitioning - fiber / non-fiber TDN captured under the rule state
+    function partitionTdn(x, state) {
+        let fiber_health = state.fiber_health;
+        if(fiber_health < 0) fiber_health = 0;
+        if(fiber_health > 1) fiber_health = 1;
+
+        let fiber_tdn_potential = 0, nonfiber_tdn_potential = 0;
+        x.forEach((kg, i) => {
+            const feed = feeds[FEED_LIB.names[i]];
+            fiber_tdn_potential += kg * feed.tdn * feed.forage;
+            nonfiber_tdn_potential += kg * feed.tdn * (1 - feed.forage);
+        });
+
+        let net_fiber_efficiency = fiber_health - state.passage_loss;
+        if(net_fiber_efficiency < 0) net_fiber_efficiency = 0;
+        let captured_fiber = fiber_tdn_potential * net_fiber_efficiency;
+        let captured_nonfiber = nonfiber_tdn_potential * state.nonfiber_efficiency;
+
+        let total_potential = fiber_tdn_potential + nonfiber_tdn_potential;
+        let total_realized = captured_fiber + captured_nonfiber;
+        return { fiber_health, captured_fiber, captured_nonfiber, total_potential, total_realized,
+                 total_waste: total_potential - total_realized };
+    }
+
+    function tdnRow(input, i, out, o) {
+        const x = Array.from(input.subarray(i, i + TDN_IN));
+        let dm = 0;
+        x.forEach(kg => dm += kg);
+        const diet = dietComposition(x, dm);
+        const ph = dietPh(diet);
+
+        // Associative Effects - rule table (nitrogen, pH, fat, passage rate, epithelium)
+        const values = { cp: diet.cp, ph, fat_pct: diet.fat, peNDF: diet.peNDF };
+        FEED_LIB.names.forEach((k, i) => values[k] = x[i]);
+        const rules = applyRules(values);
+        const e = partitionTdn(x, rules.state);
+
+        [dm, diet.cp, diet.fat, diet.ndf, diet.starch, diet.peNDF, ph, e.fiber_health, e.captured_fiber,
+         e.captured_nonfiber, e.total_potential, e.total_realized, e.total_waste].concat(rules.codes, rules.amounts)
+            .forEach((v, j) => out[o + j] = v);
+    }
+</script>
+
 <script>
-    const feeds = {
-        hay: { cp: 6,   fat: 2.0, tdn: 52, ndf: 65, starch: 1,  peNDF: 55, fermentRate: 0.02 }, 
-        alf: { cp: 17,  fat: 2.5, tdn: 58, ndf: 42, starch: 2,  peNDF: 35, fermentRate: 0.04 },  
-        dry: { cp: 9,   fat: 4.0, tdn: 88, ndf: 9,  starch: 70, peNDF: 5,  fermentRate: 0.15 }, 
-        wet: { cp: 9,   fat: 4.0, tdn: 92, ndf: 8,  starch: 75, peNDF: 2,  fermentRate: 0.40 },
-        sbm: { cp: 48,  fat: 1.5, tdn: 84, ndf: 12, starch: 2,  peNDF: 0,  fermentRate: 0.10 }, 
-        fat: { cp: 0,   fat: 100, tdn: 225,ndf: 0,  starch: 0,  peNDF: 0,  fermentRate: 0    } 
-    };
+__COMPUTE_LAYER__
+    const compute = createCompute(tdnRow, TDN_IN, TDN_OUT.length);
+
+    // Findings prose for one result row: the band each group selected, with its
+    // text template filled from the model values
+    function describeFindings(m, values) {
+        const findings = [];
+        RULES.groups.forEach(group => {
+            const band = group.bands[m['code_' + group.group]];
+            if(!band.title) return;
+            const fields = Object.assign({ effect_pct: m['amount_' + group.group] * 100 }, values);
+            findings.push({
+                code: band.code,
+                type: band.type,
+                title: band.title,
+                text: band.text.replace(/\\{(\\w+):\\.(\\d+)f\\}/g, (match, name, digits) => fields[name].toFixed(+digits))
+            });
+        });
+        return findings;
+    }
+
+    // Rule response tables (response_surface.py) - each rule group as a piecewise-linear
+    // function of its metric, band bounds and effect caps as nodes, read while dragging
+    const RULE_TABLES = __RULE_TABLES__.map(t => {
+        const data = new Float64Array(Uint8Array.from(atob(t.data), c => c.charCodeAt(0)).buffer);
+        return { nodes: data.subarray(0, t.n), cells: data.subarray(t.n) };
+    });
+
+    // Rule state from the tables: find the cell holding the metric (a node is a cell of its
+    // own, so bounds resolve as in applyRules()) and interpolate the band's effect amount
+    function tableState(values) {
+        const state = Object.assign({}, RULES.state);
+        RULES.groups.forEach((group, g) => {
+            const { nodes, cells } = RULE_TABLES[g];
+            const v = Math.min(Math.max(values[group.metric], nodes[0]), nodes[nodes.length - 1]);
+            let j = 0, hi = nodes.length - 1;   // last node <= v
+            while(j < hi) {
+                const mid = (j + hi + 1) >> 1;
+                if(nodes[mid] <= v) j = mid; else hi = mid - 1;
+            }
+            const cell = (v === nodes[j]) ? 2 * j : 2 * j + 1;
+            const e = group.bands[cells[3 * cell]].effect;
+            if(!e) return;
+            const t = (cell & 1) ? (v - nodes[j]) / (nodes[j + 1] - nodes[j]) : 0;
+            const amount = cells[3 * cell + 1] + t * (cells[3 * cell + 2] - cells[3 * cell + 1]);
+            state[e.on] = (e.op === 'subtract') ? state[e.on] - amount
+                        : (e.op === 'multiply') ? state[e.on] * amount : amount;
+        });
+        return state;
+    }
 
     let chart;
 
@@ -672,201 +849,94 @@ def create_professional_rumen_simulation():
         let dm = h+a+d+w+s+f;
         if(dm <= 0) {
             document.getElementById('diagnostics').innerHTML = "<div style='text-align: center; padding: 40px; color: #9ca3af;'>Configure feed inputs to generate analysis</div>";
-            if(chart) chart.destroy();
+            report = null;
+            compute.cancel();
+            updateChart(0, 0, 0);
             return;
         }
 
-        function chem(attr) {
-            return ((h*feeds.hay[attr]) + (a*feeds.alf[attr]) + (d*feeds.dry[attr]) + 
-                    (w*feeds.wet[attr]) + (s*feeds.sbm[attr]) + (f*feeds.fat[attr])) / dm;
-        }
-
-        let cp = chem('cp');
-        let fat_pct = chem('fat');
-        let ndf = chem('ndf');
-        let starch = chem('starch');
-        let peNDF = chem('peNDF');
-        let avg_ferment = chem('fermentRate');
-        let base_tdn = chem('tdn');
-
-        // pH Model
-        let base_ph = 6.8;
-        let acid_load = starch * avg_ferment * 0.85; 
-        let buffer_from_peNDF = peNDF * 0.014;
-        let buffer_from_alfalfa = (a/dm) * 0.18;
-        let total_buffer = buffer_from_peNDF + buffer_from_alfalfa;
-        let ph = base_ph - acid_load + total_buffer;
-        if(ph > 7.0) ph = 7.0;
-        if(ph < 5.2) ph = 5.2;
+        // Model runs in the compute worker; render when the result arrives
+        const x = [h, a, d, w, s, f];
+        compute.run(Float64Array.from(x)).then(out => {
+            if(out) render(outputRow(TDN_OUT, out), x);
+        });
+    }
 
-        // Associative Effects
-        let findings = [];
-        let fiber_health = 1.0;
-        let passage_loss = 0.0;
+    function render(m, x) {
+        const { dm, cp, fat_pct, peNDF, ph, fiber_health, captured_fiber, captured_nonfiber,
+                total_potential, total_realized, total_waste } = m;
+        const values = { cp, ph, fat_pct, peNDF };
+        FEED_LIB.names.forEach((k, i) => values[k] = x[i]);
+        const findings = describeFindings(m, values);
 
-        // Nitrogen Limitation
-        if(cp < 8.0) {
-            let deficit = 8.0 - cp;
-            let penalty = deficit * 0.17;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'critical',
-                title: 'NITROGEN DEFICIENCY DETECTED',
-                text: `Crude protein concentration of ${cp.toFixed(1)}% is below the minimum threshold of 8% required for microbial protein synthesis. Microbial population is nitrogen-limited, resulting in ${(penalty*100).toFixed(0)}% reduction in fiber digestion efficiency. Recommend immediate protein supplementation.`
-            });
-        } else if(cp < 10.0) {
-            findings.push({
-                type: 'warning',
-                title: 'Suboptimal Protein Levels',
-                text: `Current CP level of ${cp.toFixed(1)}% meets minimum requirements but falls below optimal range (10-13%) for high-producing animals. Consider increased protein supplementation for maximum performance.`
-            });
-        } else {
-            if(h > 4 && s > 0.5) {
-                findings.push({
-                    type: 'info',
-                    title: 'Positive Associative Effect',
-                    text: `Protein supplementation is successfully enhancing low-quality forage utilization. This demonstrates beneficial synergy between protein supplements and fibrous feedstuffs.`
-                });
-            } else {
-                findings.push({
-                    type: 'optimal',
-                    title: 'Adequate Nitrogen Status',
-                    text: `Crude protein level of ${cp.toFixed(1)}% is sufficient to support optimal microbial protein synthesis and fiber fermentation.`
-                });
-            }
-        }
+        // Update Metrics
+        renderMetrics(cp, ph, peNDF, fat_pct, m.starch, fiber_health);
 
-        // pH / Acidosis
-        if(ph < 5.8) {
-            let severity = 6.0 - ph;
-            let penalty = severity * 1.0;
-            if(penalty > 0.85) penalty = 0.85;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'critical',
-                title: 'ACUTE RUMINAL ACIDOSIS',
-                text: `Rumen pH of ${ph.toFixed(2)} indicates severe acidotic conditions. Cellulolytic bacteria populations are critically suppressed, resulting in ${(penalty*100).toFixed(0)}% loss of fiber digestion capacity. Risk of laminitis, reduced intake, and metabolic disorders. Immediate intervention required: reduce rapidly fermentable carbohydrates and increase effective fiber.`
-            });
-        } else if(ph < 6.0) {
-            let severity = 6.0 - ph;
-            let penalty = severity * 0.75;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'critical',
-                title: 'SUBACUTE RUMINAL ACIDOSIS (SARA)',
-                text: `pH of ${ph.toFixed(2)} is within SARA range. Fiber-digesting bacteria are significantly inhibited (${(penalty*100).toFixed(0)}% efficiency loss). Clinical signs may include reduced feed intake, inconsistent manure, and decreased milk fat or weight gains. Adjust ration to increase buffering capacity.`
-            });
-        } else if(ph < 6.2) {
-            let mild = 6.2 - ph;
-            let penalty = mild * 0.40;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'warning',
-                title: 'pH Suboptimal',
-                text: `Rumen pH of ${ph.toFixed(2)} is below optimal range. Cellulolytic bacterial activity is beginning to decline (${(penalty*100).toFixed(0)}% reduction). Monitor for early signs of acidosis and consider increasing effective fiber or buffering agents.`
-            });
-        } else if(ph < 6.4) {
-            findings.push({
-                type: 'optimal',
-                title: 'Acceptable pH Range',
-                text: `Current pH of ${ph.toFixed(2)} is within acceptable functional range, though not optimal. Fiber fermentation is proceeding normally.`
-            });
-        } else {
-            findings.push({
-                type: 'optimal',
-                title: 'Optimal pH Status',
-                text: `Rumen pH of ${ph.toFixed(2)} is in the ideal range (6.4-7.0) for cellulolytic bacteria. Fiber fermentation efficiency is maximized.`
-            });
-        }
+        // Generate Report
+        renderReport({
+            dm: `${dm.toFixed(1)} kg/day`,
+            potential: `${total_potential.toFixed(1)} kg TDN`,
+            realized: `${total_realized.toFixed(1)} kg TDN`,
+            efficiency: `${(total_realized / total_potential * 100).toFixed(1)}%`,
+            waste: `${total_waste.toFixed(1)} kg TDN`
+        }, findings);
+        updateChart(captured_fiber, captured_nonfiber, total_waste);
+    }
 
-        // Fat Toxicity
-        if(fat_pct > 7.0) {
-            let excess = fat_pct - 7.0;
-            let penalty = excess * 0.13;
-            if(penalty > 0.55) penalty = 0.55;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'critical',
-                title: 'DIETARY FAT TOXICITY',
-                text: `Fat concentration of ${fat_pct.toFixed(1)}% exceeds the recommended maximum of 6-7% of dietary dry matter. Excessive fat physically coats feed particles and exhibits direct antimicrobial effects on gram-positive bacteria, reducing fiber digestion by ${(penalty*100).toFixed(0)}%. Reduce fat supplementation immediately.`
-            });
-        } else if(fat_pct > 6.0) {
-            let mild_excess = fat_pct - 6.0;
-            let penalty = mild_excess * 0.09;
-            fiber_health -= penalty;
-            findings.push({
-                type: 'warning',
-                title: 'Elevated Fat Levels',
-                text: `Dietary fat at ${fat_pct.toFixed(1)}% is approaching upper safety threshold. Monitor for signs of depressed fiber digestion and reduced dry matter intake. Consider limiting further fat supplementation.`
-            });
-        } else {
-            findings.push({
-                type: 'optimal',
-                title: 'Safe Fat Concentration',
-                text: `Dietary fat level of ${fat_pct.toFixed(1)}% is within safe limits for normal rumen function.`
-            });
-        }
+    // Diagnostics report: the summary panel and findings list are built once,
+    // later updates rewrite the summary values and patch only findings that changed
+    const SUMMARY_ROWS = [
+        ['dm', 'Total Dry Matter Intake:', ''],
+        ['potential', 'Potential Energy:', ''],
+        ['realized', 'Captured Energy:', ''],
+        ['efficiency', 'System Efficiency:', ''],
+        ['waste', 'Energy Loss:', ' style="color: #dc2626;"']
+    ];
+    let report = null;
 
-        // Passage Rate
-        if(peNDF < 15) {
-            passage_loss = (20 - peNDF) * 0.015;
-            if(passage_loss > 0.20) passage_loss = 0.20;
-            findings.push({
-                type: 'critical',
-                title: 'INADEQUATE EFFECTIVE FIBER',
-                text: `Physical effective NDF of ${peNDF.toFixed(1)}% is severely deficient (target: 18-22%). Insufficient rumination reduces retention time, causing premature passage of feed particles before complete fermentation. Energy loss: ${(passage_loss*100).toFixed(0)}%. Increase forage particle size and inclusion rate.`
-            });
-        } else if(peNDF < 20) {
-            passage_loss = (20 - peNDF) * 0.012;
-            findings.push({
-                type: 'warning',
-                title: 'Below-Target Effective Fiber',
-                text: `peNDF of ${peNDF.toFixed(1)}% is below recommended range. Reduced chewing activity may lead to increased passage rates and incomplete digestion (${(passage_loss*100).toFixed(0)}% energy loss). Consider increasing long-stem forage.`
-            });
-        } else if(peNDF > 35) {
-            findings.push({
-                type: 'optimal',
-                title: 'High Fiber Mat Formation',
-                text: `peNDF of ${peNDF.toFixed(1)}% promotes excellent rumen health and optimal retention time. Note: very high fiber diets may limit dry matter intake in high-producing animals.`
-            });
-        } else {
-            findings.push({
-                type: 'optimal',
-                title: 'Optimal Effective Fiber',
-                text: `peNDF of ${peNDF.toFixed(1)}% provides adequate rumination stimulus and appropriate feed retention time for complete fermentation.`
-            });
+    function renderReport(values, findings) {
+        if(!report) {
+            document.getElementById('diagnostics').innerHTML = `
+            <div class="summary-panel">
+                ${SUMMARY_ROWS.map(([key, label, style]) => `
+                <div class="summary-row">
+                    <span class="summary-label">${label}</span>
+                    <span class="summary-value" id="sum_${key}"${style}></span>
+                </div>`).join('')}
+            </div>
+            <div class="findings-list" id="findings_list"></div>`;
+            report = {
+                list: document.getElementById('findings_list'), items: new Map(),
+                paint(el, f) {
+                    el.className = 'finding finding-' + f.type;
+                    el.innerHTML = `<span class="finding-title">${f.title}</span>${f.text}`;
+                }
+            };
         }
+        SUMMARY_ROWS.forEach(([key]) => {
+            const el = document.getElementById('sum_' + key);
+            if(el.innerText !== values[key]) el.innerText = values[key];
+        });
+        patchFindings(report, findings);
+    }
 
-        if(fiber_health < 0) fiber_health = 0;
-        if(fiber_health > 1) fiber_health = 1;
+    // Input coalescing: slider events only record what to run, and one recompute
+    // happens per animation frame. A full update() supersedes a pending preview().
+    let frameRequest = 0, frameTask = null;
 
-        // Energy Partitioning
-        let fiber_tdn_potential = (h * feeds.hay.tdn) + (a * feeds.alf.tdn);
-        let nonfiber_tdn_potential = (d * feeds.dry.tdn) + (w * feeds.wet.tdn) + 
-                                      (s * feeds.sbm.tdn) + (f * feeds.fat.tdn);
-        
-        let net_fiber_efficiency = fiber_health - passage_loss;
-        if(net_fiber_efficiency < 0) net_fiber_efficiency = 0;
-        let captured_fiber = fiber_tdn_potential * net_fiber_efficiency;
-        
-        let nonfiber_efficiency = 1.0;
-        if(ph < 5.5) {
-            nonfiber_efficiency = 0.90;
-            findings.push({
-                type: 'warning',
-                title: 'Epithelial Damage',
-                text: `Extreme acidosis (pH < 5.5) is causing rumen epithelial damage and reduced nutrient absorption capacity. Even non-fiber energy sources are being underutilized.`
+    function schedule(task) {
+        if(frameTask !== update) frameTask = task;
+        if(!frameRequest) {
+            frameRequest = requestAnimationFrame(() => {
+                const run = frameTask;
+                frameRequest = 0;
+                frameTask = null;
+                run();
             });
-        } else if(ph < 5.8) {
-            nonfiber_efficiency = 0.96;
         }
-        let captured_nonfiber = nonfiber_tdn_potential * nonfiber_efficiency;
-        
-        let total_potential = fiber_tdn_potential + nonfiber_tdn_potential;
-        let total_realized = captured_fiber + captured_nonfiber;
-        let total_waste = total_potential - total_realized;
+    }
 
-        // Update Metrics
+    function renderMetrics(cp, ph, peNDF, fat_pct, starch, fiber_health) {
         d_cp.innerHTML = cp.toFixed(1) + '<span class="metric-unit">%</span>';
         d_ph.innerText = ph.toFixed(2);
         d_pendf.innerHTML = peNDF.toFixed(0) + '<span class="metric-unit">%</span>';
@@ -881,44 +951,27 @@ def create_professional_rumen_simulation():
         updateStatus('s_fat', fat_pct, 6, 7, 'fat', true);
         updateStatus('s_starch', starch, 30, 40, 'starch');
         updateStatus('s_efficiency', fiber_health*100, 85, 70, 'efficiency');
+    }
 
-        // Generate Report
-        let efficiency_pct = (total_realized / total_potential * 100).toFixed(1);
-        let summary = `
-            <div class="summary-panel">
-                <div class="summary-row">
-                    <span class="summary-label">Total Dry Matter Intake:</span>
-                    <span class="summary-value">${dm.toFixed(1)} kg/day</span>
-                </div>
-                <div class="summary-row">
-                    <span class="summary-label">Potential Energy:</span>
-                    <span class="summary-value">${total_potential.toFixed(1)} kg TDN</span>
-                </div>
-                <div class="summary-row">
-                    <span class="summary-label">Captured Energy:</span>
-                    <span class="summary-value">${total_realized.toFixed(1)} kg TDN</span>
-                </div>
-                <div class="summary-row">
-                    <span class="summary-label">System Efficiency:</span>
-                    <span class="summary-value">${efficiency_pct}%</span>
-                </div>
-                <div class="summary-row">
-                    <span class="summary-label">Energy Loss:</span>
-                    <span class="summary-value" style="color: #dc2626;">${total_waste.toFixed(1)} kg TDN</span>
-                </div>
-            </div>
-            <div class="findings-list">
-                ${findings.map(f => `
-                    <div class="finding finding-${f.type}">
-                        <span class="finding-title">${f.title}</span>
-                        ${f.text}
-                    </div>
-                `).join('')}
-            </div>
-        `;
+    // Drag preview: diet chemistry and pH are exact (DM-weighted means and a clip), the
+    // associative effects come from the rule response tables, which hold every band
+    // bound as a node, so drag values equal the released run. The worker run and the
+    // findings report wait for release (onchange -> update()).
+    function preview() {
+        let h = +hay.value, a = +alf.value, d = +dry.value, w = +wet.value, s = +sbm.value, f = +fat.value;
+        v_hay.innerText = h.toFixed(1); v_alf.innerText = a.toFixed(1); v_dry.innerText = d.toFixed(1);
+        v_wet.innerText = w.toFixed(1); v_sbm.innerText = s.toFixed(1); v_fat.innerText = f.toFixed(1);
 
-        document.getElementById('diagnostics').innerHTML = summary;
-        updateChart(captured_fiber, captured_nonfiber, total_waste);
+        let dm = h+a+d+w+s+f;
+        if(dm <= 0 || !chart) return;
+        compute.cancel();   // a still-running full update would overwrite the newer preview
+
+        const x = [h, a, d, w, s, f];
+        const diet = dietComposition(x, dm);
+        const ph = dietPh(diet);
+        const e = partitionTdn(x, tableState({ cp: diet.cp, ph, fat_pct: diet.fat, peNDF: diet.peNDF }));
+        renderMetrics(diet.cp, ph, diet.peNDF, diet.fat, diet.starch, e.fiber_health);
+        updateChart(e.captured_fiber, e.captured_nonfiber, e.total_waste);
     }
 
     function updateStatus(id, value, optimal, warning, type, inverse = false) {
@@ -943,10 +996,14 @@ def create_professional_rumen_simulation():
         el.innerText = text;
     }
 
+    // One chart instance for the page; later calls only swap the bar values
     function updateChart(fib, other, waste) {
+        if(chart) {
+            [fib, other, waste].forEach((value, i) => chart.data.datasets[i].data[0] = value);
+            chart.update('none');
+            return;
+        }
         const ctx = document.getElementById('mainChart').getContext('2d');
-        if(chart) chart.destroy();
-        
         chart = new Chart(ctx, {
             type: 'bar',
             data: {
@@ -1019,8 +1076,9 @@ def create_professional_rumen_simulation():
 </script>
 </body>
 </html>
-"""
-    
+""".replace("__FEED_LIBRARY__", json.dumps(library.to_js())).replace("__FINDING_RULES__", json.dumps(findings_rules.default_rules())).replace("__RULE_TABLES__", json.dumps(rule_tables)).replace("__PH_MIN__", str(PH_CLIP[0])).replace("__PH_MAX__", str(PH_CLIP[1]))
+    html_content = page_worker.inject(html_content)
+
     filename = "rumen_professional.html"
     with open(filename, "w", encoding='utf-8') as f:
         f.write(html_content)
@@ -2,6 +2,62 @@ import json
 import os
 import webbrowser
 
+# --- EXPANDED DATABASE ---
+ANIMAL_DATABASE = {
+    # British Breeds
+    "Angus": {"comp": {"Angus": 1.0}, "bio_type": "British", 
+              "desc": "Small to moderate frame, excellent marbling, early maturity"},
+    "Hereford": {"comp": {"Hereford": 1.0}, "bio_type": "British",
+                "desc": "Docile, moderate frame, excellent foraging ability"},
+    "Red Angus": {"comp": {"Red Angus": 1.0}, "bio_type": "British",
+                 "desc": "Similar to Angus but with heat tolerance advantage"},
+    "Shorthorn": {"comp": {"Shorthorn": 1.0}, "bio_type": "British",
+                 "desc": "Dual-purpose, moderate frame, good milking ability"},
+    
+    # Continental Breeds
+    "Charolais": {"comp": {"Charolais": 1.0}, "bio_type": "Continental",
+                 "desc": "Large frame, heavy muscling, lean meat"},
+    "Simmental": {"comp": {"Simmental": 1.0}, "bio_type": "Continental",
+                 "desc": "Large frame, growth, milking ability"},
+    "Gelbvieh": {"comp": {"Gelbvieh": 1.0}, "bio_type": "Continental",
+                "desc": "Moderate to large frame, maternal traits, lean"},
+    "Limousin": {"comp": {"Limousin": 1.0}, "bio_type": "Continental",
+                "desc": "Heavy muscling, high cutability, low fat"},
+    "Maine-Anjou": {"comp": {"Maine-Anjou": 1.0}, "bio_type": "Continental",
+                   "desc": "Large frame, growth, moderate milking"},
+    "Salers": {"comp": {"Salers": 1.0}, "bio_type": "Continental",
+              "desc": "Hardy, excellent maternal traits, moderate frame"},
+    
+    # Bos Indicus
+    "Brahman": {"comp": {"Brahman": 1.0}, "bio_type": "Bos Indicus",
+               "desc": "Heat tolerant, disease resistant, large frame with hump"},
+    "Nelore": {"comp": {"Nelore": 1.0}, "bio_type": "Bos Indicus",
+              "desc": "Brazilian breed, excellent heat tolerance, lean"},
+    
+    # American Composites
+    "Brangus": {"comp": {"Angus": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
+               "desc": "3/8 Brahman, 5/8 Angus - combines heat tolerance with quality"},
+    "Beefmaster": {"comp": {"Brahman": 0.5, "Hereford": 0.25, "Shorthorn": 0.25}, 
+                  "bio_type": "Composite",
+                  "desc": "1/2 Brahman, 1/4 Hereford, 1/4 Shorthorn - adaptability focus"},
+    "Santa Gertrudis": {"comp": {"Shorthorn": 0.625, "Brahman": 0.375}, 
+                       "bio_type": "Composite",
+                       "desc": "5/8 Shorthorn, 3/8 Brahman - first recognized American breed"},
+    "Braford": {"comp": {"Hereford": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
+               "desc": "5/8 Hereford, 3/8 Brahman - heat tolerance with docility"},
+    "Simbrah": {"comp": {"Simmental": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
+               "desc": "5/8 Simmental, 3/8 Brahman - size with adaptability"},
+    
+    # Common F1 Crosses
+    "F1 Tiger Stripe": {"comp": {"Brahman": 0.5, "Hereford": 0.5}, "bio_type": "F1 Cross",
+                       "desc": "1/2 Brahman, 1/2 Hereford - heterosis showcase"},
+    "F1 Black Baldy": {"comp": {"Angus": 0.5, "Hereford": 0.5}, "bio_type": "F1 Cross",
+                      "desc": "1/2 Angus, 1/2 Hereford - classic British cross"},
+    "F1 Charolais-Angus": {"comp": {"Charolais": 0.5, "Angus": 0.5}, "bio_type": "F1 Cross",
+                          "desc": "1/2 Charolais, 1/2 Angus - growth with marbling"}
+}
+
+
 def create_academic_breeding_tool():
     """
     Enhanced ANSC 406 Systems Breeding Simulator
@@ -19,60 +75,7 @@ def create_academic_breeding_tool():
     - Auto-scroll to next generation
     """
     
-    # --- EXPANDED DATABASE ---
-    animal_database = {
-        # British Breeds
-        "Angus": {"comp": {"Angus": 1.0}, "bio_type": "British", 
-                  "desc": "Small to moderate frame, excellent marbling, early maturity"},
-        "Hereford": {"comp": {"Hereford": 1.0}, "bio_type": "British",
-                    "desc": "Docile, moderate frame, excellent foraging ability"},
-        "Red Angus": {"comp": {"Red Angus": 1.0}, "bio_type": "British",
-                     "desc": "Similar to Angus but with heat tolerance advantage"},
-        "Shorthorn": {"comp": {"Shorthorn": 1.0}, "bio_type": "British",
-                     "desc": "Dual-purpose, moderate frame, good milking ability"},
-        
-        # Continental Breeds
-        "Charolais": {"comp": {"Charolais": 1.0}, "bio_type": "Continental",
-                     "desc": "Large frame, heavy muscling, lean meat"},
-        "Simmental": {"comp": {"Simmental": 1.0}, "bio_type": "Continental",
-                     "desc": "Large frame, growth, milking ability"},
-        "Gelbvieh": {"comp": {"Gelbvieh": 1.0}, "bio_type": "Continental",
-                    "desc": "Moderate to large frame, maternal traits, lean"},
-        "Limousin": {"comp": {"Limousin": 1.0}, "bio_type": "Continental",
-                    "desc": "Heavy muscling, high cutability, low fat"},
-        "Maine-Anjou": {"comp": {"Maine-Anjou": 1.0}, "bio_type": "Continental",
-                       "desc": "Large frame, growth, moderate milking"},
-        "Salers": {"comp": {"Salers": 1.0}, "bio_type": "Continental",
-                  "desc": "Hardy, excellent maternal traits, moderate frame"},
-        
-        # Bos Indicus
-        "Brahman": {"comp": {"Brahman": 1.0}, "bio_type": "Bos Indicus",
-                   "desc": "Heat tolerant, disease resistant, large frame with hump"},
-        "Nelore": {"comp": {"Nelore": 1.0}, "bio_type": "Bos Indicus",
-                  "desc": "Brazilian breed, excellent heat tolerance, lean"},
-        
-        # American Composites
-        "Brangus": {"comp": {"Angus": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
-                   "desc": "3/8 Brahman, 5/8 Angus - combines heat tolerance with quality"},
-        "Beefmaster": {"comp": {"Brahman": 0.5, "Hereford": 0.25, "Shorthorn": 0.25}, 
-                      "bio_type": "Composite",
-                      "desc": "1/2 Brahman, 1/4 Hereford, 1/4 Shorthorn - adaptability focus"},
-        "Santa Gertrudis": {"comp": {"Shorthorn": 0.625, "Brahman": 0.375}, 
-                           "bio_type": "Composite",
-                           "desc": "5/8 Shorthorn, 3/8 Brahman - first recognized American breed"},
-        "Braford": {"comp": {"Hereford": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
-                   "desc": "5/8 Hereford, 3/8 Brahman - heat tolerance with docility"},
-        "Simbrah": {"comp": {"Simmental": 0.625, "Brahman": 0.375}, "bio_type": "Composite",
-                   "desc": "5/8 Simmental, 3/8 Brahman - size with adaptability"},
-        
-        # Common F1 Crosses
-        "F1 Tiger Stripe": {"comp": {"Brahman": 0.5, "Hereford": 0.5}, "bio_type": "F1 Cross",
-                           "desc": "1/2 Brahman, 1/2 Hereford - heterosis showcase"},
-        "F1 Black Baldy": {"comp": {"Angus": 0.5, "Hereford": 0.5}, "bio_type": "F1 Cross",
-                          "desc": "1/2 Angus, 1/2 Hereford - classic British cross"},
-        "F1 Charolais-Angus": {"comp": {"Charolais": 0.5, "Angus": 0.5}, "bio_type": "F1 Cross",
-                              "desc": "1/2 Charolais, 1/2 Angus - growth with marbling"}
-    }
+    animal_database = ANIMAL_DATABASE
 
     html_content = f"""
     <!DOCTYPE html>
@@ -0,0 +1,306 @@
+"""
+Bunk-Call Log: Rolling Rumen Metrics per Pen
+============================================
+Streams daily feed-delivery records (kg as-fed per ingredient), maps each
+mill ingredient onto the rumen model's feed library, converts it to kg DM
+and keeps rolling 3/7/14-day pH, peNDF, CP and Ym per pen. This replaces
+typing one day at a time into the balance_3.py sliders.
+
+Delivery log (CSV, sorted by date; pens and feedings in any order):
+    long - pen, date, [head,] ingredient, kg    (one row per ingredient drop)
+    wide - pen, date, [head,] <ingredient>...   (kg as-fed per ingredient column)
+    date is YYYY-MM-DD; rows for the same pen and day are summed. With a
+    head column the pen's delivery is divided by head count, since the rumen
+    model works per animal; without one, kg are taken as per head.
+
+Ingredient map (feeds/ingredients.csv): ingredient -> library feed and
+DM % of the as-fed weight. Rows with an empty feed (premix, limestone,
+water) are delivered but not modeled. Unknown ingredients are an error.
+
+Streaming: the log is read in blocks. Each block's pen-days are scored
+with one rumen_engine.evaluate() call. Every pen keeps a ring buffer of its
+last max(windows) days plus running sums per window, so each calendar day
+adds the new day and subtracts the day leaving each window: O(1) per pen
+per day, for all pens at once. Window metrics are DM-weighted for CP and
+peNDF, GE-weighted for Ym (CH4 / GE), and a mean of daily pH over the days
+fed in the window.
+"""
+
+import csv
+import itertools
+import os
+
+import numpy as np
+
+import feed_library
+import rumen_engine
+
+INGREDIENTS = os.path.join(feed_library.FEEDS_DIR, "ingredients.csv")
+WINDOWS = (3, 7, 14)
+METRICS = ("ph", "peNDF", "cp", "Ym")
+
+# Per pen-day quantities summed in the windows
+_FIELDS = ("days", "dm", "cp_dm", "pendf_dm", "ge", "ch4", "ph")
+
+
+def load_ingredient_map(path=INGREDIENTS, library=None):
+    """{ingredient: (feed column or -1 if not modeled, DM fraction)} for a library."""
+    library = rumen_engine.LIBRARY if library is None else library
+    mapping = {}
+    with open(path, encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            feed = row["feed"].strip()
+            if feed and feed not in library.names:
+                raise ValueError(f"ingredient '{row['ingredient']}' maps to '{feed}', not in {library.names}")
+            mapping[row["ingredient"].strip()] = (library.names.index(feed) if feed else -1,
+                                                  float(row["dm"]) / 100)
+    return mapping
+
+
+def _dm_matrix(mapping, ingredients, n_feeds):
+    # (ingredients x feeds) kg DM per kg as-fed
+    unknown = sorted(set(ingredients) - set(mapping))
+    if unknown:
+        raise ValueError(f"ingredients not in the ingredient map: {unknown}")
+    M = np.zeros((len(ingredients), n_feeds))
+    for k, name in enumerate(ingredients):
+        feed, dm = mapping[name]
+        if feed >= 0:
+            M[k, feed] = dm
+    return M
+
+
+def _numbers(values, name, lines, path):
+    # float array of a column; the first cell that is not a number is reported with its line
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        for value, line in zip(values, lines):
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError(f"delivery log {path} line {line}: bad {name} '{value}', expected a number") from None
+        raise
+
+
+def read_deliveries(path, mapping, n_feeds, block_rows=250_000):
+    """
+    Yield (dates, pens, head, kg_dm) blocks of raw delivery rows, kg_dm
+    being (rows x feeds) and head None when the log has no head column.
+    A block never splits a date: rows of the last date in a block are held
+    back and start the next one. An empty or non-numeric head or kg cell
+    raises ValueError with its line number.
+    """
+    with open(path, encoding="utf-8", newline="") as fh:
+        reader = csv.reader(fh, skipinitialspace=True)
+        header = [h.strip() for h in next(reader, [])]
+        col = {name: j for j, name in enumerate(header)}
+        for required in ("pen", "date"):
+            if required not in col:
+                raise ValueError(f"delivery log {path} has no '{required}' column")
+        long_format = "ingredient" in col
+        if long_format and "kg" not in col:
+            raise ValueError(f"delivery log {path} has an 'ingredient' column but no 'kg' column")
+        if not long_format:
+            wide = [name for name in header if name not in ("pen", "date", "head")]
+            M = _dm_matrix(mapping, wide, n_feeds)
+        width = len(header)
+
+        carry = []
+        last_date = ""
+        numbered = ((reader.line_num, row) for row in reader)
+        while True:
+            raw = list(itertools.islice(numbered, block_rows))
+            rows = carry + [(line, [f.strip() for f in row] + [""] * (width - len(row)))
+                            for line, row in raw if any(f.strip() for f in row)]
+            if not rows:
+                return
+            lines = [line for line, _ in rows]
+            fields = list(zip(*(row for _, row in rows)))
+            dates = np.array(fields[col["date"]])
+            if dates[0] < last_date or (len(dates) > 1 and (dates[1:] < dates[:-1]).any()):
+                raise ValueError(f"delivery log {path} is not sorted by date")
+            if raw:
+                keep = dates < dates[-1]
+                carry = [r for r, k in zip(rows, keep) if not k]
+                if not keep.any():
+                    continue        # the whole block is one date; read on
+                rows = [r for r, k in zip(rows, keep) if k]
+                lines = [line for line, _ in rows]
+                fields = list(zip(*(row for _, row in rows)))
+                dates = dates[keep]
+            else:
+                carry = []
+            last_date = dates[-1]
+
+            if long_format:
+                names = np.array(fields[col["ingredient"]])
+                uniq, inv = np.unique(names, return_inverse=True)
+                M_long = _dm_matrix(mapping, list(uniq), n_feeds)
+                kg_dm = M_long[inv] * _numbers(fields[col["kg"]], "kg", lines, path)[:, None]
+            else:
+                as_fed = np.stack([_numbers(fields[col[name]], name, lines, path) for name in wide], axis=1)
+                kg_dm = as_fed @ M
+            head = _numbers(fields[col["head"]], "head", lines, path) if "head" in col else None
+            yield dates, np.array(fields[col["pen"]]), head, kg_dm
+            if not raw:
+                return
+
+
+class _RollingWindows:
+    """Ring buffer of the last max(windows) days and running window sums, for a growing set of pens."""
+
+    def __init__(self, windows, n_fields, capacity=64):
+        self.windows = tuple(windows)
+        self.span = max(self.windows)
+        self.ring = np.zeros((capacity, self.span, n_fields))
+        self.sums = np.zeros((capacity, len(self.windows), n_fields))
+        self.day = None
+
+    def grow(self, n_pens):
+        if n_pens > len(self.ring):
+            cap = max(n_pens, 2 * len(self.ring))
+            self.ring = np.concatenate([self.ring, np.zeros((cap - len(self.ring),) + self.ring.shape[1:])])
+            self.sums = np.concatenate([self.sums, np.zeros((cap - len(self.sums),) + self.sums.shape[1:])])
+
+    def push(self, day, today):
+        """Advance to calendar day `day` (an int) and add today's (pens x fields) values."""
+        if self.day is not None and day - self.day > self.span:
+            # Longer gap than any window: everything has expired
+            self.ring[:] = 0
+            self.sums[:] = 0
+        elif self.day is not None:
+            for empty in range(self.day + 1, day):
+                self._step(empty, None)
+        self._step(day, today)
+        self.day = day
+
+    def _step(self, day, today):
+        n = len(today) if today is not None else 0
+        for k, w in enumerate(self.windows):
+            self.sums[:, k] -= self.ring[:, (day - w) % self.span]
+            if n:
+                self.sums[:n, k] += today
+        slot = day % self.span
+        self.ring[:, slot] = 0
+        if n:
+            self.ring[:n, slot] = today
+
+
+def rolling_metrics(path, ingredient_map=None, windows=WINDOWS, block_rows=250_000, library=None):
+    """
+    Stream a delivery log and yield one dict per date with the pens fed that
+    day: 'date', 'pens', 'dmi' (kg DM per head that day) and
+    '<metric>_<w>d' arrays for METRICS x windows.
+    """
+    library = rumen_engine.LIBRARY if library is None else library
+    mapping = load_ingredient_map(library=library) if ingredient_map is None else ingredient_map
+    pen_index = {}
+    state = _RollingWindows(windows, len(_FIELDS))
+
+    for dates, pens, head, kg_dm in read_deliveries(path, mapping, len(library), block_rows):
+        # 1. Pen-days of the block and their daily model outputs, one evaluate() call
+        keys, inverse = np.unique(np.char.add(np.char.add(dates, "|"), pens), return_inverse=True)
+        daily = np.zeros((len(keys), len(library)))
+        np.add.at(daily, inverse, kg_dm)
+        if head is not None:
+            pen_head = np.zeros(len(keys))
+            np.maximum.at(pen_head, inverse, head)
+            daily /= np.where(pen_head > 0, pen_head, np.inf)[:, None]
+        key_date, key_pen = np.array([k.split("|", 1) for k in keys]).T
+        res = rumen_engine.evaluate(daily, library)
+        fed = res["dm"] > 0
+        values = np.stack([fed.astype(float), res["dm"], res["cp"] * res["dm"], res["peNDF"] * res["dm"],
+                           res["total_ge"], res["energy_methane"], res["ph"]], axis=1)
+        values = np.where(fed[:, None], np.nan_to_num(values), 0.0)
+
+        for pen in key_pen:
+            pen_index.setdefault(pen, len(pen_index))
+        state.grow(len(pen_index))
+        rows = np.array([pen_index[p] for p in key_pen])
+
+        # 2. One O(1) window update per calendar day for every pen
+        for date in np.unique(key_date):
+            on_day = np.flatnonzero((key_date == date) & fed)
+            today = np.zeros((len(pen_index), len(_FIELDS)))
+            today[rows[on_day]] = values[on_day]
+            state.push(int(np.datetime64(date, "D").astype(np.int64)), today)
+
+            idx = rows[on_day]
+            out = {"date": date, "pens": key_pen[on_day], "dmi": res["dm"][on_day]}
+            for k, w in enumerate(state.windows):
+                s = dict(zip(_FIELDS, state.sums[idx, k].T))
+                out[f"ph_{w}d"] = s["ph"] / s["days"]
+                out[f"peNDF_{w}d"] = s["pendf_dm"] / s["dm"]
+                out[f"cp_{w}d"] = s["cp_dm"] / s["dm"]
+                out[f"Ym_{w}d"] = s["ch4"] / s["ge"]
+            yield out
+
+
+def rolling_report(path, out_path, ingredient_map=None, windows=WINDOWS, block_rows=250_000, library=None):
+    """Write the rolling metrics as CSV (pen, date, dmi_kg per head, <metric>_<w>d ...); returns the row count."""
+    columns = [f"{m}_{w}d" for m in METRICS for w in windows]
+    n = 0
+    with open(out_path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["pen", "date", "dmi_kg"] + columns)
+        for day in rolling_metrics(path, ingredient_map, windows, block_rows, library):
+            table = np.stack([day["dmi"]] + [day[c] for c in columns], axis=1)
+            writer.writerows([pen, day["date"]] + [f"{v:.4f}" for v in row]
+                             for pen, row in zip(day["pens"], table))
+            n += len(day["pens"])
+    return n
+
+
+def write_demo_log(path, n_pens=300, days=120, start="2024-01-01", seed=0):
+    """Synthetic long-format bunk calls: two feedings a day, pens stepping up from grower to finisher."""
+    rng = np.random.default_rng(seed)
+    grower = {"grass_hay": 5.5, "alfalfa_hay": 3.0, "dry_rolled_corn": 3.0, "soybean_meal": 1.1, "mineral_premix": 0.1}
+    finisher = {"grass_hay": 4.5, "alfalfa_hay": 1.7, "steam_flaked_corn": 5.0, "dry_rolled_corn": 2.3,
+                "soybean_meal": 1.4, "yellow_grease": 0.2, "mineral_premix": 0.1}
+    names = sorted(set(grower) | set(finisher))
+    g = np.array([grower.get(k, 0.0) for k in names])
+    f = np.array([finisher.get(k, 0.0) for k in names])
+    offset = rng.integers(0, days // 2, n_pens)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write("pen,date,head,ingredient,kg\n")
+        for d, date in enumerate(np.arange(np.datetime64(start), np.datetime64(start) + days)):
+            mix = np.clip((d - offset) / 30, 0, 1)[:, None]
+            head = rng.integers(90, 110, n_pens)[:, None]
+            kg = ((1 - mix) * g + mix * f) * head * rng.normal(1.0, 0.04, (n_pens, len(names)))
+            for feeding in (0.45, 0.55):
+                fh.writelines(f"P{p:03d},{date},{head[p, 0]},{name},{kg[p, k] * feeding:.1f}\n"
+                              for p in range(n_pens) for k, name in enumerate(names) if kg[p, k] > 0)
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+
+    if len(sys.argv) > 1:
+        log_path = sys.argv[1]
+    else:
+        log_path = os.path.join(tempfile.gettempdir(), "bunk_calls_demo.csv")
+        write_demo_log(log_path)
+    out_path = os.path.splitext(log_path)[0] + "_rolling.csv"
+
+    t0 = time.perf_counter()
+    n_rows = rolling_report(log_path, out_path)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Bunk calls: {log_path}")
+    print("=" * 70)
+    print(f"  {n_rows:,} pen-days with rolling {'/'.join(map(str, WINDOWS))}-day metrics in {elapsed:.1f} s")
+    print(f"  -> {out_path}")
+
+    last = None
+    for last in rolling_metrics(log_path):
+        pass
+    print(f"\n{last['date']}{'':4}{'DMI':>6}{'pH 3d':>8}{'7d':>6}{'14d':>6}{'peNDF 7d':>10}{'CP 7d':>7}{'Ym 7d':>7}")
+    for i in range(min(8, len(last["pens"]))):
+        print(f"{last['pens'][i]:<14}{last['dmi'][i]:>6.0f}{last['ph_3d'][i]:>8.2f}{last['ph_7d'][i]:>6.2f}"
+              f"{last['ph_14d'][i]:>6.2f}{last['peNDF_7d'][i]:>10.1f}{last['cp_7d'][i]:>7.1f}"
+              f"{last['Ym_7d'][i]*100:>7.2f}")
+    print("=" * 70)
@@ -0,0 +1,230 @@
+"""
+Exact Dyadic Breed Compositions
+===============================
+Every breed fraction reachable from the database by 0.5 * sire + 0.5 * dam
+is a dyadic rational, n / 2^e. breeding_5.py halves floats every
+generation and formatComp() then hides anything under 0.001, so by
+generation 10 (2^-10 < 0.001) founder breeds drop out of the display.
+Here a composition is stored exactly: integer numerators (one per breed
+of the breed index) over a shared 2^e, reduced so at least one numerator
+is odd.
+
+CompositionTable interns compositions (hash-consing): equal compositions
+get one integer id, and their numerators live in one growing int64
+array (ids x breeds) with an exponent column. On top of the ids it memoises
+    cross(sire, dam)    -> calf id and retained heterosis, per (sire, dam)
+    rounded(id, bits)   -> nearest composition over 2^bits (largest
+                           remainder, so shares still sum exactly to 1)
+Both take id arrays, compute only the pairs not seen before in one
+vectorised step, and answer the rest from the cache. A rotation or herd
+simulation that meets the same (sire, dam) pair every year or replicate
+pays for it once. default_table() is shared by the modules that use it.
+
+Exponents are capped at MAX_EXPONENT = 62 generations of halving so
+numerators stay in int64.
+"""
+
+from fractions import Fraction
+
+import numpy as np
+
+import heterosis
+
+MAX_EXPONENT = 62
+
+
+def _reduce(num, exp):
+    # Divide out common factors of 2 so at least one numerator is odd (or e == 0)
+    low = np.bitwise_or.reduce(num, axis=1)
+    low = low & -low
+    shift = np.minimum(np.log2(np.maximum(low, 1)).astype(np.int64), exp)
+    return num >> shift[:, None], exp - shift
+
+
+class CompositionTable:
+    """Interned exact compositions over one breed index, with memoised crosses."""
+
+    def __init__(self, breeds=None):
+        self.breeds = heterosis.breed_index() if breeds is None else tuple(breeds)
+        self._num = np.zeros((64, len(self.breeds)), dtype=np.int64)
+        self._exp = np.zeros(64, dtype=np.int64)
+        self._size = 0
+        self._ids = {}
+        self._cross = {}        # (sire << 32 | dam) -> (calf id, heterosis)
+        self._round = {}        # (id, bits) -> id
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def numerators(self):
+        """(ids x breeds) int64 numerators; row i is over 2^exponents[i]."""
+        return self._num[:self._size]
+
+    @property
+    def exponents(self):
+        return self._exp[:self._size]
+
+    def _intern(self, num, exp):
+        # Ids for reduced rows, adding the ones not seen before
+        out = np.empty(len(num), dtype=np.int64)
+        for i, (row, e) in enumerate(zip(num, exp)):
+            key = (int(e), row.tobytes())
+            k = self._ids.get(key)
+            if k is None:
+                if self._size == len(self._num):
+                    self._num = np.vstack([self._num, np.zeros_like(self._num)])
+                    self._exp = np.concatenate([self._exp, np.zeros_like(self._exp)])
+                k = self._ids[key] = self._size
+                self._num[k], self._exp[k] = row, e
+                self._size += 1
+            out[i] = k
+        return out
+
+    def intern(self, compositions):
+        """
+        Ids for compositions: {breed: fraction} dicts (floats must be exact
+        dyadics, Fractions are fine) or an (N x breeds) float array.
+        """
+        if isinstance(compositions, np.ndarray):
+            P = np.atleast_2d(compositions)
+            exact = [[Fraction(float(v)) for v in row] for row in P]
+        else:
+            index = {b: i for i, b in enumerate(self.breeds)}
+            exact = []
+            for comp in compositions:
+                row = [Fraction(0)] * len(self.breeds)
+                for breed, fraction in comp.items():
+                    if breed not in index:
+                        raise ValueError(f"unknown breed '{breed}'; known: {', '.join(self.breeds)}")
+                    row[index[breed]] += Fraction(fraction)
+                exact.append(row)
+        num = np.zeros((len(exact), len(self.breeds)), dtype=np.int64)
+        exp = np.zeros(len(exact), dtype=np.int64)
+        for i, row in enumerate(exact):
+            if sum(row) != 1 or min(row) < 0:
+                raise ValueError(f"composition {i} is not a set of fractions summing to 1")
+            denominator = max(f.denominator for f in row)
+            e = denominator.bit_length() - 1
+            if denominator != 1 << e or e > MAX_EXPONENT:
+                raise ValueError(f"composition {i} is not a dyadic fraction over at most 2^{MAX_EXPONENT}")
+            num[i] = [f.numerator * (denominator // f.denominator) for f in row]
+            exp[i] = e
+        return self._intern(*_reduce(num, exp))
+
+    def cross(self, sires, dams):
+        """
+        Calf ids and retained heterosis (float) for paired id arrays,
+        memoised per (sire, dam).
+        """
+        sires, dams = np.broadcast_arrays(np.asarray(sires, dtype=np.int64), np.asarray(dams, dtype=np.int64))
+        keys = (sires << 32) | dams
+        unique, inverse = np.unique(keys.ravel(), return_inverse=True)
+        missing = [k for k in unique.tolist() if k not in self._cross]
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            m = np.array(missing, dtype=np.int64)
+            s, d = m >> 32, m & 0xFFFFFFFF
+            es, ed = self._exp[s], self._exp[d]
+            e = np.maximum(es, ed)
+            if (e + 1 > MAX_EXPONENT).any():
+                raise OverflowError(f"composition exponent would pass 2^{MAX_EXPONENT}")
+            calf = (self._num[s] << (e - es)[:, None]) + (self._num[d] << (e - ed)[:, None])
+            ids = self._intern(*_reduce(calf, e + 1))
+            h = 1.0 - np.einsum("nb,nb->n", self.fractions(s), self.fractions(d))
+            self._cross.update(zip(missing, zip(ids.tolist(), h.tolist())))
+        calf_id, h = np.array([self._cross[k] for k in unique.tolist()]).T.reshape(2, -1)
+        return calf_id.astype(np.int64)[inverse].reshape(keys.shape), h[inverse].reshape(keys.shape)
+
+    def rounded(self, ids, bits):
+        """Ids of each composition rounded to shares over 2^bits (largest remainder), memoised."""
+        ids = np.asarray(ids, dtype=np.int64)
+        unique, inverse = np.unique(ids.ravel(), return_inverse=True)
+        missing = [k for k in unique.tolist() if (k, bits) not in self._round]
+        if missing:
+            m = np.array(missing, dtype=np.int64)
+            num, exp = self._num[m], self._exp[m]
+            fine = exp <= bits
+            out = np.empty(len(m), dtype=np.int64)
+            out[fine] = m[fine]
+            if (~fine).any():
+                shift = (exp[~fine] - bits)[:, None]
+                base = num[~fine] >> shift
+                remainder = num[~fine] - (base << shift)
+                short = (1 << bits) - base.sum(axis=1)
+                order = np.argsort(-remainder, axis=1, kind="stable")
+                bump = np.arange(base.shape[1])[None, :] < short[:, None]
+                np.put_along_axis(base, order, np.take_along_axis(base, order, axis=1) + bump, axis=1)
+                out[~fine] = self._intern(*_reduce(base, np.full(len(base), bits)))
+            self._round.update(((k, bits), v) for k, v in zip(missing, out.tolist()))
+        return np.array([self._round[(k, bits)] for k in unique.tolist()], dtype=np.int64)[inverse].reshape(ids.shape)
+
+    def fractions(self, ids):
+        """(N x breeds) float shares of ids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        return self._num[ids] / np.exp2(self._exp[ids])[..., None]
+
+    def exact(self, k):
+        """{breed: Fraction} for one id, breeds with a share only."""
+        den = 1 << int(self._exp[k])
+        return {b: Fraction(int(n), den) for b, n in zip(self.breeds, self._num[k]) if n}
+
+    def heterosis_exact(self, sire, dam):
+        """Retained heterosis of one cross as a Fraction."""
+        s, d = self.exact(sire), self.exact(dam)
+        return 1 - sum(f * d[b] for b, f in s.items() if b in d)
+
+    def format(self, k):
+        """'5/8 Angus, 3/8 Brahman': every share of one id, largest first, none dropped."""
+        shares = sorted(self.exact(k).items(), key=lambda bf: -bf[1])
+        return ", ".join(f"{f} {b}" for b, f in shares)
+
+
+_default = {}
+
+
+def default_table():
+    """The shared table over the ANIMAL_DATABASE breed index."""
+    if "table" not in _default:
+        _default["table"] = CompositionTable()
+    return _default["table"]
+
+
+if __name__ == "__main__":
+    import time
+
+    table = default_table()
+    names, breeds, P = heterosis.database_matrix()
+    ids = dict(zip(names, table.intern(P)))
+
+    # breeding_5.py's twelve-generation path: Brangus cows, then a Charolais-Hereford-Angus rotation
+    print("=" * 70)
+    print("Brangus dam line, 12 generations of Charolais / Hereford / Angus bulls")
+    print("=" * 70)
+    dam = ids["Brangus"]
+    for g, sire in enumerate(["Charolais", "Hereford", "Angus"] * 4, start=1):
+        calf, h = table.cross(ids[sire], dam)
+        shown = heterosis.format_composition(table.fractions(calf), breeds)
+        brahman = table.exact(int(calf)).get("Brahman", 0)
+        print(f"Gen {g:>2} x {sire:<10} H {float(h)*100:5.1f}%  Brahman {str(brahman):>8} "
+              f"(formatComp {'shows' if 'Brahman' in shown else 'hides'} it)")
+        dam = calf
+    print(f"\nGen 12 exact: {table.format(int(dam))}")
+    print(f"Heterosis exact: {table.heterosis_exact(ids['Angus'], int(dam))} "
+          f"(next Angus bull)")
+
+    # 1,000 replicate dam lines x 20 sire slots; the repeat is answered from the cache
+    rng = np.random.default_rng(0)
+    sires = rng.choice(list(ids.values()), (1000, 20))
+    founders = rng.choice(list(ids.values()), (1000, 20))
+    for label in ("first pass", "repeat"):
+        t0 = time.perf_counter()
+        hits, misses = table.hits, table.misses
+        dams = founders
+        for _ in range(12):
+            dams, h = table.cross(sires, dams)
+        print(f"\n{label}: 12 generations x 20,000 matings in {(time.perf_counter() - t0)*1000:.0f} ms, "
+              f"{table.misses - misses:,} new pairs, {table.hits - hits:,} cache hits, {len(table):,} compositions")
+    print("=" * 70)
@@ -0,0 +1,170 @@
+"""
+Per-Feed Attribution (Shapley Values)
+=====================================
+The findings in balance_3.py and ted_lecture_rum.py say why fiber_health
+or pH collapsed, not which ingredient did it. This module splits each
+output of a pen's ration into one share per feed: the feed's Shapley
+value, its average marginal effect over every order in which the ration
+could be assembled. The shares add up exactly to output(ration) -
+output(empty).
+
+Game: a coalition S of feeds is the ration with the feeds outside S taken
+down to `baseline` kg (default 0). The models return NaN for an empty
+ration, so an empty coalition scores the model's own intercept (`empty`,
+default EMPTY: pH at the CNCPS base pH, fiber_health 1, energies 0).
+
+Feeds at their baseline are null players (Shapley value 0), so each pen's
+game runs over its active feeds only, k of them:
+    exact   - k <= exact_max: all 2^k coalitions of every pen in batched
+              model calls, combined with one (2^k x k) Shapley weight matrix.
+              The six-feed library is 64 rows per pen.
+    sampled - otherwise: n_permutations random orders per pen (antithetic:
+              each order is also walked in reverse), k + 1 prefixes per
+              order. Each order's marginals telescope to the full change,
+              so the shares still add up exactly.
+"""
+
+from functools import lru_cache
+from math import factorial
+
+import numpy as np
+
+import rumen_engine
+
+OUTPUTS = ("ph", "energy_me", "energy_methane", "fiber_health")
+EMPTY = {"ph": rumen_engine.BASE_PH, "fiber_health": 1.0}     # anything else: 0
+_BLOCK_ELEMENTS = 20_000_000    # rows x feeds per model call
+
+
+@lru_cache(maxsize=32)
+def shapley_weights(k):
+    """
+    Coalition masks (2^k x k, bit j of row s = feed j in s) and the
+    (2^k x k) matrix W such that values @ W gives every player's Shapley value.
+    """
+    s = np.arange(2 ** k)
+    masks = ((s[:, None] >> np.arange(k)) & 1).astype(bool)
+    size = masks.sum(axis=1)
+    w = np.array([factorial(m) * factorial(k - m - 1) / factorial(k) for m in range(k)])
+    W = np.zeros((2 ** k, k))
+    for j in range(k):
+        without = s[~masks[:, j]]
+        W[without, j] -= w[size[without]]
+        W[without | (1 << j), j] += w[size[without]]
+    masks.setflags(write=False)
+    W.setflags(write=False)
+    return masks, W
+
+
+def _scores(model, rations, outputs, empty):
+    res = model(rations)
+    return {key: np.where(np.isnan(res[key]), empty.get(key, 0.0), res[key]) for key in outputs}
+
+
+def shapley(rations, outputs=OUTPUTS, model=None, library=None, baseline=None, empty=None,
+            exact_max=12, n_permutations=128, seed=None):
+    """
+    Per-feed Shapley attribution for an (N x feeds) kg-DM matrix. `model`
+    is any batch model with the rumen_engine.evaluate() signature, e.g.
+    lambda x: rumen_engine.evaluate_tdn(x) with library=rumen_engine.TDN_LIBRARY.
+
+    Returns {output: (N x feeds) shares} for each of `outputs`, plus
+    'base' and 'total' ({output: (N,)} scores of the empty and the full
+    ration; base + shares.sum(axis=1) == total) and 'exact' ((N,) bool,
+    False where the pen was sampled).
+    """
+    model = rumen_engine.evaluate if model is None else model
+    library = rumen_engine.LIBRARY if library is None else library
+    empty = EMPTY if empty is None else empty
+    x = np.atleast_2d(np.asarray(rations, dtype=float))
+    n, n_feeds = x.shape
+    if n_feeds != len(library):
+        raise ValueError(f"expected {len(library)} feed columns {library.names}, got {n_feeds}")
+    base = np.broadcast_to(np.zeros(n_feeds) if baseline is None else np.asarray(baseline, dtype=float),
+                           (n_feeds,))
+    delta = x - base
+    active = delta != 0
+    k_per_pen = active.sum(axis=1)
+    rng = np.random.default_rng(seed)
+
+    out = {key: np.zeros((n, n_feeds)) for key in outputs}
+    out["base"] = _scores(model, base[None, :], outputs, empty)
+    out["base"] = {key: np.repeat(v, n) for key, v in out["base"].items()}
+    out["total"] = _scores(model, x, outputs, empty)
+    out["exact"] = k_per_pen <= exact_max
+
+    for k in np.unique(k_per_pen[k_per_pen > 0]):
+        pens = np.flatnonzero(k_per_pen == k)
+        cols = np.nonzero(active[pens])[1].reshape(len(pens), k)      # active feeds, ascending
+        if k <= exact_max:
+            masks, W = shapley_weights(k)
+            steps = masks[None, :, :]                                    # (1 x 2^k x k)
+        else:
+            # Antithetic random orders; prefix j of an order holds its first j feeds
+            half = (n_permutations + 1) // 2
+            order = rng.random((len(pens), half, k)).argsort(axis=2)
+            order = np.concatenate([order, order[:, :, ::-1]], axis=1)
+            rank = order.argsort(axis=2)                                 # position of each feed in the order
+            steps = rank[:, :, None, :] < np.arange(k + 1)[None, None, :, None]
+
+        rows_per_pen = int(np.prod(steps.shape[1:-1]))
+        block = max(1, _BLOCK_ELEMENTS // (rows_per_pen * n_feeds))
+        for start in range(0, len(pens), block):
+            p, c = pens[start:start + block], cols[start:start + block]
+            s = steps if steps.shape[0] == 1 else steps[start:start + block]
+            # Coalition rations: baseline everywhere, plus the active feeds each coalition holds
+            held = np.zeros((len(p), rows_per_pen, n_feeds), dtype=bool)
+            held[np.arange(len(p))[:, None, None], np.arange(rows_per_pen)[None, :, None], c[:, None, :]] = \
+                s.reshape(-1, rows_per_pen, k)
+            trial = base + held * delta[p, None, :]
+            values = _scores(model, trial.reshape(-1, n_feeds), outputs, empty)
+
+            for key in outputs:
+                v = values[key].reshape((len(p),) + s.shape[1:-1])
+                if k <= exact_max:
+                    share = v @ W
+                else:
+                    marginal = np.diff(v, axis=2)                        # (pens x orders x k), by order step
+                    share = np.take_along_axis(marginal, rank[start:start + block], axis=2).mean(axis=1)
+                out[key][p[:, None], c] = share
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    scenarios = {
+        "balanced": [5, 4, 2, 2, 1.5, 0],
+        "feedlot": [1, 0, 0, 9, 0.5, 0],
+        "acidosis": [0.5, 0, 0, 10, 0, 0],
+        "methane_mitigation": [6, 2, 2, 0, 1, 0.6],
+    }
+    res = shapley(list(scenarios.values()))
+    names = rumen_engine.FEED_NAMES
+    print("=" * 70)
+    print("Shapley shares per feed (ted_lecture_rum engine, vs the empty ration)")
+    print("=" * 70)
+    for key, label, fmt in (("ph", "pH", "+7.2f"), ("energy_me", "ME Mcal", "+7.1f"),
+                            ("energy_methane", "CH4 Mcal", "+7.2f")):
+        print(f"\n{label:<20}{'base':>6}" + "".join(f"{k:>7}" for k in names) + f"{'total':>8}")
+        for i, name in enumerate(scenarios):
+            print(f"{name:<20}{res['base'][key][i]:>6.2f}"
+                  + "".join(f"{v:{fmt}}" for v in res[key][i]) + f"{res['total'][key][i]:>8.2f}")
+
+    # balance_3.py: which feed pulled fiber_health down?
+    tdn = shapley([[1, 0.5, 4, 6, 0.5, 0.4], [6, 3, 1, 1, 1, 0]], outputs=("ph", "fiber_health"),
+                  model=rumen_engine.evaluate_tdn, library=rumen_engine.TDN_LIBRARY,
+                  empty={"ph": 6.8, "fiber_health": 1.0})
+    print(f"\nbalance_3 fiber_health{'':>4}" + "".join(f"{k:>7}" for k in rumen_engine.TDN_LIBRARY.names)
+          + f"{'total':>8}")
+    for i, label in enumerate(("hot finisher", "forage grower")):
+        print(f"{label:<20}{tdn['base']['fiber_health'][i]:>6.2f}"
+              + "".join(f"{v:>+7.2f}" for v in tdn["fiber_health"][i]) + f"{tdn['total']['fiber_health'][i]:>8.2f}")
+
+    rng = np.random.default_rng(0)
+    barn = rng.uniform(0, 1, (10_000, 6)) * [8, 5, 6, 8, 2, 0.6]
+    barn[rng.uniform(size=barn.shape) < 0.2] = 0
+    t0 = time.perf_counter()
+    shapley(barn)
+    print(f"\nExact attribution for a 10,000-pen barn: {time.perf_counter() - t0:.2f} s")
+    print("=" * 70)
@@ -0,0 +1,145 @@
+"""
+Columnar Feed Library
+=====================
+Loads a feed table from CSV or JSON into a dense nutrient matrix
+(feeds x attributes) so diet composition for any number of rations is a
+single matrix product instead of a chem(attr) walk per attribute.
+
+Bundled libraries (feeds/):
+    integrated.csv   - GE/kd/pe table used by ted_lecture_rum.py and rumen_engine
+    professional.csv - TDN/peNDF/fermentRate table used by balance_2.py and balance_3.py
+    balance.csv      - professional.csv with balance.py's forage / corn / protein CP and
+                       TDN on hay / dry / sbm (the 'balance' rumen profile)
+    integrated_sd.csv - lot-to-lot standard deviations for integrated.csv (rumen_uncertainty)
+    ingredients.csv  - mill ingredient names -> library feed and DM % (bunk_calls)
+
+File formats:
+    CSV  - one row per feed, a `name` column, optional text `label` column,
+           every other column numeric.
+    JSON - either a list of records with a `name` key, or the page-style
+           mapping {name: {attr: value, ...}}.
+
+Flag columns (0/1) replace hard-coded feed names in the models:
+    forage - counts toward forage % / fiber TDN
+    grain  - starch kd is weighted over grain starch; grain kg (balance profile)
+    buffer - cation buffering bonus (alfalfa)
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+FEEDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feeds")
+INTEGRATED = os.path.join(FEEDS_DIR, "integrated.csv")
+PROFESSIONAL = os.path.join(FEEDS_DIR, "professional.csv")
+INTEGRATED_SD = os.path.join(FEEDS_DIR, "integrated_sd.csv")
+
+TEXT_COLUMNS = ("name", "label")
+
+
+class FeedLibrary:
+    """Feed names, attribute names and a float matrix of shape (feeds, attributes)."""
+
+    def __init__(self, names, attributes, matrix, labels=None):
+        self.names = tuple(names)
+        self.attributes = tuple(attributes)
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.labels = tuple(labels) if labels is not None else self.names
+        if self.matrix.shape != (len(self.names), len(self.attributes)):
+            raise ValueError(f"matrix shape {self.matrix.shape} does not match "
+                             f"{len(self.names)} feeds x {len(self.attributes)} attributes")
+        self._feed_index = {k: i for i, k in enumerate(self.names)}
+        self._attr_index = {k: j for j, k in enumerate(self.attributes)}
+        self.matrix.setflags(write=False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"FeedLibrary({len(self.names)} feeds x {len(self.attributes)} attributes)"
+
+    def column(self, attr):
+        """One attribute across all feeds; flag columns missing from the file read as 0."""
+        if attr not in self._attr_index:
+            if attr in ("forage", "grain", "buffer"):
+                return np.zeros(len(self.names))
+            raise KeyError(f"attribute '{attr}' not in library {self.attributes}")
+        return self.matrix[:, self._attr_index[attr]]
+
+    def subset(self, names):
+        """Library restricted to (and ordered by) the given feed names."""
+        missing = [k for k in names if k not in self._feed_index]
+        if missing:
+            raise KeyError(f"feeds not in library: {missing}")
+        idx = [self._feed_index[k] for k in names]
+        return FeedLibrary([self.names[i] for i in idx], self.attributes,
+                           self.matrix[idx], [self.labels[i] for i in idx])
+
+    def composition(self, rations):
+        """
+        Diet composition for an (N x feeds) kg-DM matrix: one product gives
+        every attribute as a DM-weighted mean. Returns (dm, {attr: array}).
+        """
+        x = np.atleast_2d(np.asarray(rations, dtype=float))
+        dm = x.sum(axis=1)
+        comp = (x @ self.matrix) / np.where(dm > 0, dm, np.nan)[:, None]
+        return dm, {attr: comp[:, j] for j, attr in enumerate(self.attributes)}
+
+    def to_js(self):
+        """Columnar object for embedding in the generated pages."""
+        return {"names": list(self.names), "labels": list(self.labels),
+                "attributes": list(self.attributes), "matrix": self.matrix.tolist()}
+
+
+def _from_records(records):
+    names = [str(r["name"]) for r in records]
+    labels = [str(r.get("label", r["name"])) for r in records]
+    attributes = []
+    for r in records:
+        for k in r:
+            if k not in TEXT_COLUMNS and k not in attributes:
+                attributes.append(k)
+    matrix = [[float(r.get(a) or 0.0) for a in attributes] for r in records]
+    return FeedLibrary(names, attributes, matrix, labels)
+
+
+def load_feed_library(path):
+    """Read a CSV or JSON feed table (see module docstring for the layouts)."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8", newline="") as fh:
+        if ext == ".csv":
+            records = list(csv.DictReader(fh))
+        elif ext == ".json":
+            data = json.load(fh)
+            if isinstance(data, dict):
+                records = [dict(name=k, **v) for k, v in data.items()]
+            else:
+                records = data
+        else:
+            raise ValueError(f"unsupported feed library format '{ext}' (use .csv or .json)")
+    if not records:
+        raise ValueError(f"feed library {path} is empty")
+    return _from_records(records)
+
+
+_cache = {}
+
+
+def default_library(path=INTEGRATED):
+    """Load a bundled library once per process."""
+    path = os.path.abspath(path)
+    if path not in _cache:
+        _cache[path] = load_feed_library(path)
+    return _cache[path]
+
+
+if __name__ == "__main__":
+    import sys
+
+    lib = load_feed_library(sys.argv[1]) if len(sys.argv) > 1 else default_library()
+    print(lib)
+    print(f"{'feed':<8}" + "".join(f"{a:>12}" for a in lib.attributes))
+    for name, row in zip(lib.names, lib.matrix):
+        print(f"{name:<8}" + "".join(f"{v:>12g}" for v in row))
@@ -0,0 +1,178 @@
+"""
+Declarative Findings Rules
+==========================
+The associative-effect cascade of balance_3.py (nitrogen limitation, pH
+bands, fat toxicity, passage loss, epithelial damage) as a data table,
+rules/tdn_findings.json, read by both the generated page and
+rumen_engine.evaluate_tdn().
+
+Table layout:
+    state   - initial value of each state variable (fiber_health, ...)
+    groups  - evaluated in order; each has a `metric` and ordered `bands`.
+              The first band whose `when` conditions ([name, op, value],
+              all must hold) match is selected; the last band must have
+              no conditions. A band may carry
+                  effect - {on, op: subtract|set|multiply, value} or
+                           {on, op, ref, slope[, min][, max]} with
+                           amount = slope * (metric - ref) clipped to
+                           [min, max]
+                  type / title / text - the finding shown in the page
+
+In batch, every group is a masked select over N rations, so the result is
+one small integer code per (ration, group) - an index into the group's
+bands - instead of formatted prose. describe() renders the prose for a
+single ration when it is needed.
+"""
+
+import json
+import operator
+import os
+import re
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+TDN_FINDINGS = os.path.join(RULES_DIR, "tdn_findings.json")
+
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+EFFECT_OPS = ("subtract", "set", "multiply")
+PLACEHOLDER = re.compile(r"\{(\w+):\.(\d+)f\}")
+
+
+def load_rules(path=TDN_FINDINGS):
+    """Read and validate a rule table."""
+    with open(path, encoding="utf-8") as fh:
+        table = json.load(fh)
+    for group in table["groups"]:
+        bands = group["bands"]
+        if not bands or bands[-1]["when"]:
+            raise ValueError(f"rule group '{group['group']}' must end with an unconditional band")
+        for band in bands:
+            for _, op, _ in band["when"]:
+                if op not in OPS:
+                    raise ValueError(f"unknown operator '{op}' in rule {band['code']}")
+            effect = band.get("effect")
+            if effect and effect["on"] not in table["state"]:
+                raise ValueError(f"rule {band['code']} targets unknown state '{effect['on']}'")
+            if effect and effect["op"] not in EFFECT_OPS:
+                raise ValueError(f"unknown effect op '{effect['op']}' in rule {band['code']}")
+    return table
+
+
+_cache = {}
+
+
+def default_rules(path=TDN_FINDINGS):
+    """Load a bundled rule table once per process."""
+    path = os.path.abspath(path)
+    if path not in _cache:
+        _cache[path] = load_rules(path)
+    return _cache[path]
+
+
+def code_names(table):
+    """Band codes per group, e.g. [['N_DEFICIENT', ...], ['PH_ACUTE', ...], ...]."""
+    return [[band["code"] for band in group["bands"]] for group in table["groups"]]
+
+
+def effect_amount(effect, metric):
+    if "value" in effect:
+        return np.full_like(metric, effect["value"], dtype=float)
+    amount = effect["slope"] * (metric - effect["ref"])
+    if effect.get("min") is not None:
+        amount = np.maximum(amount, effect["min"])
+    if effect.get("max") is not None:
+        amount = np.minimum(amount, effect["max"])
+    return amount
+
+
+def apply_rules(values, table=None):
+    """
+    Evaluate every group over arrays of model values ({name: (N,)}).
+    Returns (state, codes, amounts): state maps each state variable to an
+    (N,) array, codes is (N x groups) int8 band indices, and amounts is
+    (N x groups) with the selected band's effect amount (0 where none).
+    """
+    table = default_rules() if table is None else table
+    n = len(np.atleast_1d(next(iter(values.values()))))
+    state = {name: np.full(n, init, dtype=float) for name, init in table["state"].items()}
+    codes = np.empty((n, len(table["groups"])), dtype=np.int8)
+    amounts = np.zeros((n, len(table["groups"])))
+
+    for g, group in enumerate(table["groups"]):
+        # 1. First matching band per ration
+        chosen = np.full(n, -1, dtype=np.int8)
+        for b, band in enumerate(group["bands"]):
+            hit = chosen < 0
+            for name, op, bound in band["when"]:
+                hit &= OPS[op](values[name], bound)
+            chosen[hit] = b
+        codes[:, g] = chosen
+
+        # 2. Effects of the selected bands
+        metric = values[group["metric"]]
+        for b, band in enumerate(group["bands"]):
+            effect = band.get("effect")
+            if not effect:
+                continue
+            hit = chosen == b
+            amount = effect_amount(effect, metric)
+            amounts[:, g] = np.where(hit, amount, amounts[:, g])
+            target = state[effect["on"]]
+            if effect["op"] == "subtract":
+                state[effect["on"]] = np.where(hit, target - amount, target)
+            elif effect["op"] == "multiply":
+                state[effect["on"]] = np.where(hit, target * amount, target)
+            else:
+                state[effect["on"]] = np.where(hit, amount, target)
+    return state, codes, amounts
+
+
+def _to_fixed(value, digits):
+    # Number.prototype.toFixed: round the exact binary value half-up, so the
+    # page and Python print identical findings
+    return str(Decimal(float(value)).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def describe(codes, amounts, values, table=None):
+    """Findings (code, type, title, text) for one ration's codes / amounts / scalar values."""
+    table = default_rules() if table is None else table
+    findings = []
+    for g, group in enumerate(table["groups"]):
+        band = group["bands"][int(codes[g])]
+        if "title" not in band:
+            continue
+        fields = dict(values, effect_pct=float(amounts[g]) * 100)
+        text = PLACEHOLDER.sub(lambda m: _to_fixed(fields[m.group(1)], int(m.group(2))), band["text"])
+        findings.append({"code": band["code"], "type": band["type"], "title": band["title"], "text": text})
+    return findings
+
+
+if __name__ == "__main__":
+    import time
+
+    import rumen_engine
+
+    table = default_rules()
+    names = code_names(table)
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 1, (2_000_000, 6)) * [12, 8, 10, 10, 4, 1.5]
+    t0 = time.perf_counter()
+    res = rumen_engine.evaluate_tdn(batch)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Diagnosed {len(batch):,} rations in {elapsed:.2f} s (model + rules)")
+    print("=" * 70)
+    for g, group in enumerate(table["groups"]):
+        counts = np.bincount(res["finding_codes"][:, g], minlength=len(names[g]))
+        print(f"{group['group']:<11}" + "  ".join(f"{code} {c / len(batch):.1%}"
+                                                  for code, c in zip(names[g], counts)))
+
+    i = 0
+    row = {k: v[i] for k, v in res.items() if np.ndim(v) == 1}
+    print(f"\nRation 0 {np.round(batch[i], 1).tolist()}:")
+    for f in describe(res["finding_codes"][i], res["finding_amounts"][i], row, table):
+        print(f"  [{f['type']}] {f['title']}")
+    print("=" * 70)
@@ -0,0 +1,143 @@
+"""
+Breed Composition and Heterosis Engine
+======================================
+runMath() in breeding_5.py works one cross at a time: it loops over the
+Set of breed names in the sire and dam and builds the overlap table
+cell by cell. Here every composition is a dense vector over one breed
+index (the base breeds of ANIMAL_DATABASE in first-appearance order), so
+the same math runs on whole tables:
+
+    offspring = 0.5 * sire + 0.5 * dam                (Mendelian expectation)
+    retained heterosis = 1 - sum_i p_sire,i * p_dam,i  (Dickerson)
+
+For S sires (S x B) and D dams (D x B) the heterosis table is one
+product, 1 - sires @ dams.T, and offspring compositions one broadcast
+add. heterosis_table() scores every database animal as a sire against
+every database animal plus any number of commercial-herd dam
+compositions.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from breeding_5 import ANIMAL_DATABASE
+
+
+def breed_index(database=None):
+    """Base breeds of a database in first-appearance order."""
+    database = ANIMAL_DATABASE if database is None else database
+    breeds = {}
+    for animal in database.values():
+        for breed in animal["comp"]:
+            breeds.setdefault(breed, len(breeds))
+    return tuple(breeds)
+
+
+def composition_matrix(compositions, breeds, tol=1e-6):
+    """
+    (N x B) breed fractions from a list of {breed: fraction} dicts, or an
+    (N x B) array checked as is. Rows must sum to 1 within tol.
+    """
+    if isinstance(compositions, np.ndarray):
+        P = np.atleast_2d(np.asarray(compositions, dtype=float))
+        if P.shape[1] != len(breeds):
+            raise ValueError(f"expected {len(breeds)} breed columns, got {P.shape[1]}")
+    else:
+        index = {b: i for i, b in enumerate(breeds)}
+        P = np.zeros((len(compositions), len(breeds)))
+        for row, comp in enumerate(compositions):
+            for breed, fraction in comp.items():
+                if breed not in index:
+                    raise ValueError(f"unknown breed '{breed}'; known: {', '.join(breeds)}")
+                P[row, index[breed]] += fraction
+    bad = np.flatnonzero((np.abs(P.sum(axis=1) - 1.0) > tol) | (P < 0).any(axis=1))
+    if len(bad):
+        raise ValueError(f"composition {bad[0]} is not a set of fractions summing to 1: {P[bad[0]]}")
+    return P
+
+
+def database_matrix(database=None):
+    """Animal names, breed index and (animals x B) compositions of a database."""
+    database = ANIMAL_DATABASE if database is None else database
+    breeds = breed_index(database)
+    names = tuple(database)
+    return names, breeds, composition_matrix([database[name]["comp"] for name in names], breeds)
+
+
+def retained_heterosis(sires, dams):
+    """(S x D) Dickerson retained heterosis, 1 - sires @ dams.T, as a fraction."""
+    return 1.0 - np.atleast_2d(sires) @ np.atleast_2d(dams).T
+
+
+def offspring(sires, dams):
+    """(S x D x B) expected calf compositions, 0.5 * sire + 0.5 * dam."""
+    return 0.5 * (np.atleast_2d(sires)[:, None, :] + np.atleast_2d(dams)[None, :, :])
+
+
+def heterosis_table(dams=None, dam_names=None, database=None, compositions=True):
+    """
+    Every database animal as sire x (every database animal + `dams`).
+
+    dams is a list of {breed: fraction} dicts or an (N x B) array over
+    breed_index(database), e.g. a commercial herd's cows. Returns:
+        sires, dams - row and column names (extra dams: dam_names, or
+                      'dam 0', 'dam 1', ...)
+        breeds      - breed index of the composition axis
+        heterosis   - (S x D) retained heterosis fraction
+        offspring   - (S x D x B) calf compositions (omitted when
+                      compositions=False, for large herds)
+    """
+    names, breeds, P = database_matrix(database)
+    D, column_names = P, list(names)
+    if dams is not None and len(dams):
+        extra = composition_matrix(dams if isinstance(dams, np.ndarray) else list(dams), breeds)
+        D = np.vstack([P, extra])
+        column_names += list(dam_names) if dam_names is not None else [f"dam {i}" for i in range(len(extra))]
+    out = {"sires": names, "dams": tuple(column_names), "breeds": breeds,
+           "heterosis": retained_heterosis(P, D)}
+    if compositions:
+        out["offspring"] = offspring(P, D)
+    return out
+
+
+def format_composition(p, breeds, min_fraction=0.001):
+    """'62.5% Angus, 37.5% Brahman' for one composition vector, as formatComp() in breeding_5.py."""
+    # toFixed(1) rounds the binary value half-up (6.25 -> 6.3); '%.1f' would give 6.2
+    order = np.argsort(-p, kind="stable")
+    return ", ".join(f"{Decimal(float(p[i]) * 100).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)}% {breeds[i]}"
+                     for i in order if p[i] > min_fraction)
+
+
+if __name__ == "__main__":
+    import time
+
+    names, breeds, P = database_matrix()
+    res = heterosis_table()
+    short = [n.replace("F1 ", "").replace("Santa ", "S.")[:6] for n in names]
+
+    print("=" * 70)
+    print(f"Retained heterosis (%), {len(names)} database sires (rows) x dams (columns), {len(breeds)} breeds")
+    print("=" * 70)
+    print(f"{'':<20}" + "".join(f"{s:>7}" for s in short))
+    for i, name in enumerate(names):
+        print(f"{name:<20}" + "".join(f"{h*100:>7.0f}" for h in res["heterosis"][i]))
+
+    s, d = names.index("Charolais"), names.index("F1 Black Baldy")
+    print(f"\nCharolais x F1 Black Baldy: {res['heterosis'][s, d]*100:.1f}% retained, calf "
+          f"{format_composition(res['offspring'][s, d], breeds)}")
+
+    # A commercial herd: 200,000 cows from up to three rounds of random database crosses
+    rng = np.random.default_rng(0)
+    cows = P[rng.integers(0, len(P), 200_000)]
+    for _ in range(3):
+        cross = rng.uniform(size=len(cows)) < 0.5
+        cows[cross] = 0.5 * (P[rng.integers(0, len(P), cross.sum())] + cows[cross])
+    t0 = time.perf_counter()
+    herd = heterosis_table(cows, compositions=False)
+    elapsed = time.perf_counter() - t0
+    mean_h = herd["heterosis"][:, len(names):].mean(axis=1)
+    print(f"\n{len(names)} sires x {herd['heterosis'].shape[1]:,} dams in {elapsed*1000:.0f} ms; "
+          f"herd-average calf heterosis by sire: "
+          + ", ".join(f"{names[k]} {mean_h[k]*100:.1f}%" for k in np.argsort(-mean_h)[:3]))
+    print("=" * 70)
@@ -0,0 +1,145 @@
+"""
+Page Compute Worker
+===================
+Shared compute layer for the generated pages (ted_lecture_rum.py,
+balance_3.py, simulate_3.py). Each page keeps its model math in a
+`<script id="model-core">` block with no DOM access. The block exposes a
+row function `rowFn(input, i, out, o)` that reads one input row at input[i..]
+and writes one output row at out[o..].
+
+createCompute(rowFn, nIn, nOut) loads that block into a Web Worker built
+from a Blob, so it also works from file://, and returns { run(input) }:
+    input  - Float64Array of rows x nIn
+    result - Promise of a Float64Array of rows x nOut (buffer transferred back),
+             or null when a later run() or cancel() superseded the job
+A new run() cancels the job in flight. The worker works through large
+batches in chunks and yields between them, so a cancel takes effect
+mid-sweep. Without Worker support, or if the worker fails to start, the
+same row function runs on the page thread. The UI thread only packs
+inputs and renders results; patchFindings() is the pages' shared
+in-place renderer for the findings list.
+
+Pages embed COMPUTE_LAYER_JS through the __COMPUTE_LAYER__ placeholder.
+"""
+
+COMPUTE_LAYER_JS = """
+    // Compute layer (page_worker.py): #model-core runs in a Web Worker; batches of rows go in
+    // and come back as Float64Arrays, and a new run() cancels the job in flight
+    function workerLoop(rowFn, nIn, nOut, chunkRows) {
+        let cancelledUpTo = 0;
+        self.onmessage = async (e) => {
+            const msg = e.data;
+            if(msg.type === 'cancel') {
+                cancelledUpTo = Math.max(cancelledUpTo, msg.id);
+                return;
+            }
+            const n = msg.input.length / nIn;
+            const out = new Float64Array(n * nOut);
+            for(let start = 0; start < n; start += chunkRows) {
+                if(msg.id <= cancelledUpTo) return;
+                const end = Math.min(n, start + chunkRows);
+                for(let r = start; r < end; r++) rowFn(msg.input, r * nIn, out, r * nOut);
+                // Yield between chunks so a pending cancel message is seen
+                if(end < n) await new Promise(resolve => setTimeout(resolve, 0));
+            }
+            self.postMessage({ id: msg.id, output: out }, [out.buffer]);
+        };
+    }
+
+    function createCompute(rowFn, nIn, nOut, chunkRows = 4096) {
+        let worker = null, nextId = 0, pending = null;
+
+        function runLocal(input) {
+            const n = input.length / nIn, out = new Float64Array(n * nOut);
+            for(let r = 0; r < n; r++) rowFn(input, r * nIn, out, r * nOut);
+            return out;
+        }
+
+        try {
+            const src = document.getElementById('model-core').textContent +
+                `;(${workerLoop})(${rowFn.name}, ${nIn}, ${nOut}, ${chunkRows});`;
+            worker = new Worker(URL.createObjectURL(new Blob([src], { type: 'text/javascript' })));
+            worker.onmessage = (e) => {
+                if(pending && e.data.id === pending.id) {
+                    const job = pending;
+                    pending = null;
+                    job.resolve(e.data.output);
+                }
+            };
+            worker.onerror = () => {
+                // Worker could not start (e.g. blocked by the browser): fall back to the page thread
+                worker.terminate();
+                worker = null;
+                if(pending) {
+                    const job = pending;
+                    pending = null;
+                    job.resolve(runLocal(job.input));
+                }
+            };
+        } catch(err) {
+            worker = null;
+        }
+
+        function cancel() {
+            if(pending) {
+                if(worker) worker.postMessage({ type: 'cancel', id: pending.id });
+                pending.resolve(null);
+                pending = null;
+            }
+        }
+
+        return {
+            cancel,
+            run(input) {
+                cancel();
+                if(!worker) return Promise.resolve(runLocal(input));
+                return new Promise(resolve => {
+                    pending = { id: ++nextId, input, resolve };
+                    worker.postMessage({ type: 'run', id: pending.id, input });
+                });
+            }
+        };
+    }
+
+    // View one output row as { field: value } using the core's field list
+    function outputRow(fields, out, r = 0) {
+        const row = {};
+        fields.forEach((name, j) => row[name] = out[r * fields.length + j]);
+        return row;
+    }
+
+    // Findings list patched in place: report is { list, items: Map, paint(el, finding) }.
+    // Findings are keyed by title: unchanged ones keep their node, changed ones are
+    // repainted, stale ones removed, and the list order follows `findings`
+    function patchFindings(report, findings) {
+        const current = new Set();
+        let prev = null;
+        findings.forEach(f => {
+            current.add(f.title);
+            let item = report.items.get(f.title);
+            if(!item) {
+                item = { el: document.createElement('div'), type: null, text: null };
+                report.items.set(f.title, item);
+            }
+            if(item.type !== f.type || item.text !== f.text) {
+                report.paint(item.el, f);
+                item.type = f.type;
+                item.text = f.text;
+            }
+            const next = prev ? prev.nextSibling : report.list.firstChild;
+            if(next !== item.el) report.list.insertBefore(item.el, next);
+            prev = item.el;
+        });
+        report.items.forEach((item, title) => {
+            if(!current.has(title)) {
+                item.el.remove();
+                report.items.delete(title);
+            }
+        });
+    }
+"""
+
+
+def inject(html):
+    """Fill the __COMPUTE_LAYER__ placeholder of a page template."""
+    return html.replace("__COMPUTE_LAYER__", COMPUTE_LAYER_JS)
@@ -0,0 +1,136 @@
+"""
+Pareto Frontier: ME vs Methane vs Cost
+======================================
+Sweeps the feasible ration space and keeps the non-dominated set over three
+objectives from the energy partition of ted_lecture_rum.py update():
+maximize energy_me, minimize energy_methane, minimize ration cost. The
+result is the whole trade-off surface, rather than single points such as the
+`methane_mitigation` preset.
+
+1. Sweep - every simplex-lattice mix (ration_optimizer.simplex_lattice) at
+   each intake level, within the slider bounds, is scored with one
+   rumen_engine.evaluate() call and screened against the ration limits.
+2. Non-dominated sort - candidates are sorted by cost, so anything already
+   kept is at least as cheap as the next block. Dominance by the kept front
+   then reduces to a 2-D question (ME >=, CH4 <=) answered with a staircase
+   of the front and searchsorted. Only the few survivors of each block are
+   compared pairwise. 10^6 candidates take about half a second.
+"""
+
+import numpy as np
+
+import ration_optimizer
+import rumen_engine
+
+OBJECTIVES = ("cost", "energy_me", "energy_methane")
+
+
+def _staircase(me, ch4):
+    # 2-D front of (max ME, min CH4): sorted by ME descending with strictly falling CH4
+    order = np.lexsort((ch4, -me))
+    me, ch4 = me[order], ch4[order]
+    keep = np.ones(len(me), dtype=bool)
+    keep[1:] = ch4[1:] < np.minimum.accumulate(ch4)[:-1]
+    return me[keep], ch4[keep]
+
+
+def non_dominated(cost, me, ch4, block_size=4096):
+    """
+    Indices of the Pareto-optimal points for (min cost, max me, min ch4).
+    Exact duplicates are reported once.
+    """
+    cost, me, ch4 = (np.asarray(v, dtype=float) for v in (cost, me, ch4))
+    order = np.lexsort((ch4, -me, cost))
+    # Exact duplicates are adjacent after the sort; keep the first of each run
+    repeat = ((cost[order][1:] == cost[order][:-1]) & (me[order][1:] == me[order][:-1])
+              & (ch4[order][1:] == ch4[order][:-1]))
+    order = order[np.concatenate([[True], ~repeat])] if len(order) else order
+
+    front = []
+    stair_me, stair_ch4 = np.empty(0), np.empty(0)
+    for start in range(0, len(order), block_size):
+        idx = order[start:start + block_size]
+        b_me, b_ch4 = me[idx], ch4[idx]
+
+        # 1. Dominated by the front so far: some kept point with ME >= and CH4 <=
+        if len(stair_me):
+            k = np.searchsorted(-stair_me, -b_me, side="right")
+            best_ch4 = np.where(k > 0, stair_ch4[np.maximum(k - 1, 0)], np.inf)
+            alive = best_ch4 > b_ch4
+            idx, b_me, b_ch4 = idx[alive], b_me[alive], b_ch4[alive]
+
+        # 2. Dominated within the block by an earlier (no more expensive) survivor
+        if len(idx) > 1:
+            earlier = np.tri(len(idx), k=-1, dtype=bool)
+            dominated = (earlier & (b_me[None, :] >= b_me[:, None]) & (b_ch4[None, :] <= b_ch4[:, None])).any(axis=1)
+            idx, b_me, b_ch4 = idx[~dominated], b_me[~dominated], b_ch4[~dominated]
+
+        if len(idx):
+            front.append(idx)
+            stair_me, stair_ch4 = _staircase(np.concatenate([stair_me, b_me]),
+                                             np.concatenate([stair_ch4, b_ch4]))
+    return np.concatenate(front) if front else np.empty(0, dtype=int)
+
+
+def sweep_rations(dmi_levels, steps=20, max_kg=None):
+    """Lattice mixes at each intake level that respect the per-feed bounds, (N x feeds) kg DM."""
+    max_kg = ration_optimizer.MAX_KG if max_kg is None else np.asarray(max_kg, dtype=float)
+    lattice = ration_optimizer.simplex_lattice(len(max_kg), steps)
+    blocks = []
+    for dmi in dmi_levels:
+        cand = lattice * dmi
+        blocks.append(cand[(cand <= max_kg + 1e-9).all(axis=1)])
+    return np.concatenate(blocks)
+
+
+def pareto_frontier(prices, dmi_levels=None, steps=20, limits=None, max_kg=None):
+    """
+    Non-dominated rations for ME (max), CH4 energy (min) and cost (min) at
+    the given prices ($/kg DM per feed). Returns the rumen_engine outputs of
+    the front plus 'rations' and 'cost', ordered by cost, and the sweep
+    sizes under 'n_candidates' / 'n_feasible'.
+    """
+    prices = np.asarray(prices, dtype=float)
+    dmi_levels = np.arange(8.0, 17.5, 0.5) if dmi_levels is None else np.atleast_1d(dmi_levels)
+    limits = ration_optimizer.make_limits() if limits is None else limits
+
+    cand = sweep_rations(dmi_levels, steps, max_kg)
+    res = rumen_engine.evaluate(cand)
+    ok = ration_optimizer.feasible_mask(res, limits)
+    rations = cand[ok]
+    res = {k: v[ok] for k, v in res.items()}
+    cost = rations @ prices
+
+    front = non_dominated(cost, res["energy_me"], res["energy_methane"])
+    out = {k: v[front] for k, v in res.items()}
+    out["rations"] = rations[front]
+    out["cost"] = cost[front]
+    out["n_candidates"] = len(cand)
+    out["n_feasible"] = len(rations)
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    prices = [0.18, 0.30, 0.22, 0.26, 0.45, 1.10]   # $/kg DM
+    t0 = time.perf_counter()
+    front = pareto_frontier(prices)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Pareto Frontier: {front['n_candidates']:,} swept, {front['n_feasible']:,} feasible, "
+          f"{len(front['cost']):,} non-dominated ({elapsed:.2f} s)")
+    print("=" * 70)
+    print(f"{'Cost $':>8}{'ME Mcal':>9}{'CH4 Mcal':>10}{'Ym %':>7}   ration (hay alf dry wet sbm fat)")
+    for i in np.linspace(0, len(front["cost"]) - 1, 12).astype(int):
+        print(f"{front['cost'][i]:>8.2f}{front['energy_me'][i]:>9.1f}{front['energy_methane'][i]:>10.2f}"
+              f"{front['Ym'][i]*100:>7.2f}   " + " ".join(f"{kg:4.1f}" for kg in front["rations"][i]))
+
+    rng = np.random.default_rng(0)
+    pts = rng.normal(size=(1_000_000, 3))
+    t0 = time.perf_counter()
+    idx = non_dominated(pts[:, 0], pts[:, 1], pts[:, 2])
+    print(f"\nNon-dominated sort of 10^6 random points: {len(idx):,} on the front in "
+          f"{time.perf_counter() - t0:.2f} s")
+    print("=" * 70)
@@ -0,0 +1,241 @@
+"""
+Least-Cost Ration Optimizer
+===========================
+Finds the cheapest kg-DM mix of the ted_lecture_rum feeds (hay, alf, dry,
+wet, sbm, fat) that meets constraints on the rumen engine's own outputs:
+pH, CP, peNDF, fat, ME and Ym.
+
+The model is piecewise and non-convex (pH bands, fiber_health penalties,
+the IPCC Ym forage/feedlot branches), so instead of an LP the solver works
+in two steps:
+
+1. Lattice screen - every mix on a simplex lattice at the target intake is
+   scored once with rumen_engine.evaluate(). Feasibility does not depend on
+   price, so a batch of pens shares one screen, and each scored lattice
+   is cached per intake and fineness on first use, so repeat solves only
+   re-apply the limits. A narrow feasible region can fall between lattice
+   points: if none is feasible the screen is repeated on a lattice twice
+   as fine, up to max_steps, before the pen is reported infeasible. For each pen the cheapest feasible point is taken per
+   dominant-feed cluster, which gives one start in each basin
+   (forage-heavy, grain-heavy, ...).
+2. Projected pattern search - each start is polished by shifting kg between
+   pairs of feeds, both as plain swaps and projected onto the null space of
+   the constraints that are currently binding (so the ration can slide
+   along e.g. the CP = 10% and Ym = 6% surfaces at once). The step halves
+   until it falls below tol_kg; all starts of all pens are refined together
+   with one evaluate() call per iteration.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+import rumen_engine
+
+# Upper bounds (kg DM/day) from the slider ranges in ted_lecture_rum.py
+MAX_KG = np.array([15, 10, 12, 12, 5, 1.5], dtype=float)
+STEPS = 20
+
+
+def make_limits(ph_min=6.2, cp_min=10.0, pendf_min=20.0, fat_max=6.0, me_min=None, ym_max=None):
+    """Build a {output: (low, high)} constraint table; None means unbounded."""
+    limits = {
+        "ph": (ph_min, None),
+        "cp": (cp_min, None),
+        "peNDF": (pendf_min, None),
+        "fat_pct": (None, fat_max),
+        "energy_me": (me_min, None),   # Mcal/day
+        "Ym": (None, ym_max),          # fraction of GE
+    }
+    return {k: v for k, v in limits.items() if v != (None, None)}
+
+
+def feasible_mask(res, limits):
+    ok = np.isfinite(res["ph"])
+    for key, (lo, hi) in limits.items():
+        if lo is not None:
+            ok &= res[key] >= lo
+        if hi is not None:
+            ok &= res[key] <= hi
+    return ok
+
+
+@lru_cache(maxsize=8)
+def simplex_lattice(n_feeds, steps):
+    """All proportion vectors with entries k/steps summing to 1 (stars and bars)."""
+    # One feed at a time: each partial row branches into every amount of what is left
+    parts = np.zeros((1, 0), dtype=np.int64)
+    left = np.array([steps])
+    for _ in range(n_feeds - 1):
+        reps = left + 1
+        rows = np.repeat(np.arange(len(left)), reps)
+        k = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+        parts = np.column_stack([parts[rows], k])
+        left = left[rows] - k
+    lattice = np.column_stack([parts, left]) / steps
+    lattice.setflags(write=False)
+    return lattice
+
+
+def _lattice_points(dmi, max_kg, steps):
+    cand = simplex_lattice(len(max_kg), steps) * dmi
+    return cand[(cand <= max_kg).all(axis=1)]
+
+
+@lru_cache(maxsize=16)
+def _scored_lattice(dmi, max_kg, steps):
+    # Lattice mixes at one intake and their outputs; limits are applied by the caller
+    cand = _lattice_points(dmi, np.array(max_kg), steps)
+    return cand, rumen_engine.evaluate(cand)
+
+
+def _screen(dmi, limits, max_kg, steps, max_steps):
+    """Feasible lattice points and the steps that found them (finer lattices only if none)."""
+    max_kg = tuple(max_kg.tolist())
+    cand, res = _scored_lattice(dmi, max_kg, steps)
+    feasible = cand[feasible_mask(res, limits)]
+    while not len(feasible) and steps * 2 <= max_steps:
+        steps *= 2
+        cand, res = _scored_lattice(dmi, max_kg, steps)
+        feasible = cand[feasible_mask(res, limits)]
+    return feasible, steps
+
+
+def _slack(res, limits):
+    cols = []
+    for key, (lo, hi) in limits.items():
+        if lo is not None:
+            cols.append(res[key] - lo)
+        if hi is not None:
+            cols.append(hi - res[key])
+    return np.stack(cols, axis=-1)
+
+
+def _moves(x, limits, max_kg, delta, pairs, h=1e-4):
+    # Finite-difference constraint gradients, one evaluate() for all rows
+    p, n = x.shape
+    shifted = (x[:, None, :] + h * np.eye(n)[None]).reshape(-1, n)
+    slack = _slack(rumen_engine.evaluate(np.concatenate([x, shifted])), limits)
+    base = slack[:p]
+    grad = (slack[p:].reshape(p, n, -1) - base[:, None, :]) / h
+
+    # Rows that must stay fixed: total intake, near-binding constraints, feeds at a bound
+    near = base < 0.05 * np.abs(grad).sum(axis=1) * delta
+    at_bound = (x < delta * 1e-3) | (x > max_kg - delta * 1e-3)
+    A = np.concatenate([np.ones((p, 1, n)),
+                        np.swapaxes(grad, 1, 2) * near[..., None],
+                        np.eye(n)[None] * at_bound[..., None]], axis=1)
+    null = np.eye(n)[None] - np.linalg.pinv(A) @ A
+
+    projected = pairs[None] @ null
+    scale = np.abs(projected).max(axis=2, keepdims=True)
+    projected = np.where(scale > 1e-9, projected / np.maximum(scale, 1e-12), 0.0)
+    return np.concatenate([np.broadcast_to(pairs, projected.shape), projected], axis=1)
+
+
+def _refine(x, prices, limits, max_kg, delta, tol_kg, max_iter):
+    n = x.shape[1]
+    pairs = np.array([[(k == i) - (k == j) for k in range(n)]
+                      for i in range(n) for j in range(n) if i != j], dtype=float)
+
+    cost = np.einsum("pf,pf->p", x, prices)
+    while delta >= tol_kg:
+        active = np.arange(len(x))
+        for _ in range(max_iter):
+            if not len(active):
+                break
+            cand = x[active, None, :] + delta * _moves(x[active], limits, max_kg, delta, pairs)
+            in_bounds = ((cand >= -1e-12) & (cand <= max_kg + 1e-12)).all(axis=2)
+            cand = np.clip(cand, 0.0, max_kg)
+            res = rumen_engine.evaluate(cand.reshape(-1, n))
+            ok = feasible_mask(res, limits).reshape(cand.shape[:2]) & in_bounds
+            cand_cost = np.where(ok, np.einsum("pmf,pf->pm", cand, prices[active]), np.inf)
+            best = cand_cost.argmin(axis=1)
+            best_cost = cand_cost[np.arange(len(active)), best]
+            better = best_cost < cost[active] - 1e-12
+            idx = active[better]
+            x[idx] = cand[better, best[better]]
+            cost[idx] = best_cost[better]
+            active = idx
+        delta /= 2
+    return x, cost
+
+
+def least_cost_batch(prices, dmi, limits=None, max_kg=None, steps=STEPS, max_steps=40, tol_kg=0.01, max_iter=50):
+    """
+    Cheapest feasible ration for each row of prices ($/kg DM, P x 6) at a
+    fixed total intake dmi (kg DM/day). The screen uses a steps lattice,
+    doubled up to max_steps while no lattice point is feasible.
+
+    Returns a dict with 'rations' (P x 6 kg DM), 'cost' ($/day), 'feasible'
+    (bool) and every rumen_engine output for the chosen rations. Pens with
+    no feasible ration get NaN rows and feasible=False.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    limits = make_limits() if limits is None else limits
+    max_kg = MAX_KG if max_kg is None else np.asarray(max_kg, dtype=float)
+    n_pens = prices.shape[0]
+
+    feasible_pts, steps = _screen(float(dmi), limits, max_kg, steps, max_steps)
+    rations = np.full((n_pens, len(max_kg)), np.nan)
+    feasible = np.zeros(n_pens, dtype=bool)
+
+    if len(feasible_pts):
+        # Cheapest lattice point per pen in each dominant-feed cluster,
+        # in pen blocks to bound the cost matrix
+        starts = []
+        cluster = feasible_pts.argmax(axis=1)
+        for label in np.flatnonzero(np.bincount(cluster)):
+            pts = feasible_pts[cluster == label]
+            block = max(1, 4_000_000 // len(pts))
+            idx = np.empty(n_pens, dtype=int)
+            for s in range(0, n_pens, block):
+                idx[s:s + block] = (pts @ prices[s:s + block].T).argmin(axis=0)
+            starts.append(pts[idx])
+        n_starts = len(starts)
+
+        x, cost = _refine(np.concatenate(starts), np.tile(prices, (n_starts, 1)), limits, max_kg,
+                          delta=float(dmi) / steps / 2, tol_kg=tol_kg, max_iter=max_iter)
+        best = cost.reshape(n_starts, n_pens).argmin(axis=0)
+        rations = x.reshape(n_starts, n_pens, -1)[best, np.arange(n_pens)]
+        feasible = np.ones(n_pens, dtype=bool)
+
+    out = rumen_engine.evaluate(rations)
+    out["rations"] = rations
+    out["cost"] = np.einsum("pf,pf->p", rations, prices)
+    out["feasible"] = feasible
+    return out
+
+
+def least_cost_ration(prices, dmi, limits=None, max_kg=None, **kwargs):
+    """Single-pen convenience wrapper; returns scalars instead of length-1 arrays."""
+    res = least_cost_batch(np.asarray(prices, dtype=float)[None, :], dmi, limits, max_kg, **kwargs)
+    return {k: (v[0] if k != "rations" else v[0].copy()) for k, v in res.items()}
+
+
+if __name__ == "__main__":
+    import time
+
+    prices = [0.18, 0.30, 0.22, 0.26, 0.45, 1.10]   # $/kg DM
+    limits = make_limits(me_min=25.0, ym_max=0.06)
+    t0 = time.perf_counter()
+    best = least_cost_ration(prices, dmi=12.0, limits=limits)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print("Least-Cost Ration (12 kg DM/day)")
+    print("=" * 70)
+    for name, kg in zip(rumen_engine.FEED_NAMES, best["rations"]):
+        print(f"  {name:<5} {kg:6.2f} kg DM")
+    print(f"\n  Cost ${best['cost']:.2f}/day | pH {best['ph']:.2f} | CP {best['cp']:.1f}% | "
+          f"peNDF {best['peNDF']:.1f}% | fat {best['fat_pct']:.1f}% | "
+          f"ME {best['energy_me']:.1f} Mcal | Ym {best['Ym']*100:.2f}%")
+    print(f"  Solved in {elapsed*1000:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    pen_prices = np.asarray(prices) * rng.uniform(0.7, 1.3, (4000, 6))
+    t0 = time.perf_counter()
+    batch = least_cost_batch(pen_prices, dmi=12.0, limits=limits)
+    print(f"  Batch: {len(pen_prices):,} pens in {time.perf_counter() - t0:.2f} s "
+          f"({batch['feasible'].mean()*100:.0f}% feasible)")
+    print("=" * 70)
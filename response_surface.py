@@ -0,0 +1,120 @@
+"""
+Precomputed Response Tables
+===========================
+Tabulates the nonlinear part of the balance_3 TDN model so the page can
+answer a slider tick with table lookups instead of running the model.
+
+Every nonlinearity of that model is a one-dimensional function of a diet
+metric: each associative-effect group of the rule table (see
+findings_rules.py) maps its metric (cp, ph, fat_pct, peNDF) to a band and
+an effect amount that is piecewise linear, with kinks and jumps only at
+the band bounds and at the effect's min/max caps. The metrics themselves
+are DM-weighted means of the slider kg (pH a clip of them) and stay exact
+on the page. A grid over the six slider axes blurs the band jumps; here
+each group is tabulated over its metric's domain with every breakpoint as
+a node, so linear interpolation reproduces the rule table exactly.
+
+Table layout per group, nodes b_0 < ... < b_k spanning the domain:
+    cell 2j     - the point b_j
+    cell 2j + 1 - the open interval (b_j, b_j+1)
+each cell stored as [band, amount at left end, amount at right end]. A
+value sitting on a bound gets its own cell, so strict and non-strict
+conditions resolve as in apply_rules(). Nodes then cells are packed as
+little-endian float64 and base64 encoded; the page decodes each group once
+into a Float64Array.
+"""
+
+import base64
+
+import numpy as np
+
+import findings_rules
+
+
+def _check_group(group):
+    # Only effect-free bands may look past the metric, and nothing after them
+    # may carry an effect, or the group's effect depends on more than its metric
+    outside = False
+    for band in group["bands"]:
+        if outside and band.get("effect"):
+            raise ValueError(f"rule group '{group['group']}' cannot be tabulated on '{group['metric']}' alone")
+        if any(name != group["metric"] for name, _, _ in band["when"]):
+            outside = True
+            if band.get("effect"):
+                raise ValueError(f"rule {band['code']} has an effect conditioned on more than '{group['metric']}'")
+
+
+def _select_band(group, v):
+    # First band whose metric conditions hold; conditions on other values count as false
+    for b, band in enumerate(group["bands"]):
+        if all(name == group["metric"] and findings_rules.OPS[op](v, bound) for name, op, bound in band["when"]):
+            return b
+    return len(group["bands"]) - 1
+
+
+def _amount(group, b, v):
+    effect = group["bands"][b].get("effect")
+    return float(findings_rules.effect_amount(effect, np.float64(v))) if effect else 0.0
+
+
+def group_breakpoints(group, lo, hi):
+    """Band bounds and effect caps of a group inside [lo, hi], plus the domain ends."""
+    points = {float(lo), float(hi)}
+    for band in group["bands"]:
+        points.update(float(bound) for name, _, bound in band["when"] if name == group["metric"])
+        effect = band.get("effect")
+        if effect and "slope" in effect and effect["slope"]:
+            for cap in ("min", "max"):
+                if effect.get(cap) is not None:
+                    points.add(effect["ref"] + effect[cap] / effect["slope"])
+    return np.array(sorted(p for p in points if lo <= p <= hi))
+
+
+def build_rule_tables(rules, domains):
+    """
+    Tabulate every group of a rule table over domains {metric: (lo, hi)};
+    returns one {'metric', 'n', 'data'} dict per group, in group order.
+    """
+    tables = []
+    for group in rules["groups"]:
+        _check_group(group)
+        nodes = group_breakpoints(group, *domains[group["metric"]])
+        cells = []
+        for j, node in enumerate(nodes):
+            b = _select_band(group, node)
+            cells.append((b, _amount(group, b, node), _amount(group, b, node)))
+            if j + 1 < len(nodes):
+                b = _select_band(group, 0.5 * (node + nodes[j + 1]))
+                cells.append((b, _amount(group, b, node), _amount(group, b, nodes[j + 1])))
+        data = np.concatenate([nodes, np.ravel(cells)]).astype("<f8")
+        tables.append({"metric": group["metric"], "n": len(nodes),
+                       "data": base64.b64encode(data.tobytes()).decode("ascii")})
+    return tables
+
+
+def decode_table(table):
+    """(nodes, cells) of one group table; cells is (2n - 1) x [band, left, right]."""
+    data = np.frombuffer(base64.b64decode(table["data"]), dtype="<f8")
+    return data[:table["n"]], data[table["n"]:].reshape(-1, 3)
+
+
+def lookup_state(tables, rules, values):
+    """Python mirror of the page's tableState(): the rule state from the tables for scalar metric values."""
+    state = dict(rules["state"])
+    for group, table in zip(rules["groups"], tables):
+        nodes, cells = decode_table(table)
+        v = min(max(float(values[group["metric"]]), nodes[0]), nodes[-1])
+        j = int(np.searchsorted(nodes, v, side="right")) - 1
+        cell = 2 * j if v == nodes[j] else 2 * j + 1
+        effect = group["bands"][int(cells[cell, 0])].get("effect")
+        if not effect:
+            continue
+        t = (v - nodes[j]) / (nodes[j + 1] - nodes[j]) if cell % 2 else 0.0
+        amount = cells[cell, 1] + t * (cells[cell, 2] - cells[cell, 1])
+        if effect["op"] == "subtract":
+            state[effect["on"]] -= amount
+        elif effect["op"] == "multiply":
+            state[effect["on"]] *= amount
+        else:
+            state[effect["on"]] = amount
+    return state
@@ -0,0 +1,312 @@
+"""
+Multi-Generation Sire Rotation Search
+=====================================
+breeding_5.py lets a user click through up to MAX_GENERATIONS = 12 sire
+choices by hand. This module searches the sire sequence for a herd that
+keeps its own replacement heifers: each generation a sire is mated to the
+dam line and the calf becomes the next dam (calcGeneration()). The
+objective is the sum over generations of
+
+    heterosis_weight * retained heterosis of the calf + breed_values @ calf composition
+
+so breed_values=None maximises average retained heterosis and breed
+values (e.g. $ per calf by breed) give a weighted trait index.
+
+Bull-availability rules:
+    sires     - the candidate sire animals (default: every database animal)
+    allowed   - optional (generations x sires) mask of bulls available each
+                generation, e.g. a terminal sire only in the last one
+    max_sires - most distinct bulls used over the plan (a herd running a
+                three-breed rotation keeps three bull batteries)
+
+Search: forward DP over generations. A state is the dam composition as
+exact integer numerators over 2^(bits + generations), plus the set of
+bulls used so far; states reached by different sire sequences with the
+same composition are merged, keeping the best value. Branches are cut by
+    - symmetry: purebred sires of breeds that appear in no other sire and
+      share availability and breed value are interchangeable, so only one
+      of those whose breed holds the same share of the dam is tried;
+    - bounds: a generation r after the state is worth at most its best
+      sire against 2^-r of today's dam (later sires only add overlap), so
+      states whose value plus that bound cannot strictly beat the best
+      complete plan found so far (the incumbent) are dropped.
+The incumbent comes from greedy rollouts of each frontier's best states
+and carries its whole sire sequence, so it is the answer even when ties
+or the beam empty the frontier. Parents are expanded and merged in
+blocks, so memory follows the frontier, not frontier x sires. If the
+frontier still exceeds max_states (default: sized from memory_mb) it is
+cut to the best states by bound (beam search) and the result is flagged
+exact=False.
+"""
+
+import numpy as np
+
+import heterosis
+
+MAX_GENERATIONS = 12
+_BLOCK_CHILDREN = 1 << 18      # child states built at once (about 25 MB of numerators)
+
+
+def _scale_bits(P):
+    # Smallest d with every database fraction an integer over 2^d
+    for d in range(0, 31):
+        if np.allclose(P * 2 ** d, np.round(P * 2 ** d), atol=1e-9):
+            return d
+    raise ValueError("compositions are not dyadic fractions")
+
+
+def _symmetric_groups(S, values, allowed):
+    # Sire indices grouped into interchangeable purebreds (breed column, group id)
+    pure = np.flatnonzero((S == 1.0).any(axis=1))
+    breed = S[pure].argmax(axis=1)
+    in_others = (S > 0).sum(axis=0)
+    groups = {}
+    for s, b in zip(pure, breed):
+        if in_others[b] == 1:
+            groups.setdefault((values[b], allowed[:, s].tobytes()), []).append((s, b))
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def search_rotation(dam, sires=None, generations=MAX_GENERATIONS, breed_values=None, heterosis_weight=1.0,
+                    allowed=None, max_sires=None, database=None, max_states=None, memory_mb=1024, rollouts=64):
+    """
+    Best sire sequence for a dam line starting from `dam` (database name
+    or {breed: fraction}). sires are database names (default all).
+    breed_values is {breed: value per calf}. max_states defaults to what
+    fits in about memory_mb. Returns:
+        sires        - chosen sire name per generation
+        heterosis    - (generations,) retained heterosis of each calf
+        composition  - (generations x B) calf compositions
+        breeds       - breed index of the composition axis
+        objective    - the summed index; average_heterosis
+        exact        - False if the frontier was cut to max_states
+        states       - states kept over the search
+    """
+    names, breeds, P = heterosis.database_matrix(database)
+    database = heterosis.ANIMAL_DATABASE if database is None else database
+    sire_names = list(names) if sires is None else list(sires)
+    S = P[[names.index(s) for s in sire_names]]
+    n_sires, n_breeds = S.shape
+    dam_comp = database[dam]["comp"] if isinstance(dam, str) else dam
+    dam0 = heterosis.composition_matrix([dam_comp], breeds)[0]
+    values = np.zeros(n_breeds)
+    for breed, v in (breed_values or {}).items():
+        values[breeds.index(breed)] = v
+    allowed = np.ones((generations, n_sires), dtype=bool) if allowed is None else np.asarray(allowed, dtype=bool)
+    if allowed.shape != (generations, n_sires):
+        raise ValueError(f"allowed must be (generations x sires) = ({generations} x {n_sires})")
+    max_sires = n_sires if max_sires is None else max_sires
+    if n_sires > 62:
+        raise ValueError("at most 62 candidate sires")
+    if max_states is None:
+        # Up to 2 x max_states children of (numerators + 6 columns), held about four times
+        # over while merging, plus 5 bytes of back-pointers per state per generation
+        max_states = int(memory_mb * 2 ** 20 // (8 * 8 * (n_breeds + 6) + 5 * generations))
+
+    bits = _scale_bits(np.vstack([S, dam0]))
+    if bits + generations > 52:
+        raise ValueError("too many generations for exact compositions")
+    unit = 2 ** (bits + generations)
+    S_num = np.round(S * unit).astype(np.int64)
+    sire_value = S @ values
+    bit = np.int64(1) << np.arange(n_sires, dtype=np.int64)
+    groups = _symmetric_groups(S, values, allowed)
+    mix = np.random.default_rng(0).integers(1, 2 ** 62, n_breeds) | 1     # state hash, wraps mod 2^64
+    mix_used = np.int64(0x9E3779B97F4A7C15 - 2 ** 64)
+
+    def gain(frac, s):
+        # Index value of mating dam rows `frac` to sires `s`
+        h = 1.0 - np.einsum("nb,nb->n", frac, S[s])
+        return heterosis_weight * h + 0.5 * (sire_value[s] + frac @ values)
+
+    def options(g, used):
+        # (n x sires) bulls that may be used in generation g
+        ok = np.broadcast_to(allowed[g], (len(used), n_sires)).copy()
+        full = ((used[:, None] >> np.arange(n_sires)) & 1).sum(axis=1) >= max_sires
+        ok[full] &= (used[full, None] & bit) != 0
+        return ok
+
+    def bound(g, frac, used):
+        # Upper bound on generations g..end from dams `frac` entering generation g
+        ub = np.zeros(len(frac))
+        if g >= generations:
+            return ub
+        overlap = frac @ S.T
+        c = heterosis_weight + 0.5 * (sire_value + values.max())
+        full = ((used[:, None] >> np.arange(n_sires)) & 1).sum(axis=1) >= max_sires
+        usable = ~full[:, None] | ((used[:, None] & bit) != 0)
+        rows, first = np.unique(allowed[g:], axis=0, return_inverse=True)
+        for row, pattern in enumerate(rows):
+            r = np.flatnonzero(first.ravel() == row)
+            mask = usable & pattern
+            if not pattern.any():
+                ub[:] = -np.inf
+            elif np.ptp(c[pattern]) == 0:
+                # Same best case for every sire: only the least overlap matters
+                least = np.where(mask, overlap, np.inf).min(axis=1)
+                ub += np.where(np.isfinite(least), len(r) * c[pattern][0] - heterosis_weight * least
+                               * (0.5 ** r).sum(), -np.inf)
+            else:
+                for a in heterosis_weight * 0.5 ** r:
+                    ub += np.where(mask, c - a * overlap, -np.inf).max(axis=1)
+        return ub
+
+    def rollout(g, num, used, value):
+        # Greedy completion, best immediate gain each generation: (values, sires chosen)
+        num, used, value = num.copy(), used.copy(), value.copy()
+        picks = []
+        for gg in range(g, generations):
+            frac = num / unit
+            v = heterosis_weight * (1.0 - frac @ S.T) + 0.5 * (sire_value[None, :] + (frac @ values)[:, None])
+            v = np.where(options(gg, used), v, -np.inf)
+            s = v.argmax(axis=1)
+            value += v[np.arange(len(s)), s]
+            num = (num + S_num[s]) // 2
+            used |= bit[s]
+            picks.append(s)
+        return value, np.array(picks, dtype=np.int64).reshape(-1, len(value)).T
+
+    def walk(g, k):
+        # Sires of generations 0..g-1 leading to state k of the frontier after generation g-1
+        sequence = []
+        for gg in range(g - 1, -1, -1):
+            sequence.append(int(chosen[gg][k]))
+            k = int(parents[gg][k])
+        return sequence[::-1]
+
+    def merge(parts):
+        # Concatenate child blocks and merge identical states, keeping the best value: sort by
+        # a hash of the state, then compare neighbours in full so a collision never merges two
+        c = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+        h = c["num"] @ mix + c["used"] * mix_used
+        order = np.lexsort((-c["value"], h))
+        same = h[order[1:]] == h[order[:-1]]
+        same[same] = ((c["num"][order[1:]][same] == c["num"][order[:-1]][same]).all(axis=1)
+                      & (c["used"][order[1:]][same] == c["used"][order[:-1]][same]))
+        keep = order[np.r_[True, ~same]]
+        return {key: v[keep] for key, v in c.items()}
+
+    def cut(c, n):
+        # Beam: the n states with the highest bound
+        keep = np.argsort(-c["ub"], kind="stable")[:n]
+        return {key: v[keep] for key, v in c.items()}
+
+    num = np.round(dam0 * unit).astype(np.int64)[None, :]
+    used = np.zeros(1, dtype=np.int64)
+    value = np.zeros(1)
+    parents, chosen = [], []
+    completed, picks = rollout(0, num, used, value)
+    best, incumbent = completed[0], list(picks[0])
+    exact, kept = True, 1
+    step = max(1, _BLOCK_CHILDREN // n_sires)
+
+    # 1. Forward DP over generations, parents expanded in blocks of about _BLOCK_CHILDREN children
+    for g in range(generations):
+        parts, size, generated = [], 0, 0
+        for start in range(0, len(num), step):
+            b_num, b_used = num[start:start + step], used[start:start + step]
+            ok = options(g, b_used)
+            # Interchangeable purebreds: try only the first with a given (share, used) in the dam
+            for group in groups:
+                keys = [b_num[:, b] * 2 + ((b_used >> s) & 1) for s, b in group]
+                for j, (s, _) in enumerate(group):
+                    for i in range(j):
+                        ok[:, s] &= ~(ok[:, group[i][0]] & (keys[i] == keys[j]))
+            rows, s = np.nonzero(ok)
+            if not len(rows):
+                continue
+            child = {"num": (b_num[rows] + S_num[s]) // 2, "used": b_used[rows] | bit[s],
+                     "value": value[start + rows] + gain(b_num[rows] / unit, s),
+                     "parent": (start + rows).astype(np.int32), "sire": s.astype(np.int8)}
+            child = merge([child])
+
+            # Bound, and keep only states that could still beat the incumbent
+            child["ub"] = child["value"] + bound(g + 1, child["num"] / unit, child["used"])
+            alive = child["ub"] > best + 1e-9
+            parts.append({key: v[alive] for key, v in child.items()})
+            generated += len(alive)
+            size += alive.sum()
+            if size > 2 * max_states:
+                parts = [cut(merge(parts), max_states)]
+                size, exact = len(parts[0]["ub"]), False
+        if not generated:
+            raise ValueError(f"no sire meets the availability rules in generation {g + 1}")
+        if not size:
+            break
+        c = merge(parts)
+
+        # Complete the most promising states; stop once nothing can beat the incumbent
+        top = np.argsort(-c["ub"])[:rollouts]
+        completed, picks = rollout(g + 1, c["num"][top], c["used"][top], c["value"][top])
+        if completed.max() > best:
+            k = int(completed.argmax())
+            best = completed[k]
+            incumbent = walk(g, int(c["parent"][top[k]])) + [int(c["sire"][top[k]])] + list(picks[k])
+        c = {key: v[c["ub"] > best + 1e-9] for key, v in c.items()}
+        if not len(c["ub"]):
+            break
+        if len(c["ub"]) > max_states:
+            c, exact = cut(c, max_states), False
+
+        num, used, value = c["num"], c["used"], c["value"]
+        parents.append(c["parent"])
+        chosen.append(c["sire"])
+        kept += len(value)
+
+    # 2. The incumbent: every frontier's best states were completed by a rollout
+    if not np.isfinite(best):
+        raise ValueError("no sire sequence meets the availability rules")
+    sequence = [int(s) for s in incumbent]
+
+    comp, h = np.zeros((generations, n_breeds)), np.zeros(generations)
+    d = dam0
+    for g, s in enumerate(sequence):
+        h[g] = 1.0 - S[s] @ d
+        d = comp[g] = 0.5 * (S[s] + d)
+    return {
+        "sires": [sire_names[s] for s in sequence],
+        "heterosis": h,
+        "composition": comp,
+        "breeds": breeds,
+        "objective": float(best),
+        "average_heterosis": float(h.mean()),
+        "exact": exact,
+        "states": kept,
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    import dyadic_composition
+
+    print("=" * 70)
+    print(f"Sire rotation search: Angus cow herd, {MAX_GENERATIONS} generations, "
+          f"{len(heterosis.ANIMAL_DATABASE)} database sires")
+    print("=" * 70)
+    classic = search_rotation("Angus", ["Angus", "Hereford", "Charolais"])
+    print(f"Angus / Hereford / Charolais only: {classic['average_heterosis']*100:.1f}% average retained heterosis")
+    print("  " + " > ".join(classic["sires"][:6]) + " > ...")
+
+    names = list(heterosis.ANIMAL_DATABASE)
+    terminal = np.ones((MAX_GENERATIONS, len(names)), dtype=bool)
+    terminal[-1] = [n == "Charolais" for n in names]
+    runs = {
+        "best 2 bulls": dict(max_sires=2),
+        "best 3 bulls": dict(max_sires=3),
+        "best 4 bulls": dict(max_sires=4),
+        "3 bulls, $ index, Charolais terminal": dict(
+            max_sires=3, allowed=terminal, heterosis_weight=60.0,
+            breed_values={"Angus": 25.0, "Charolais": 30.0, "Simmental": 15.0, "Brahman": -20.0, "Nelore": -25.0}),
+    }
+    for label, kw in runs.items():
+        t0 = time.perf_counter()
+        res = search_rotation("Angus", **kw)
+        elapsed = time.perf_counter() - t0
+        print(f"\n{label}: {res['average_heterosis']*100:.1f}% average heterosis, index {res['objective']:.2f} "
+              f"({res['states']:,} states, {elapsed:.2f} s{'' if res['exact'] else ', beam'})")
+        print("  " + " > ".join(res["sires"]))
+        print("  heterosis % " + " ".join(f"{h*100:.0f}" for h in res["heterosis"]))
+    table = dyadic_composition.default_table()
+    print(f"\nFinal calf: {table.format(int(table.intern(res['composition'][-1:])[0]))}")
+    print("=" * 70)
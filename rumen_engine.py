@@ -0,0 +1,433 @@
+"""
+Vectorized Rumen Energetics Engine
+==================================
+NumPy port of the diet model that runs inside the page generated by
+ted_lecture_rum.py (chem(), the CNCPS pH model, associative-effect
+penalties, IPCC Tier 2 Ym and the GE -> DE -> ME partition in update()).
+
+Instead of one ration per slider drag, evaluate() scores an
+(N rations x feeds) matrix of kg DM and returns one NumPy array per
+model output, so millions of candidate rations can be screened in a
+single run.
+
+Feeds come from a feed_library.FeedLibrary (default feeds/integrated.csv,
+in slider order: hay, alf, dry, wet, sbm, fat). All per-feed sums are one
+product with a design matrix, so a 500-feed catalog costs one wider matmul.
+
+Body weight is a per-ration input (default the page's 600 kg animal). It
+sets intake as % of body weight, which drives the Ym passage adjustment
+and the NRC (2001) passage rates kp for forage and concentrate particles.
+Each feed's kd competes with the kp of its class, so the ruminally
+digested share of a fraction is kd / (kd + kp) (Waldo et al. 1972),
+reported DM-weighted for starch and NDF. Digestible energy is built from
+those fractions: ruminal starch and NDF, the intestinal share of what
+escapes, and the remaining GE at a fixed digestibility, so heavier cattle
+(slower passage relative to intake) get more DE and ME from one ration.
+
+The fermented starch and NDF are split into acetate, propionate and
+butyrate with the Murphy et al. (1982) hexose stoichiometry. They also
+grow microbes at the CNCPS yields, capped by rumen-degradable N, which
+gives microbial crude protein, the rumen N balance and metabolizable
+protein.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+import feed_library
+import findings_rules
+
+# Feed Database - feeds/integrated.csv, same values as the `feeds` object in ted_lecture_rum.py
+LIBRARY = feed_library.default_library(feed_library.INTEGRATED)
+FEED_NAMES = LIBRARY.names
+
+# Physiological pH bounds and the moderate-forage base pH of the CNCPS pH model
+BASE_PH = 6.5
+PH_BOUNDS = (4.5, 7.1)
+
+# Reference animal of ted_lecture_rum.py (kg body weight)
+BODY_WEIGHT = 600.0
+
+# Murphy et al. (1982) share of fermented hexose going to (acetate, propionate, butyrate)
+# on roughage and concentrate diets; rows: starch, NDF (mean of cellulose and
+# hemicellulose). The remainder goes to valerate and minor acids.
+VFA_ROUGHAGE = np.array([[0.59, 0.14, 0.20], [0.615, 0.135, 0.195]])
+VFA_CONCENTRATE = np.array([[0.40, 0.30, 0.20], [0.675, 0.16, 0.09]])
+VFA_PER_HEXOSE = np.array([2.0, 2.0, 1.0])     # mol acid per mol hexose on each pathway
+HEXOSE_KG_PER_MOL = 0.162
+# mol acid per kg fermented, as one product with (starch, NDF, forage share x each)
+VFA_MATRIX = (np.concatenate([VFA_CONCENTRATE, VFA_ROUGHAGE - VFA_CONCENTRATE])
+              * VFA_PER_HEXOSE / HEXOSE_KG_PER_MOL).T
+
+# CNCPS microbial growth (Russell et al. 1992): maximum yield (g cells / g CHO) and
+# maintenance (g CHO / g cells / h) of the NFC (starch) and FC (fiber) bacteria
+YG_MICROBIAL = 0.4
+KM_NFC, KM_FC = 0.15, 0.05
+MICROBIAL_CP = 0.625      # crude protein share of microbial DM
+
+# Digestible energy from the digested fractions: gross energy of starch and NDF
+# (Mcal/kg), share of the starch escaping the rumen digested in the intestines
+# (Owens et al. 1986), hindgut share of escaping NDF, and apparent digestibility
+# of the remaining GE (protein, fat, sugars)
+CARBOHYDRATE_GE = 4.2
+POSTRUMINAL_STARCH = 0.75
+HINDGUT_NDF = 0.10
+OTHER_DIGESTIBILITY = 0.70
+
+OUTPUTS = ("dm", "cp", "fat_pct", "ndf", "starch", "total_ge", "peNDF", "acid_load",
+           "buffer_capacity", "ph", "fiber_health", "forage_pct", "Ym", "energy_methane",
+           "energy_urine", "energy_digestible", "energy_fecal", "energy_me",
+           "intake_pct_bw", "kp_forage", "kp_concentrate", "starch_digestibility",
+           "ndf_digestibility", "acetate", "propionate", "butyrate", "total_vfa", "ap_ratio",
+           "mcp", "n_intake", "rdn", "microbial_n", "rumen_n_balance", "metabolizable_protein")
+
+# Columns of the design matrix; every per-feed sum in update() is one column,
+# kd is read per feed for the passage-rate digestibility
+DESIGN = ("cp", "fat", "ndf", "starch", "ge", "pendf", "grain_starch", "grain_starch_kd",
+          "forage", "buffer", "kd", "rdp")
+
+
+def design_columns(col):
+    """
+    Stack DESIGN from an attribute accessor col(attr) -> (..., feeds) array.
+    Leading axes pass through, so sampled compositions of shape
+    (draws, feeds) give one (draws x feeds x DESIGN) design per draw.
+    """
+    grain_starch = col("starch") * col("grain")
+    return np.stack([col("cp"), col("fat"), col("ndf"), col("starch"), col("ge"),
+                     col("ndf") * col("pe"), grain_starch, grain_starch * col("kd"),
+                     col("forage"), col("buffer"), col("kd"), col("cp") * col("rdp") / 100], axis=-1)
+
+
+def passage_rates(intake_pct_bw, concentrate_pct, ndf):
+    """
+    Particle passage rates (/h) from NRC (2001) eq. 3-6b/3-6c (Seo et al.
+    2006): kp rises with intake as % of body weight and falls with
+    concentrate and NDF % of DM. Returns (kp_forage, kp_concentrate).
+    """
+    kp_forage = (3.362 + 0.479 * intake_pct_bw - 0.007 * concentrate_pct - 0.017 * ndf) / 100
+    kp_concentrate = (2.904 + 1.375 * intake_pct_bw - 0.020 * concentrate_pct) / 100
+    return kp_forage, kp_concentrate
+
+
+def microbial_yield(kd, km):
+    """CNCPS microbial yield 1 / (km / kd + 1 / YG), g cells per g CHO fermented at rate kd."""
+    kd = np.asarray(kd, dtype=float)
+    return np.where(kd > 0, 1.0 / (km / np.where(kd > 0, kd, 1.0) + 1.0 / YG_MICROBIAL), 0.0)
+
+
+def ruminal_digestion(x, D, intake_pct_bw, forage_pct, ndf):
+    """
+    Passage-limited ruminal digestion for kg-DM rations x and a DESIGN
+    matrix D (feeds x DESIGN, or one per row). Each feed's starch and NDF
+    are fermented at kd / (kd + kp), kp the forage or concentrate rate of
+    its class. Returns (kp_forage, kp_concentrate, fermented) with
+    fermented (4 x N): kg starch and NDF fermented, kg cells grown on each.
+    """
+    kp_forage, kp_concentrate = passage_rates(intake_pct_bw, 100 - forage_pct, ndf)
+    forage, kd = D[..., 8], D[..., 10]
+    kp_by_class = np.stack([kp_concentrate, kp_forage], axis=1)
+    feed_class = (forage > 0).astype(np.intp)
+    digested = (kp_by_class[:, feed_class] if D.ndim == 2
+                else np.take_along_axis(kp_by_class, feed_class, axis=1))
+    digested += kd
+    np.divide(kd, digested, out=digested)
+    digested *= x
+    # Fermented starch, NDF and the microbial cells grown on each, one product over feeds
+    fractions = np.stack([D[..., 3], D[..., 2], D[..., 3] * microbial_yield(kd, KM_NFC),
+                          D[..., 2] * microbial_yield(kd, KM_FC)], axis=-1) / 100
+    fermented = fractions.T @ digested.T if D.ndim == 2 else np.einsum("nf,nfk->kn", digested, fractions)
+    return kp_forage, kp_concentrate, fermented
+
+
+def digestible_ge(total_ge, starch_kg, ndf_kg, starch_fermented, ndf_fermented):
+    """
+    Total-tract digestible GE (Mcal/day): starch and NDF fermented in the
+    rumen, the intestinal share of escaping starch, the hindgut share of
+    escaping NDF, and the rest of GE at OTHER_DIGESTIBILITY.
+    """
+    carbohydrate = (starch_fermented + POSTRUMINAL_STARCH * (starch_kg - starch_fermented)
+                    + ndf_fermented + HINDGUT_NDF * (ndf_kg - ndf_fermented))
+    rest = np.maximum(total_ge - CARBOHYDRATE_GE * (starch_kg + ndf_kg), 0.0)
+    return CARBOHYDRATE_GE * carbohydrate + OTHER_DIGESTIBILITY * rest
+
+
+@lru_cache(maxsize=16)
+def design_matrix(library):
+    """(feeds x DESIGN) matrix so a single product x @ D yields every diet sum."""
+    D = design_columns(library.column)
+    D.setflags(write=False)
+    return D
+
+
+def _evaluate_block(x, D, body_weight):
+    # 1. Intake
+    dm = x.sum(axis=1)
+    valid = dm > 0
+    safe_dm = np.where(valid, dm, 1.0)
+
+    # 2. Weighted Diet Composition - chem() for every attribute in one product
+    # (D may also carry one design per row, e.g. sampled feed compositions)
+    sums = x @ D if D.ndim == 2 else np.einsum("nf,nfk->nk", x, D)
+    cp, fat_pct, ndf, starch = (sums[:, :4] / safe_dm[:, None]).T
+    total_ge = sums[:, 4]
+
+    # 3. Rumen pH Model (CNCPS Framework - Fox et al. 2004)
+    # 3a. Acid load: kd weighted over grain starch
+    total_starch = sums[:, 6]
+    starch_kd = np.where(total_starch > 0,
+                         sums[:, 7] / np.where(total_starch > 0, total_starch, 1.0),
+                         0.10)
+
+    # 3b. Physically Effective NDF (Mertens 1997, 2002)
+    peNDF = sums[:, 5] / safe_dm
+
+    # 3c. pH Calculation
+    acid_load = (starch / 100) * (starch_kd * 12)
+    buffer_capacity = (peNDF / 100) * 2.0 + (sums[:, 9] / safe_dm) * 0.25
+    ph = np.clip(BASE_PH - acid_load + buffer_capacity, *PH_BOUNDS)
+
+    # 4. Associative Effects on Fiber Digestion (CNCPS Logic)
+    fiber_health = np.ones_like(dm)
+
+    # 4a. Nitrogen Limitation (CP < 8%)
+    fiber_health -= np.where(cp < 8.0, np.minimum((8.0 - cp) * 0.12, 0.7), 0.0)
+
+    # 4b. pH Effect on Cellulolytic Bacteria
+    ph_penalty = np.where(ph < 5.6, 0.85,
+                 np.where(ph < 5.8, (6.0 - ph) * 0.6,
+                 np.where(ph < 6.2, (6.2 - ph) * 0.3, 0.0)))
+    fiber_health -= ph_penalty
+
+    # 4c. Fat Toxicity (>6%)
+    fiber_health -= np.where(fat_pct > 6.0, np.minimum((fat_pct - 6.0) * 0.15, 0.6), 0.0)
+    fiber_health = np.maximum(fiber_health, 0.0)
+
+    # 5. Methane Production Model (IPCC Tier 2 + Adjustments)
+    # 5a. Baseline Ym based on diet type
+    forage_pct = (sums[:, 8] / safe_dm) * 100
+    Ym = np.where(forage_pct > 80, 0.065,
+         np.where((forage_pct < 20) & (starch > 60), 0.030,
+                  0.065 - (starch / 100) * 0.035))
+
+    # 5b. Starch effect (propionate pathway)
+    Ym = Ym - np.where(starch > 25, (starch - 25) * 0.0008, 0.0)
+
+    # 5c. Fat effect (biohydrogenation as H-sink)
+    Ym = Ym - np.where(fat_pct > 3.0, (fat_pct - 3.0) * 0.006, 0.0)
+
+    # 5d. The acidosis paradox
+    Ym = np.where(ph < 5.8, Ym * 0.55, Ym)
+
+    # 5e. Passage rate effect - intake as % of each ration's body weight
+    intake_pct_bw = (dm / body_weight) * 100
+    Ym = np.where(intake_pct_bw > 2.5, Ym * 0.92, Ym)
+    Ym = np.maximum(Ym, 0.015)
+
+    # 5f. Passage vs fermentation: feed i's fractions are digested in the rumen at
+    # kd_i / (kd_i + kp), kp being the forage or concentrate rate of its class
+    kp_forage, kp_concentrate, fermented = ruminal_digestion(x, D, intake_pct_bw, forage_pct, ndf)
+    starch_digestibility = np.divide(fermented[0] * 100, sums[:, 3], out=np.full(len(dm), np.nan),
+                                     where=sums[:, 3] > 0)
+    ndf_digestibility = np.divide(fermented[1] * 100, sums[:, 2], out=np.full(len(dm), np.nan),
+                                  where=sums[:, 2] > 0)
+
+    # 6. Energy Partitioning
+    energy_methane = total_ge * Ym
+    energy_urine = total_ge * 0.04
+    # 6a. Total-tract digestible GE from the fermented and escaping fractions;
+    # associative effects (fiber_health) scale the realized digestibility
+    energy_digestible = digestible_ge(total_ge, sums[:, 3] / 100, sums[:, 2] / 100,
+                                      fermented[0], fermented[1]) * fiber_health
+    energy_fecal = total_ge - energy_digestible
+    energy_me = energy_digestible - energy_methane - energy_urine
+
+    # 7. Fermentation End-Products (Murphy et al. 1982)
+    # Fiber fermentation carries the fiber_health penalties; the hexose
+    # partition moves from the concentrate to the roughage pattern with forage %
+    starch_fermented = fermented[0]
+    ndf_fermented = fermented[1] * fiber_health
+    w = forage_pct / 100
+    substrate = np.stack([starch_fermented, ndf_fermented, w * starch_fermented, w * ndf_fermented])
+    acetate, propionate, butyrate = VFA_MATRIX @ substrate
+    total_vfa = acetate + propionate + butyrate
+    ap_ratio = acetate / np.where(propionate > 0, propionate, np.nan)
+
+    # 8. Microbial Protein and N Balance (CNCPS - Russell et al. 1992)
+    # Yield drops 2.5 % per unit of peNDF below 20 %; growth is capped by rumen-degradable N
+    pendf_factor = np.maximum(1 - 0.025 * np.maximum(20 - peNDF, 0.0), 0.0)
+    microbial_dm = (fermented[2] + fermented[3] * fiber_health) * pendf_factor
+    microbial_n_energy = microbial_dm * MICROBIAL_CP * 1000 / 6.25
+    n_intake = cp * dm * 10 / 6.25                      # g N/day
+    rdp = sums[:, 11] / 100                             # kg RDP/day
+    rdn = rdp * 1000 / 6.25
+    microbial_n = np.minimum(microbial_n_energy, rdn)
+    rumen_n_balance = rdn - microbial_n_energy          # < 0: N limits microbial growth
+    mcp = microbial_n * 6.25                            # g microbial CP/day
+    rup = (cp * dm / 100 - rdp) * 1000
+    metabolizable_protein = 0.64 * mcp + 0.8 * rup      # NRC (2000) beef
+
+    out = {
+        "dm": dm, "cp": cp, "fat_pct": fat_pct, "ndf": ndf, "starch": starch,
+        "total_ge": total_ge, "peNDF": peNDF, "acid_load": acid_load,
+        "buffer_capacity": buffer_capacity, "ph": ph, "fiber_health": fiber_health,
+        "forage_pct": forage_pct, "Ym": Ym, "energy_methane": energy_methane,
+        "energy_urine": energy_urine, "energy_digestible": energy_digestible,
+        "energy_fecal": energy_fecal, "energy_me": energy_me,
+        "intake_pct_bw": intake_pct_bw, "kp_forage": kp_forage, "kp_concentrate": kp_concentrate,
+        "starch_digestibility": starch_digestibility, "ndf_digestibility": ndf_digestibility,
+        "acetate": acetate, "propionate": propionate, "butyrate": butyrate, "total_vfa": total_vfa,
+        "ap_ratio": ap_ratio, "mcp": mcp, "n_intake": n_intake, "rdn": rdn, "microbial_n": microbial_n,
+        "rumen_n_balance": rumen_n_balance, "metabolizable_protein": metabolizable_protein,
+    }
+    # update() bails out on an empty ration; mirror that with NaN rows
+    if not valid.all():
+        for key in OUTPUTS:
+            if key != "dm":
+                out[key] = np.where(valid, out[key], np.nan)
+    return out
+
+
+def evaluate(rations, library=None, chunk_size=500_000, design=None, body_weight=None):
+    """
+    Score an (N x feeds) array of kg DM rations against a feed library
+    (default: feeds/integrated.csv - hay, alf, dry, wet, sbm, fat).
+
+    Returns a dict of length-N float arrays keyed by OUTPUTS. Rations with
+    zero intake come back as NaN. Large batches are processed in blocks of
+    chunk_size rows to keep the temporaries bounded. `design` overrides the
+    library's design matrix, either shared (feeds x DESIGN) or one per
+    ration (N x feeds x DESIGN, see design_columns()). body_weight is kg,
+    a scalar or one per ration (default BODY_WEIGHT), so pens of mixed
+    weight classes score in one call.
+    """
+    library = LIBRARY if library is None else library
+    D = design_matrix(library) if design is None else np.asarray(design)
+    x = np.asarray(rations, dtype=float)
+    if x.ndim == 1:
+        x = x[None, :]
+    if x.shape[1] != len(library):
+        raise ValueError(f"expected {len(library)} feed columns {library.names}, got {x.shape[1]}")
+
+    n = x.shape[0]
+    bw = np.broadcast_to(np.asarray(BODY_WEIGHT if body_weight is None else body_weight, dtype=float), (n,))
+    if (bw <= 0).any():
+        raise ValueError("body_weight must be positive")
+    if n <= chunk_size:
+        return _evaluate_block(x, D, bw)
+
+    out = {key: np.empty(n) for key in OUTPUTS}
+    for start in range(0, n, chunk_size):
+        block = _evaluate_block(x[start:start + chunk_size],
+                                D if D.ndim == 2 else D[start:start + chunk_size],
+                                bw[start:start + chunk_size])
+        for key in OUTPUTS:
+            out[key][start:start + chunk_size] = block[key]
+    return out
+
+
+# TDN model of balance_3.py (feeds/professional.csv)
+TDN_LIBRARY = feed_library.default_library(feed_library.PROFESSIONAL)
+
+TDN_OUTPUTS = ("dm", "cp", "fat_pct", "ndf", "starch", "peNDF", "avg_ferment", "ph",
+               "fiber_health", "passage_loss", "fiber_tdn_potential", "nonfiber_tdn_potential",
+               "captured_fiber", "captured_nonfiber", "total_potential", "total_realized",
+               "total_waste")
+
+
+def _evaluate_tdn_block(x, library, rules):
+    dm, diet = library.composition(x)
+    cp, fat_pct, ndf, starch = diet["cp"], diet["fat"], diet["ndf"], diet["starch"]
+    peNDF, avg_ferment = diet["peNDF"], diet["fermentRate"]
+
+    # pH Model
+    acid_load = starch * avg_ferment * 0.85
+    total_buffer = peNDF * 0.014 + diet["buffer"] * 0.18
+    ph = np.clip(6.8 - acid_load + total_buffer, 5.2, 7.0)
+
+    # Associative Effects - rules/tdn_findings.json (nitrogen, pH, fat, passage, epithelium)
+    values = {"cp": cp, "ph": ph, "fat_pct": fat_pct, "peNDF": peNDF}
+    values.update({name: x[:, i] for i, name in enumerate(library.names)})
+    state, codes, amounts = findings_rules.apply_rules(values, rules)
+    fiber_health = np.clip(state["fiber_health"], 0.0, 1.0)
+    passage_loss = state["passage_loss"]
+
+    # Energy Partitioning
+    forage = library.column("forage")
+    fiber_tdn_potential = x @ (library.column("tdn") * forage)
+    nonfiber_tdn_potential = x @ (library.column("tdn") * (1 - forage))
+    captured_fiber = fiber_tdn_potential * np.maximum(fiber_health - passage_loss, 0.0)
+    captured_nonfiber = nonfiber_tdn_potential * state["nonfiber_efficiency"]
+    total_potential = fiber_tdn_potential + nonfiber_tdn_potential
+    total_realized = captured_fiber + captured_nonfiber
+
+    return {
+        "dm": dm, "cp": cp, "fat_pct": fat_pct, "ndf": ndf, "starch": starch, "peNDF": peNDF,
+        "avg_ferment": avg_ferment, "ph": ph, "fiber_health": fiber_health,
+        "passage_loss": passage_loss, "fiber_tdn_potential": fiber_tdn_potential,
+        "nonfiber_tdn_potential": nonfiber_tdn_potential, "captured_fiber": captured_fiber,
+        "captured_nonfiber": captured_nonfiber, "total_potential": total_potential,
+        "total_realized": total_realized, "total_waste": total_potential - total_realized,
+        "finding_codes": codes, "finding_amounts": amounts,
+    }
+
+
+def evaluate_tdn(rations, library=None, rules=None, chunk_size=500_000):
+    """
+    Score rations with the TDN model from balance_3.py update(): fermentRate
+    acid load, peNDF buffering, the associative-effect rule table, passage
+    loss and the fiber / non-fiber TDN capture. Returns a dict keyed by
+    TDN_OUTPUTS plus 'finding_codes' (N x rule groups, int8 band index, see
+    findings_rules.code_names()) and 'finding_amounts' (effect sizes).
+    """
+    library = TDN_LIBRARY if library is None else library
+    rules = findings_rules.default_rules() if rules is None else rules
+    x = np.atleast_2d(np.asarray(rations, dtype=float))
+    n = x.shape[0]
+    if n <= chunk_size:
+        return _evaluate_tdn_block(x, library, rules)
+
+    out = None
+    for start in range(0, n, chunk_size):
+        block = _evaluate_tdn_block(x[start:start + chunk_size], library, rules)
+        if out is None:
+            out = {key: np.empty((n,) + v.shape[1:], dtype=v.dtype) for key, v in block.items()}
+        for key, v in block.items():
+            out[key][start:start + chunk_size] = v
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    # Scenarios from loadScenario() in ted_lecture_rum.py
+    scenarios = {
+        "balanced": [5, 4, 2, 2, 1.5, 0],
+        "feedlot": [1, 0, 0, 9, 0.5, 0],
+        "acidosis": [0.5, 0, 0, 10, 0, 0],
+        "methane_mitigation": [6, 2, 2, 0, 1, 0.6],
+    }
+    res = evaluate(list(scenarios.values()))
+    print("=" * 70)
+    print(f"{'Scenario':<20}{'pH':>7}{'peNDF':>8}{'Fiber':>8}{'Ym %':>8}{'CH4':>8}{'ME':>8}")
+    for i, name in enumerate(scenarios):
+        print(f"{name:<20}{res['ph'][i]:>7.2f}{res['peNDF'][i]:>8.1f}{res['fiber_health'][i]*100:>7.0f}%"
+              f"{res['Ym'][i]*100:>8.2f}{res['energy_methane'][i]:>8.1f}{res['energy_me'][i]:>8.1f}")
+
+    # Same balanced ration fed to lighter and heavier cattle: faster passage, less ruminal digestion
+    weights = [350, 450, 600, 750]
+    res = evaluate([scenarios["balanced"]] * len(weights), body_weight=weights)
+    print(f"\n{'Body weight':<20}{'DMI %BW':>8}{'kp f/c %/h':>13}{'Starch dig':>12}{'NDF dig':>9}{'DE':>7}{'ME':>7}")
+    for i, bw in enumerate(weights):
+        print(f"{bw:>8} kg{'':<10}{res['intake_pct_bw'][i]:>8.2f}{res['kp_forage'][i]*100:>7.1f}/"
+              f"{res['kp_concentrate'][i]*100:<5.1f}{res['starch_digestibility'][i]*100:>11.0f}%"
+              f"{res['ndf_digestibility'][i]*100:>8.0f}%{res['energy_digestible'][i]:>7.1f}"
+              f"{res['energy_me'][i]:>7.1f}")
+
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 1, (2_000_000, 6)) * [15, 10, 12, 12, 5, 1.5]
+    t0 = time.perf_counter()
+    evaluate(batch)
+    print(f"\nScreened {len(batch):,} rations in {time.perf_counter() - t0:.2f} s")
+    print("=" * 70)
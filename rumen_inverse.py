@@ -0,0 +1,163 @@
+"""
+Inverse Mode: Maximum Feed Inclusion
+====================================
+Answers "how much steam-flaked corn can this pen take before pH drops
+under 5.8?" for many pens at once. One feed's kg DM is varied, the rest of
+each ration stays fixed, and the solver returns the largest inclusion that
+keeps every target output (pH, peNDF, fiber_health, ...) at or above its
+minimum.
+
+The margin g(kg) = min over targets of (output - minimum) is piecewise and
+has jumps at the penalty bands, so the solve is bracketed:
+
+1. Scan - scan_points + 1 evenly spaced inclusions from 0 to max_kg, all
+   pens in one model call. The first infeasible point and the feasible
+   point before it bracket the limit, so the answer is the edge of the
+   feasible run starting at zero inclusion, not a later crossing.
+2. Refine - Illinois false position on every open bracket together, one
+   model call per iteration, with a bisection step every third iteration
+   so jumps in g cannot stall it. Iteration stops once a bracket is
+   narrower than tol_kg. The feasible end is returned, so every answer
+   meets its targets.
+
+Any batch model with the rumen_engine.evaluate() signature works, e.g. a
+coefficient profile: model=lambda x: rumen_profiles.evaluate_profile(x, 'balance_3').
+"""
+
+import numpy as np
+
+import ration_optimizer
+import rumen_engine
+
+STATUS = ("solved", "at_max", "infeasible")
+
+
+def _margins(model, x, targets):
+    res = model(x)
+    m = np.stack([res[key] - low for key, low in targets.items()], axis=1)
+    m = np.where(np.isnan(m), -np.inf, m)   # empty / undefined rations never pass
+    return m.min(axis=1), m.argmin(axis=1)
+
+
+def max_inclusion(rations, feed, targets, model=None, library=None, max_kg=None,
+                  scan_points=16, tol_kg=1e-3, max_iter=60):
+    """
+    Largest kg DM of `feed` (name or column index) per ration that keeps
+    every output in `targets` ({output: minimum}) at or above its minimum,
+    with the other feeds held at their kg in `rations` (N x feeds).
+
+    max_kg caps the search (scalar or per ration; default: the feed's
+    slider limit, ration_optimizer.MAX_KG). Returns:
+        kg       - (N,) maximum inclusion; NaN where even 0 kg misses a target
+        status   - (N,) index into STATUS: solved, at_max (no limit below
+                   max_kg) or infeasible
+        binding  - (N,) index into `targets` of the output that limits the
+                   inclusion, -1 when at_max
+        targets  - the target names
+        <output> - each target output at the returned inclusion
+    """
+    model = rumen_engine.evaluate if model is None else model
+    library = rumen_engine.LIBRARY if library is None else library
+    targets = dict(targets)
+    j = library.names.index(feed) if isinstance(feed, str) else int(feed)
+    if max_kg is None:
+        if library.names[j] not in rumen_engine.FEED_NAMES:
+            raise ValueError(f"no slider limit for feed '{library.names[j]}'; pass max_kg")
+        max_kg = ration_optimizer.MAX_KG[rumen_engine.FEED_NAMES.index(library.names[j])]
+    x = np.array(np.atleast_2d(rations), dtype=float)
+    n = len(x)
+    cap = np.broadcast_to(np.asarray(max_kg, dtype=float), (n,))
+
+    def with_feed(rows, kg):
+        trial = x[rows].copy()
+        trial[:, j] = kg
+        return trial
+
+    # 1. Scan: every pen at every grid inclusion in one call
+    grid = np.linspace(0.0, 1.0, scan_points + 1)[None, :] * cap[:, None]
+    rows = np.repeat(np.arange(n), scan_points + 1)
+    margin, bind = _margins(model, with_feed(rows, grid.ravel()), targets)
+    margin, bind = margin.reshape(n, -1), bind.reshape(n, -1)
+    ok = margin >= 0
+
+    kg = np.full(n, np.nan)
+    status = np.full(n, STATUS.index("solved"), dtype=np.int8)
+    binding = np.full(n, -1, dtype=np.int64)
+
+    infeasible = ~ok[:, 0]
+    at_max = ok.all(axis=1)
+    status[infeasible] = STATUS.index("infeasible")
+    binding[infeasible] = bind[infeasible, 0]
+    status[at_max] = STATUS.index("at_max")
+    kg[at_max] = cap[at_max]
+
+    # Bracket: last feasible grid point before the first infeasible one
+    idx = np.flatnonzero(~infeasible & ~at_max)
+    first_bad = np.argmax(~ok[idx], axis=1)
+    lo, hi = grid[idx, first_bad - 1], grid[idx, first_bad]
+    f_lo, f_hi = margin[idx, first_bad - 1], margin[idx, first_bad]
+    b_hi = bind[idx, first_bad]
+    last = np.zeros(len(idx), dtype=np.int8)   # side moved last: 1 lo, -1 hi
+
+    # 2. Refine all open brackets together
+    for it in range(max_iter):
+        open_ = hi - lo > tol_kg
+        if not open_.any():
+            break
+        a = np.flatnonzero(open_)
+        # Illinois false-position point, bisection every third step or when the secant is undefined
+        denom = f_lo[a] - f_hi[a]
+        secant = lo[a] + f_lo[a] * (hi[a] - lo[a]) / np.where(np.isfinite(denom) & (denom > 0), denom, 1.0)
+        use_mid = (it % 3 == 2) | ~np.isfinite(denom) | (denom <= 0)
+        c = np.where(use_mid, 0.5 * (lo[a] + hi[a]), secant)
+        c = np.clip(c, lo[a] + 0.01 * (hi[a] - lo[a]), hi[a] - 0.01 * (hi[a] - lo[a]))
+
+        fc, bc = _margins(model, with_feed(idx[a], c), targets)
+        good = fc >= 0
+        g, b = a[good], a[~good]
+        # Illinois: halve the stale end's value when the same side moves twice
+        f_hi[g] = np.where(last[g] == 1, f_hi[g] / 2, f_hi[g])
+        f_lo[b] = np.where(last[b] == -1, f_lo[b] / 2, f_lo[b])
+        lo[g], f_lo[g], last[g] = c[good], fc[good], 1
+        hi[b], f_hi[b], b_hi[b], last[b] = c[~good], fc[~good], bc[~good], -1
+
+    kg[idx] = lo
+    binding[idx] = b_hi
+
+    out = {"kg": kg, "status": status, "binding": binding, "targets": tuple(targets)}
+    solved = np.flatnonzero(np.isfinite(kg))
+    at_kg = model(with_feed(solved, kg[solved])) if len(solved) else {}
+    for key in targets:
+        out[key] = np.full(n, np.nan)
+        if len(solved):
+            out[key][solved] = at_kg[key]
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    # Yard of pens on grower-to-finisher rations; how much steam-flaked corn can each take?
+    rng = np.random.default_rng(0)
+    n_pens = 5000
+    base = rng.uniform(0, 1, (n_pens, 6)) * [4, 3, 5, 0, 1.5, 0.3] + [1, 0, 1, 0, 0.5, 0]
+    targets = {"ph": 5.8, "peNDF": 8.0, "fiber_health": 0.5}
+
+    t0 = time.perf_counter()
+    res = max_inclusion(base, "wet", targets)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Max steam-flaked corn (wet) for {n_pens:,} pens: pH >= 5.8, peNDF >= 8%, "
+          f"fiber efficiency >= 50%  ({elapsed:.2f} s)")
+    print("=" * 70)
+    counts = np.bincount(res["status"], minlength=len(STATUS))
+    print("  " + " | ".join(f"{name} {c:,}" for name, c in zip(STATUS, counts)))
+    limited = res["binding"][res["status"] == 0]
+    print("  limited by " + ", ".join(f"{name} {np.sum(limited == k):,}" for k, name in enumerate(res["targets"])))
+    print(f"\n{'Pen':>5}  ration (hay alf dry sbm fat)  {'wet kg':>7}{'pH':>6}{'peNDF':>7}{'fiber':>7}")
+    for i in range(8):
+        r = base[i]
+        print(f"{i:>5}  {r[0]:4.1f} {r[1]:4.1f} {r[2]:4.1f} {r[4]:4.1f} {r[5]:4.2f}      {res['kg'][i]:>7.2f}"
+              f"{res['ph'][i]:>6.2f}{res['peNDF'][i]:>7.1f}{res['fiber_health'][i]*100:>6.0f}%")
+    print("=" * 70)
@@ -0,0 +1,337 @@
+"""
+Rumen Coefficient Profiles
+==========================
+balance.py, balance_1.py, balance_2.py, balance_3.py and ted_lecture_rum.py
+model the same mechanisms with different coefficients: a starch acid load
+against fiber and cation buffering, associative penalties on fiber
+digestion, and an energy capture. Here every page is a named coefficient
+profile (profiles/<name>.json) over one engine:
+
+    ph            base + sum(coefficient * term) over PH_TERMS, clipped to
+                  the profile's bounds
+    fiber_health  the profile's rule table (rules/*.json, findings_rules
+                  format), clipped to fiber_health_bounds
+    energy        'tdn' - fiber / non-fiber TDN capture with passage loss
+                          and non-fiber efficiency (balance*)
+                  'ge'  - GE -> DE -> ME with IPCC Tier 2 Ym (ted); DE is
+                          either linear in starch and NDF or, with
+                          digestibility 'passage', rumen_engine's
+                          kd / (kd + kp) digestion. Ym's intake step and the
+                          passage rates use the rations' body weight (the
+                          profile's body_weight by default)
+
+Each profile names the feed library its coefficients were fitted with; all
+bundled libraries share the six slider feeds (hay, alf, dry, wet, sbm,
+fat), so one ration matrix runs under every profile.
+
+compare_profiles() is one pass over the batch. Diet terms come from one
+product per distinct library. pH for every profile is one
+(N x terms) @ (terms x profiles) product. The rule tables and energy
+partitions then run per profile as array expressions over all N rations.
+Results are (profiles x N) arrays for side-by-side comparison.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+import feed_library
+import findings_rules
+import rumen_engine
+
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+PROFILE_NAMES = ("balance", "balance_1", "balance_2", "balance_3", "ted")
+
+# pH terms a profile may weight (diet % DM unless noted)
+#   starch_ferment - starch x DM-weighted fermentRate (balance_2/3)
+#   starch_kd      - starch x grain-starch-weighted kd, 0.10 without grain (ted)
+#   buffer         - DM fraction of cation-buffering feeds (alfalfa)
+#   grain_kg / forage_kg - kg DM of grain / forage feeds (balance)
+PH_TERMS = ("starch", "starch_ferment", "starch_kd", "peNDF", "buffer", "cp", "grain_kg", "forage_kg")
+
+OUTPUTS = ("dm", "cp", "ndf", "starch", "fat_pct", "peNDF", "ph", "fiber_health",
+           "potential", "realized", "efficiency")
+
+# Columns of the per-library design matrix; attributes a library lacks are NaN
+DESIGN = ("cp", "ndf", "starch", "fat", "peNDF", "fermentRate", "grain_starch", "grain_starch_kd",
+          "buffer", "forage", "grain", "rdp", "tdn", "forage_tdn", "ge")
+
+
+def load_profile(path):
+    """Read and validate a coefficient profile."""
+    with open(path, encoding="utf-8") as fh:
+        profile = json.load(fh)
+    profile.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    unknown = set(profile["ph"]["terms"]) - set(PH_TERMS)
+    if unknown:
+        raise ValueError(f"profile '{profile['name']}' uses unknown pH terms {sorted(unknown)}")
+    if profile["energy"]["model"] not in ("tdn", "ge"):
+        raise ValueError(f"profile '{profile['name']}' has unknown energy model '{profile['energy']['model']}'")
+    return profile
+
+
+_cache = {}
+
+
+def default_profiles():
+    """The bundled profiles, {name: profile} in PROFILE_NAMES order."""
+    if not _cache:
+        for name in PROFILE_NAMES:
+            _cache[name] = load_profile(os.path.join(PROFILES_DIR, f"{name}.json"))
+    return dict(_cache)
+
+
+def profile_rules(profile):
+    """The profile's rule table: a file in rules/ or an inline table."""
+    rules = profile["rules"]
+    if isinstance(rules, str):
+        return findings_rules.default_rules(os.path.join(findings_rules.RULES_DIR, rules))
+    return rules
+
+
+def profile_library(profile):
+    """The feed library named by the profile (feeds/<library>.csv)."""
+    return feed_library.default_library(os.path.join(feed_library.FEEDS_DIR, profile["library"] + ".csv"))
+
+
+@lru_cache(maxsize=16)
+def design_matrix(library):
+    """(feeds x DESIGN) matrix: one product x @ D gives every diet sum the profiles use."""
+    def col(attr):
+        if attr in library.attributes or attr in ("forage", "grain", "buffer"):
+            return library.column(attr)
+        return np.full(len(library), np.nan)
+
+    pendf = col("peNDF") if "peNDF" in library.attributes else col("ndf") * col("pe")
+    grain_starch = col("starch") * col("grain")
+    D = np.stack([col("cp"), col("ndf"), col("starch"), col("fat"), pendf, col("fermentRate"),
+                  grain_starch, grain_starch * col("kd"), col("buffer"), col("forage"), col("grain"),
+                  col("rdp"), col("tdn"), col("tdn") * col("forage"), col("ge")], axis=1)
+    D.setflags(write=False)
+    return D
+
+
+def _diet_terms(x, library):
+    # Diet means, pH terms and feed kg for one library
+    dm = x.sum(axis=1)
+    safe_dm = np.where(dm > 0, dm, 1.0)
+    sums = dict(zip(DESIGN, (x @ design_matrix(library)).T))
+    diet = {k: sums[k] / safe_dm for k in ("cp", "ndf", "starch", "fat", "peNDF", "fermentRate", "buffer", "rdp")}
+    grain_starch = sums["grain_starch"]
+    kd = np.where(grain_starch > 0, sums["grain_starch_kd"] / np.where(grain_starch > 0, grain_starch, 1.0), 0.10)
+    terms = {
+        "starch": diet["starch"],
+        "starch_ferment": diet["starch"] * diet["fermentRate"],
+        "starch_kd": diet["starch"] * kd,
+        "peNDF": diet["peNDF"],
+        "buffer": diet["buffer"],
+        "cp": diet["cp"],
+        "grain_kg": sums["grain"],
+        "forage_kg": sums["forage"],
+    }
+    return dm, sums, diet, terms
+
+
+def ph_terms(rations, library, terms=PH_TERMS):
+    """(N x terms) matrix of pH terms for a kg-DM ration matrix; empty rations are rejected."""
+    x = np.atleast_2d(np.asarray(rations, dtype=float))
+    if x.shape[1] != len(library):
+        raise ValueError(f"expected {len(library)} feed columns {library.names}, got {x.shape[1]}")
+    if not (x.sum(axis=1) > 0).all():
+        raise ValueError("every ration needs a positive intake")
+    values = _diet_terms(x, library)[3]
+    missing = [t for t in terms if np.isnan(values[t]).all()]
+    if missing:
+        raise ValueError(f"feed library {library.names} lacks the attributes for pH terms {missing}")
+    return np.stack([values[t] for t in terms], axis=1)
+
+
+def save_profile(profile, path=None):
+    """Write a profile as JSON (default profiles/<name>.json) and return the path."""
+    unknown = set(profile["ph"]["terms"]) - set(PH_TERMS)
+    if unknown:
+        raise ValueError(f"profile '{profile['name']}' uses unknown pH terms {sorted(unknown)}")
+    path = os.path.join(PROFILES_DIR, f"{profile['name']}.json") if path is None else path
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(profile, fh, indent=2)
+        fh.write("\n")
+    return path
+
+
+def _energy(profile, x, library, dm, sums, diet, state, fiber_health, ph, body_weight):
+    energy = profile["energy"]
+    if energy["model"] == "tdn":
+        # Fiber TDN carries the fiber penalties and passage loss; the rest is scaled by nonfiber_efficiency
+        s = energy.get("scale", 1.0)
+        if energy.get("fiber", "forage") == "ndf":
+            fiber = sums["ndf"] * energy["ndf_digestibility"] * s
+        else:
+            fiber = sums["forage_tdn"] * s
+        nonfiber = sums["tdn"] * s - fiber
+        passage_loss = state.get("passage_loss", 0.0)
+        captured_fiber = fiber * np.maximum(fiber_health - passage_loss, 0.0)
+        captured_nonfiber = nonfiber * state.get("nonfiber_efficiency", 1.0)
+        return fiber + nonfiber, captured_fiber + captured_nonfiber
+
+    # GE -> DE -> ME; potential is the ME with no fiber penalty
+    m = energy["methane"]
+    starch, fat_pct, ndf = diet["starch"], diet["fat"], diet["ndf"]
+    total_ge = sums["ge"]
+    forage_pct = (sums["forage"] / np.where(dm > 0, dm, 1.0)) * 100
+    Ym = np.where(forage_pct > m["forage_high"], m["ym_forage"],
+         np.where((forage_pct < m["forage_low"]) & (starch > m["starch_feedlot"]), m["ym_feedlot"],
+                  m["ym_forage"] - (starch / 100) * m["ym_starch_slope"]))
+    Ym = Ym - np.where(starch > m["starch_ref"], (starch - m["starch_ref"]) * m["starch_slope"], 0.0)
+    Ym = Ym - np.where(fat_pct > m["fat_ref"], (fat_pct - m["fat_ref"]) * m["fat_slope"], 0.0)
+    Ym = np.where(ph < m["acidosis_ph"], Ym * m["acidosis_factor"], Ym)
+    bw = m["body_weight"] if body_weight is None else body_weight
+    intake_pct_bw = (dm / bw) * 100
+    Ym = np.where(intake_pct_bw > m["intake_pct_bw"], Ym * m["passage_factor"], Ym)
+    Ym = np.maximum(Ym, m["ym_floor"])
+
+    d = energy["digestibility"]
+    if d == "passage":
+        fermented = rumen_engine.ruminal_digestion(x, rumen_engine.design_matrix(library),
+                                                   intake_pct_bw, forage_pct, ndf)[2]
+        digestible = rumen_engine.digestible_ge(total_ge, sums["starch"] / 100, sums["ndf"] / 100,
+                                                fermented[0], fermented[1])
+    else:
+        digestible = total_ge * (d["base"] + (starch / 100) * d["starch"] + (ndf / 100) * d["ndf"])
+    losses = total_ge * Ym + total_ge * energy["urine"]
+    return digestible - losses, digestible * fiber_health - losses
+
+
+def _compare_block(x, profiles, library, body_weight):
+    n, p = len(x), len(profiles)
+    out = {key: np.empty((p, n)) for key in OUTPUTS}
+    codes = {}
+
+    # 1. Diet terms - one product per distinct feed library
+    groups = {}
+    for j, profile in enumerate(profiles):
+        lib = profile_library(profile) if library is None else library
+        groups.setdefault(id(lib), (lib, []))[1].append(j)
+
+    for lib, members in groups.values():
+        if x.shape[1] != len(lib):
+            raise ValueError(f"expected {len(lib)} feed columns {lib.names}, got {x.shape[1]}")
+        dm, sums, diet, terms = _diet_terms(x, lib)
+
+        # 2. pH for every profile on this library in one product
+        used = [t for t in PH_TERMS if any(profiles[j]["ph"]["terms"].get(t, 0.0) for j in members)]
+        missing = [t for t in used if n and np.isnan(terms[t]).all()]
+        if missing:
+            raise ValueError(f"feed library {lib.names} lacks the attributes for pH terms {missing}")
+        T = np.stack([terms[t] for t in used], axis=1) if used else np.zeros((n, 0))
+        C = np.array([[profiles[j]["ph"]["terms"].get(t, 0.0) for t in used] for j in members])
+        C = C.reshape(len(members), len(used))
+        base = np.array([profiles[j]["ph"]["base"] for j in members])
+        lo, hi = np.array([profiles[j]["ph"]["bounds"] for j in members]).T
+        ph_all = np.clip(base + T @ C.T, lo, hi)
+
+        # 3. Rule tables and energy partition per profile
+        values = {"cp": diet["cp"], "ndf": diet["ndf"], "starch": diet["starch"], "fat_pct": diet["fat"],
+                  "peNDF": diet["peNDF"], "rdp_pct": diet["cp"] * diet["rdp"] / 100}
+        values.update({name: x[:, i] for i, name in enumerate(lib.names)})
+        for k, j in enumerate(members):
+            profile = profiles[j]
+            ph = ph_all[:, k]
+            state, codes[profile["name"]], _ = findings_rules.apply_rules(dict(values, ph=ph), profile_rules(profile))
+            fh_lo, fh_hi = profile.get("fiber_health_bounds", (0.0, 1.0))
+            fiber_health = state["fiber_health"]
+            if fh_lo is not None or fh_hi is not None:
+                fiber_health = np.clip(fiber_health, fh_lo, fh_hi)
+            potential, realized = _energy(profile, x, lib, dm, sums, diet, state, fiber_health, ph, body_weight)
+
+            row = {"dm": dm, "cp": diet["cp"], "ndf": diet["ndf"], "starch": diet["starch"],
+                   "fat_pct": diet["fat"], "peNDF": diet["peNDF"], "ph": ph, "fiber_health": fiber_health,
+                   "potential": potential, "realized": realized,
+                   "efficiency": realized / np.where(potential != 0, potential, np.nan)}
+            for key in OUTPUTS:
+                out[key][j] = row[key]
+
+    # Empty rations score as NaN, as in rumen_engine.evaluate()
+    empty = ~(x.sum(axis=1) > 0)
+    if empty.any():
+        for key in OUTPUTS:
+            if key != "dm":
+                out[key][:, empty] = np.nan
+    return out, codes
+
+
+def compare_profiles(rations, profiles=None, library=None, chunk_size=200_000, body_weight=None):
+    """
+    Evaluate an (N x feeds) kg-DM matrix under several coefficient profiles
+    (default: all bundled, PROFILE_NAMES order). `profiles` may mix names
+    and profile dicts. `library` overrides every profile's own feed library.
+    body_weight is kg, a scalar or one per ration, as in
+    rumen_engine.evaluate() (default: each 'ge' profile's own body_weight).
+
+    Returns {'profiles': names, 'units': energy units, <OUTPUTS>: (P x N)
+    arrays, 'finding_codes': {name: (N x rule groups) int8}}. potential and
+    realized are in each profile's energy unit; efficiency = realized /
+    potential is comparable across profiles.
+    """
+    bundled = default_profiles()
+    if profiles is None:
+        profiles = list(bundled)
+    profiles = [bundled[p] if isinstance(p, str) else p for p in profiles]
+    x = np.atleast_2d(np.asarray(rations, dtype=float))
+
+    n = len(x)
+    if body_weight is not None:
+        body_weight = np.broadcast_to(np.asarray(body_weight, dtype=float), (n,))
+        if (body_weight <= 0).any():
+            raise ValueError("body_weight must be positive")
+    out = {key: np.empty((len(profiles), n)) for key in OUTPUTS}
+    codes = {}
+    for start in range(0, max(n, 1), chunk_size):
+        bw = None if body_weight is None else body_weight[start:start + chunk_size]
+        block, block_codes = _compare_block(x[start:start + chunk_size], profiles, library, bw)
+        for key in OUTPUTS:
+            out[key][:, start:start + chunk_size] = block[key]
+        for name, c in block_codes.items():
+            codes.setdefault(name, []).append(c)
+
+    out["profiles"] = [p["name"] for p in profiles]
+    out["units"] = [p["energy"]["unit"] for p in profiles]
+    out["finding_codes"] = {name: np.concatenate(c) for name, c in codes.items()}
+    return out
+
+
+def evaluate_profile(rations, profile, library=None, chunk_size=200_000, body_weight=None):
+    """One profile: {output: (N,) array} plus 'finding_codes'."""
+    res = compare_profiles(rations, [profile], library, chunk_size, body_weight)
+    out = {key: res[key][0] for key in OUTPUTS}
+    out["finding_codes"] = res["finding_codes"][res["profiles"][0]]
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    # Scenarios from loadScenario() in balance_3.py
+    scenarios = {
+        "balanced": [5, 3, 3, 0, 1.0, 0],
+        "feedlot": [1.5, 0.5, 6, 2, 1.5, 0.3],
+        "acidosis": [1, 0, 0, 9, 0.3, 0],
+        "starvation": [10, 0, 0, 0, 0, 0],
+    }
+    res = compare_profiles(list(scenarios.values()))
+    print("=" * 70)
+    print("pH / fiber efficiency / energy capture by profile")
+    print("=" * 70)
+    print(f"{'Scenario':<12}" + "".join(f"{name:>15}" for name in res["profiles"]))
+    for i, scenario in enumerate(scenarios):
+        print(f"{scenario:<12}" + "".join(
+            f"{res['ph'][j, i]:>6.2f}{res['fiber_health'][j, i]*100:>4.0f}%{res['efficiency'][j, i]*100:>4.0f}%"
+            for j in range(len(res["profiles"]))))
+
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 1, (1_000_000, 6)) * [12, 8, 10, 10, 4, 1.5]
+    t0 = time.perf_counter()
+    compare_profiles(batch)
+    print(f"\n{len(batch):,} rations x {len(res['profiles'])} profiles in {time.perf_counter() - t0:.2f} s")
+    print("=" * 70)
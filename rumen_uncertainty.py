@@ -0,0 +1,187 @@
+"""
+Feed-Composition Uncertainty (Monte Carlo)
+==========================================
+The `feeds` table in ted_lecture_rum.py is a point estimate, but CP, NDF,
+starch and fat vary from lot to lot. This mode draws every feed's
+composition from a normal distribution (mean: the feed library, SD:
+feeds/integrated_sd.csv) truncated to 0-100 % DM - out-of-range draws are
+redrawn - and runs each draw through rumen_engine. Redrawing moves the mean
+of a feed that sits on or near a bound (fat at 100 % fat, say, can only be
+redrawn downward), so such feeds average below their library value. A
+feed whose SD puts almost all of its mass outside 0-100 is an input error:
+redrawing stops after MAX_REDRAWS rounds and raises.
+
+One draw is one set of feed lots, shared by every ration in the batch
+(common random numbers), so differences between rations are not blurred by
+sampling noise. Draws are generated and scored in chunks and folded into
+fixed-bin histograms and running sums, so memory does not grow with
+n_draws.
+
+Reported per ration:
+    ph, energy_me   - mean, sd, p05 / p50 / p95 and the histogram
+    sara_probability  - P(pH < 5.8)
+    acute_probability - P(pH < 5.6)
+"""
+
+import numpy as np
+
+import feed_library
+import rumen_engine
+
+SD_LIBRARY = feed_library.default_library(feed_library.INTEGRATED_SD)
+SARA_PH, ACUTE_PH = 5.8, 5.6
+PH_BINS = 520          # 0.005 pH units over PH_BOUNDS
+ME_BINS = 400
+MIN_CHUNK = 1_000
+MAX_REDRAWS = 100     # rounds; a bound-centred feed keeps half its draws per round
+
+
+class _StreamingSummary:
+    """Fixed-bin histogram plus running sums for R rations."""
+
+    def __init__(self, lo, hi, bins):
+        self.edges = np.linspace(lo, hi, bins + 1, axis=-1)   # (R, bins+1) or (bins+1,)
+        self.lo, self.width, self.bins = np.asarray(lo), (np.asarray(hi) - lo) / bins, bins
+        self.counts = np.zeros(np.shape(lo) + (bins,), dtype=np.int64)
+        self.total = np.zeros(np.shape(lo))
+        self.total_sq = np.zeros(np.shape(lo))
+        self.n = 0
+
+    def add(self, values):
+        """values: (R, draws); out-of-range draws land in the end bins."""
+        idx = np.clip(((values - self.lo[..., None]) / self.width[..., None]).astype(np.int64),
+                      0, self.bins - 1)
+        flat = (np.arange(len(values))[:, None] * self.bins + idx).ravel()
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.total += values.sum(axis=1)
+        self.total_sq += (values ** 2).sum(axis=1)
+        self.n += values.shape[1]
+
+    def quantile(self, q):
+        cdf = np.cumsum(self.counts, axis=1) / self.n
+        k = np.array([np.searchsorted(row, q) for row in cdf])
+        below = np.where(k > 0, np.take_along_axis(cdf, np.maximum(k - 1, 0)[:, None], 1)[:, 0], 0.0)
+        in_bin = self.counts[np.arange(len(k)), k] / self.n
+        frac = np.divide(q - below, in_bin, out=np.full(len(k), 0.5), where=in_bin > 0)
+        return self.lo + (k + frac) * self.width
+
+    def summary(self):
+        mean = self.total / self.n
+        return {
+            "mean": mean,
+            "sd": np.sqrt(np.maximum(self.total_sq / self.n - mean ** 2, 0.0)),
+            "p05": self.quantile(0.05), "p50": self.quantile(0.50), "p95": self.quantile(0.95),
+            "counts": self.counts, "edges": self.edges,
+        }
+
+
+def sample_design(library, sd_library, n, rng):
+    """n draws of the engine design matrix with lot-to-lot composition noise, (n x feeds x DESIGN)."""
+    sd_library = sd_library.subset(library.names)
+    drawn = {}
+
+    def col(attr):
+        # design_columns() reads some attributes more than once; each is drawn
+        # once per call so every column of a draw sees the same feed lot
+        if attr not in drawn:
+            drawn[attr] = _draw(attr)
+        return drawn[attr]
+
+    def _draw(attr):
+        mean = library.column(attr)
+        if attr not in sd_library.attributes:
+            return np.broadcast_to(mean, (n, len(mean)))
+        sd = sd_library.column(attr)
+        # Truncated normal: draws outside 0-100 % DM are redrawn, not clipped onto the bounds
+        draw = mean + sd * rng.standard_normal((n, len(mean)))
+        out = (draw < 0.0) | (draw > 100.0)
+        for _ in range(MAX_REDRAWS):
+            if not out.any():
+                return draw
+            rows, feeds = np.nonzero(out)
+            draw[rows, feeds] = mean[feeds] + sd[feeds] * rng.standard_normal(len(rows))
+            out[rows, feeds] = (draw[rows, feeds] < 0.0) | (draw[rows, feeds] > 100.0)
+        if out.any():
+            bad = [library.names[k] for k in np.flatnonzero(out.any(axis=0))]
+            raise ValueError(f"'{attr}' draws for {bad} still outside 0-100 after {MAX_REDRAWS} "
+                             f"redraws; check the SD table")
+        return draw
+
+    return rumen_engine.design_columns(col)
+
+
+def monte_carlo(rations, n_draws=100_000, chunk_size=20_000, library=None, sd_library=None, seed=None):
+    """
+    Propagate feed-composition uncertainty through rumen_engine for an
+    (R x feeds) kg-DM matrix. Returns {'ph': summary, 'energy_me': summary,
+    'sara_probability', 'acute_probability', 'point', 'n_draws'} where each
+    summary holds per-ration arrays (see _StreamingSummary.summary).
+    """
+    library = rumen_engine.LIBRARY if library is None else library
+    sd_library = SD_LIBRARY if sd_library is None else sd_library
+    x = np.atleast_2d(np.asarray(rations, dtype=float))
+    n_rations, n_feeds = x.shape
+    rng = np.random.default_rng(seed)
+    if not (x.sum(axis=1) > 0).all():
+        raise ValueError("every ration needs a positive intake")
+    point = rumen_engine.evaluate(x, library)
+
+    # Chunk so one block holds about chunk_size ration-draws (at least
+    # MIN_CHUNK draws, which also size the ME histogram)
+    draws_per_chunk = min(n_draws, max(MIN_CHUNK, chunk_size // n_rations))
+    ph_hist = _StreamingSummary(np.full(n_rations, rumen_engine.PH_BOUNDS[0]),
+                                np.full(n_rations, rumen_engine.PH_BOUNDS[1]), PH_BINS)
+    me_hist = None
+    sara = np.zeros(n_rations, dtype=np.int64)
+    acute = np.zeros(n_rations, dtype=np.int64)
+
+    done = 0
+    while done < n_draws:
+        m = min(draws_per_chunk, n_draws - done)
+        D = sample_design(library, sd_library, m, rng)
+        designs = np.broadcast_to(D, (n_rations,) + D.shape).reshape(-1, n_feeds, D.shape[-1])
+        block = rumen_engine.evaluate(np.repeat(x, m, axis=0), library, design=designs)
+        ph = block["ph"].reshape(n_rations, m)
+        me = block["energy_me"].reshape(n_rations, m)
+
+        if me_hist is None:
+            # ME has no natural bounds: size the bins from the first chunk
+            spread = np.maximum(me.std(axis=1), 1e-3)
+            me_hist = _StreamingSummary(me.mean(axis=1) - 8 * spread, me.mean(axis=1) + 8 * spread, ME_BINS)
+        ph_hist.add(ph)
+        me_hist.add(me)
+        sara += (ph < SARA_PH).sum(axis=1)
+        acute += (ph < ACUTE_PH).sum(axis=1)
+        done += m
+
+    return {
+        "ph": ph_hist.summary(),
+        "energy_me": me_hist.summary(),
+        "sara_probability": sara / n_draws,
+        "acute_probability": acute / n_draws,
+        "point": point,
+        "n_draws": n_draws,
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    scenarios = {
+        "balanced": [5, 4, 2, 2, 1.5, 0],
+        "feedlot": [1, 0, 0, 9, 0.5, 0],
+        "step_up": [3, 1, 5, 2, 1, 0],
+        "methane_mitigation": [6, 2, 2, 0, 1, 0.6],
+    }
+    print("=" * 70)
+    print(f"{'Scenario':<20}{'pH':>6}{'p05':>7}{'p95':>7}{'P(SARA)':>9}{'ME':>7}{'p05':>7}{'p95':>7}{'time':>8}")
+    for name, ration in scenarios.items():
+        t0 = time.perf_counter()
+        res = monte_carlo(ration, seed=0)
+        elapsed = time.perf_counter() - t0
+        ph, me = res["ph"], res["energy_me"]
+        print(f"{name:<20}{res['point']['ph'][0]:>6.2f}{ph['p05'][0]:>7.2f}{ph['p95'][0]:>7.2f}"
+              f"{res['sara_probability'][0]*100:>8.1f}%{res['point']['energy_me'][0]:>7.1f}"
+              f"{me['p05'][0]:>7.1f}{me['p95'][0]:>7.1f}{elapsed*1000:>6.0f}ms")
+    print(f"\n{res['n_draws']:,} composition draws per ration")
+    print("=" * 70)
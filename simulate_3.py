@@ -1,6 +1,8 @@
 import os
 import webbrowser
 
+import page_worker
+
 def create_cumulative_impact_model():
     html_content = """
 
@@ -354,7 +356,9 @@ def create_cumulative_impact_model():
     </div>
 </div>
 
-<script>
+<script id="model-core">
+    // Model core - pure math, no DOM. Runs in the compute worker (page_worker.py) and, as a
+    // fallback, on the page. Row in: the SULFUR_IN slider values; row out: SULFUR_OUT fields.
     // Physical Constants
     const MW_S = 32.065;
     const MW_SO4 = 96.066;
@@ -365,21 +369,15 @@ def create_cumulative_impact_model():
     const HEAT_TO_NE = 0.70;
     const NE_G_CONTENT = 5.0; // Mcal/kg - Energy content of gain (NASEM 2016)
 
-    let dailyChart = null;
-    let cumulativeChart = null;
+    const SULFUR_IN = ['bw', 'dmi', 'feedS', 'waterS', 'waterIn', 'reduction', 'abs', 'ox', 'days_on_feed', 'live_price'];
+    const SULFUR_OUT = ['feedS_g', 'waterS_g', 'totalS_g', 'totalS_dmi_pct', 'rumenH2S_g', 'absorbedH2S_g', 'oxidizedS_g',
+                        'liters_O2', 'heat_mcal_raw', 'ne_cost_mcal', 'base_nem', 'total_nem', 'pct_increase',
+                        'cumulative_energy_lost', 'lost_weight_gain_kg', 'lost_weight_gain_lb', 'opportunity_cost',
+                        'daily_cost_avg', 'lot_cost_10k'];
 
-    function updateModel() {
-        // GET INPUTS
-        const bw = parseFloat(document.getElementById('bw').value);
-        const dmi = parseFloat(document.getElementById('dmi').value);
-        const feedS_pct = parseFloat(document.getElementById('feedS').value);
-        const waterS_conc = parseFloat(document.getElementById('waterS').value);
-        const waterIn = parseFloat(document.getElementById('waterIn').value);
-        const red_pct = parseFloat(document.getElementById('reduction').value);
-        const abs_pct = parseFloat(document.getElementById('abs').value);
-        const ox_pct = parseFloat(document.getElementById('ox').value);
-        const days_on_feed = parseFloat(document.getElementById('days_on_feed').value);
-        const live_price = parseFloat(document.getElementById('live_price').value);
+    function sulfurRow(input, i, out, o) {
+        const [bw, dmi, feedS_pct, waterS_conc, waterIn, red_pct, abs_pct, ox_pct, days_on_feed, live_price] =
+            input.subarray(i, i + SULFUR_IN.length);
 
         // CALCULATE SULFUR FLOW
         const feedS_g = dmi * (feedS_pct / 100) * 1000;
@@ -415,6 +413,46 @@ def create_cumulative_impact_model():
         const daily_cost_avg = opportunity_cost / days_on_feed;
         const lot_cost_10k = opportunity_cost * 10000;
 
+        [feedS_g, waterS_g, totalS_g, totalS_dmi_pct, rumenH2S_g, absorbedH2S_g, oxidizedS_g,
+         liters_O2, heat_mcal_raw, ne_cost_mcal, base_nem, total_nem, pct_increase,
+         cumulative_energy_lost, lost_weight_gain_kg, lost_weight_gain_lb, opportunity_cost,
+         daily_cost_avg, lot_cost_10k].forEach((v, j) => out[o + j] = v);
+    }
+</script>
+
+<script>
+__COMPUTE_LAYER__
+    const compute = createCompute(sulfurRow, SULFUR_IN.length, SULFUR_OUT.length);
+
+    let dailyChart = null;
+    let cumulativeChart = null;
+
+    function updateModel() {
+        // GET INPUTS
+        const bw = parseFloat(document.getElementById('bw').value);
+        const dmi = parseFloat(document.getElementById('dmi').value);
+        const feedS_pct = parseFloat(document.getElementById('feedS').value);
+        const waterS_conc = parseFloat(document.getElementById('waterS').value);
+        const waterIn = parseFloat(document.getElementById('waterIn').value);
+        const red_pct = parseFloat(document.getElementById('reduction').value);
+        const abs_pct = parseFloat(document.getElementById('abs').value);
+        const ox_pct = parseFloat(document.getElementById('ox').value);
+        const days_on_feed = parseFloat(document.getElementById('days_on_feed').value);
+        const live_price = parseFloat(document.getElementById('live_price').value);
+
+        // Model runs in the compute worker; render when the result arrives
+        const inputs = { bw, dmi, feedS_pct, waterS_conc, waterIn, red_pct, abs_pct, ox_pct, days_on_feed, live_price };
+        compute.run(Float64Array.of(bw, dmi, feedS_pct, waterS_conc, waterIn, red_pct, abs_pct, ox_pct, days_on_feed, live_price))
+            .then(out => { if(out) render(inputs, outputRow(SULFUR_OUT, out)); });
+    }
+
+    function render(inputs, m) {
+        const { bw, dmi, feedS_pct, waterS_conc, waterIn, red_pct, abs_pct, ox_pct, days_on_feed, live_price } = inputs;
+        const { feedS_g, waterS_g, totalS_g, totalS_dmi_pct, rumenH2S_g, absorbedH2S_g, oxidizedS_g,
+                liters_O2, heat_mcal_raw, ne_cost_mcal, base_nem, total_nem, pct_increase,
+                cumulative_energy_lost, lost_weight_gain_kg, lost_weight_gain_lb, opportunity_cost,
+                daily_cost_avg, lot_cost_10k } = m;
+
         // UPDATE UI - INPUTS
         document.getElementById('val_bw').innerText = bw + " kg (" + (bw * 2.205).toFixed(0) + " lb)";
         document.getElementById('val_dmi').innerText = dmi + " kg (" + (dmi * 2.205).toFixed(1) + " lb)";
@@ -691,6 +729,7 @@ def create_cumulative_impact_model():
 
 
 """
+    html_content = page_worker.inject(html_content)
     
     filename = "cumulative_impact_model.html"
     with open(filename, "w", encoding='utf-8') as f:
@@ -0,0 +1,168 @@
+"""
+Grain Step-Up Planner
+=====================
+Plans the daily move from a receiving ration to a finishing ration
+(default: loadScenario('feedlot') in ted_lecture_rum.py) in the fewest days.
+Each day's ration is a blend of the two, t * target + (1 - t) * receiving,
+as in a two-ration step-up system, with t on a grid of `levels` steps.
+
+A day's ration must
+    - meet `limits` on the rumen_engine outputs (default: the page's
+      critical badges, pH >= 5.8 and peNDF >= 15 %);
+    - keep grain within the lot's tolerance, 0.5 % of body weight on
+      arrival plus adapt_pct_bw per day (the grain-tolerance reference in
+      ted_lecture_rum.py);
+    - drop pH by no more than max_ph_drop from the day before, so the
+      rumen has time to adapt.
+
+Search: a DP over days on the blend grid, for every lot at once. A level j
+can follow day d-1 if some level i <= j reached on day d-1 has
+ph[i] <= ph[j] + max_ph_drop. That is one running minimum of pH over the
+reached levels, so a day costs O(lots x levels). The first day the target
+level is reached is the fewest-days plan, and the path is read back from
+the stored reachable sets. Each lot's blend grid is scored with one
+rumen_engine.evaluate() call.
+
+A target that fails `limits` itself (the page's feedlot scenario runs at
+pH 4.5 in the engine) cannot be reached. Such lots get status
+'target_infeasible' and a plan to the highest blend that can be held.
+"""
+
+import numpy as np
+
+import ration_optimizer
+import rumen_engine
+
+# loadScenario() rations in ted_lecture_rum.py slider order (hay, alf, dry, wet, sbm, fat)
+FEEDLOT = np.array([1, 0, 0, 9, 0.5, 0], dtype=float)
+RECEIVING = np.array([6, 3, 1, 0, 0.8, 0], dtype=float)
+
+GRAIN_START_PCT_BW = 0.5    # grain tolerance on arrival, % of body weight
+ADAPT_PCT_BW = 0.1          # daily rise in grain tolerance, % of body weight
+MAX_PH_DROP = 0.1           # largest day-to-day fall in rumen pH
+STATUS = ("reached", "target_infeasible", "not_reached")
+
+
+def step_limits(ph_min=5.8, pendf_min=15.0):
+    """Daily ration limits; defaults are the critical pH and peNDF badges of the page."""
+    return ration_optimizer.make_limits(ph_min=ph_min, cp_min=None, pendf_min=pendf_min, fat_max=None)
+
+
+def plan_step_up(body_weight, target=None, receiving=None, limits=None, levels=200, max_days=60,
+                 grain_start_pct_bw=GRAIN_START_PCT_BW, adapt_pct_bw=ADAPT_PCT_BW,
+                 max_ph_drop=MAX_PH_DROP, library=None, lot_block=2048):
+    """
+    Fewest-days step-up for L lots. body_weight is (L,) kg; target and
+    receiving are (feeds,) or (L x feeds) kg DM. Returns:
+        days    - (L,) days to the target (or to the highest holdable
+                  blend when the target cannot be reached)
+        status  - (L,) index into STATUS
+        blend   - (L x max_days+1) target share t for day 0..max_days,
+                  held at the final level after it is reached
+        ph, peNDF, grain_pct_bw - (L x max_days+1) along the plan
+    Day 0 is the receiving ration. rations(plan, lot) gives the kg.
+    """
+    library = rumen_engine.LIBRARY if library is None else library
+    limits = step_limits() if limits is None else limits
+    bw = np.atleast_1d(np.asarray(body_weight, dtype=float))
+    n_lots, n_feeds = len(bw), len(library)
+    target = np.broadcast_to(np.asarray(FEEDLOT if target is None else target, dtype=float), (n_lots, n_feeds))
+    receiving = np.broadcast_to(np.asarray(RECEIVING if receiving is None else receiving, dtype=float),
+                                (n_lots, n_feeds))
+    t = np.linspace(0.0, 1.0, levels + 1)
+    grain = library.column("grain")
+    cap = grain_start_pct_bw + adapt_pct_bw * np.arange(max_days + 1)
+
+    out = {"days": np.zeros(n_lots, dtype=np.int64), "status": np.zeros(n_lots, dtype=np.int8),
+           "blend": np.zeros((n_lots, max_days + 1))}
+    for key in ("ph", "peNDF", "grain_pct_bw"):
+        out[key] = np.zeros((n_lots, max_days + 1))
+    out["target"], out["receiving"] = np.array(target), np.array(receiving)
+
+    for start in range(0, n_lots, lot_block):
+        lots = np.arange(start, min(n_lots, start + lot_block))
+        n = len(lots)
+
+        # 1. Score every blend level of every lot in one call
+        x = (receiving[lots, None, :] * (1 - t)[None, :, None] + target[lots, None, :] * t[None, :, None])
+        res = rumen_engine.evaluate(x.reshape(-1, n_feeds), library, body_weight=np.repeat(bw[lots], levels + 1))
+        ph = res["ph"].reshape(n, -1)
+        ok = ration_optimizer.feasible_mask(res, limits).reshape(n, -1)
+        grain_pct = (x @ grain) / bw[lots, None] * 100
+
+        # 2. DP over days: reach[d] = levels that can be fed on day d
+        reach = np.zeros((max_days + 1, n, levels + 1), dtype=bool)
+        reach[0, :, 0] = True
+        for d in range(1, max_days + 1):
+            lowest = np.minimum.accumulate(np.where(reach[d - 1], ph, np.inf), axis=1)
+            reach[d] = (lowest <= ph + max_ph_drop) & ok & (grain_pct <= cap[d])
+
+        # 3. Goal per lot: the target level, else the highest level ever reached
+        ever = reach.any(axis=0)
+        goal = np.where(ever[:, -1], levels, levels - np.argmax(ever[:, ::-1], axis=1))
+        days = np.argmax(reach[:, np.arange(n), goal], axis=0)
+        status = np.where(goal == levels, STATUS.index("reached"),
+                          np.where(ok[:, -1], STATUS.index("not_reached"), STATUS.index("target_infeasible")))
+
+        # 4. Walk back from the goal: on each earlier day take the highest level that leads to it
+        path = np.repeat(goal[:, None], max_days + 1, axis=1)
+        idx = np.arange(levels + 1)
+        for d in range(max_days, 0, -1):
+            active = d <= days
+            j = path[:, d]
+            ph_j = ph[np.arange(n), j]
+            parent = reach[d - 1] & (idx[None, :] <= j[:, None]) & (ph <= ph_j[:, None] + max_ph_drop)
+            prev = levels - np.argmax(parent[:, ::-1], axis=1)
+            path[:, d - 1] = np.where(active, prev, j)
+
+        rows = np.arange(n)[:, None]
+        out["days"][lots] = days
+        out["status"][lots] = status
+        out["blend"][lots] = t[path]
+        out["ph"][lots] = ph[rows, path]
+        out["peNDF"][lots] = res["peNDF"].reshape(n, -1)[rows, path]
+        out["grain_pct_bw"][lots] = grain_pct[rows, path]
+    return out
+
+
+def rations(plan, lot=0):
+    """Day-by-day kg DM (days+1 x feeds) for one lot of a plan_step_up() result."""
+    t = plan["blend"][lot, :plan["days"][lot] + 1, None]
+    return (1 - t) * plan["receiving"][lot] + t * plan["target"][lot]
+
+
+if __name__ == "__main__":
+    import time
+
+    # Incoming lots: 5,000 groups of 250-450 kg calves, half headed to a finisher that
+    # holds pH >= 5.8 and half to the page's feedlot scenario
+    rng = np.random.default_rng(0)
+    n_lots = 5000
+    bw = rng.uniform(250, 450, n_lots)
+    finisher = np.array([4, 1.5, 2.5, 3, 1.2, 0.2])
+    targets = np.where((np.arange(n_lots) % 2 == 0)[:, None], finisher, FEEDLOT)
+
+    t0 = time.perf_counter()
+    plan = plan_step_up(bw, targets)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Grain step-up plans for {n_lots:,} lots ({elapsed:.2f} s)")
+    print("=" * 70)
+    counts = np.bincount(plan["status"], minlength=len(STATUS))
+    print("  " + " | ".join(f"{name} {c:,}" for name, c in zip(STATUS, counts)))
+    reached = plan["status"] == 0
+    print(f"  days to finisher: median {np.median(plan['days'][reached]):.0f}, "
+          f"range {plan['days'][reached].min()}-{plan['days'][reached].max()}")
+    stuck = plan["status"] == STATUS.index("target_infeasible")
+    if stuck.any():
+        print(f"  feedlot target (pH {rumen_engine.evaluate(FEEDLOT)['ph'][0]:.2f}) fails the limits; "
+              f"highest holdable blend {plan['blend'][stuck, -1].mean()*100:.0f}% on average")
+
+    lot = int(np.flatnonzero(reached)[0])
+    print(f"\nLot {lot}: {bw[lot]:.0f} kg, {plan['days'][lot]} days")
+    print(f"{'Day':>4}{'blend':>7}{'pH':>6}{'peNDF':>7}{'grain %BW':>11}   kg DM (hay alf dry wet sbm fat)")
+    for d, kg in enumerate(rations(plan, lot)):
+        print(f"{d:>4}{plan['blend'][lot, d]*100:>6.0f}%{plan['ph'][lot, d]:>6.2f}{plan['peNDF'][lot, d]:>7.1f}"
+              f"{plan['grain_pct_bw'][lot, d]:>11.2f}   " + " ".join(f"{v:4.1f}" for v in kg))
+    print("=" * 70)
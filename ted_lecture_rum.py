@@ -34,10 +34,18 @@ Version: 2.0 (Validated January 2026)
 Author: Ruminant Nutrition Systems
 """
 
+import json
 import webbrowser
 import os
 
-def create_integrated_rumen_simulation():
+import feed_library
+import page_worker
+
+# Slider order in the page; the library may hold any number of other feeds
+SLIDER_FEEDS = ("hay", "alf", "dry", "wet", "sbm", "fat")
+
+def create_integrated_rumen_simulation(library_path=feed_library.INTEGRATED):
+    library = feed_library.load_feed_library(library_path).subset(SLIDER_FEEDS)
     html_content = """
 <!DOCTYPE html>
 <html lang="en">
@@ -245,7 +253,7 @@ def create_integrated_rumen_simulation():
                     <span class="tag">65% NDF</span> <span class="tag">Slow K<sub>d</sub></span>
                     Base forage, high peNDF.
                 </div>
-                <input type="range" id="hay" min="0" max="15" step="0.5" value="0" oninput="update()">
+                <input type="range" id="hay" min="0" max="15" step="0.5" value="0" oninput="schedule(update)">
             </div>
 
             <!-- Alfalfa -->
@@ -258,7 +266,7 @@ def create_integrated_rumen_simulation():
                     <span class="tag">17% CP</span> <span class="tag">Buffer</span>
                     High cation capacity, buffers pH.
                 </div>
-                <input type="range" id="alf" min="0" max="10" step="0.5" value="0" oninput="update()">
+                <input type="range" id="alf" min="0" max="10" step="0.5" value="0" oninput="schedule(update)">
             </div>
 
             <!-- Dry Corn -->
@@ -271,7 +279,7 @@ def create_integrated_rumen_simulation():
                     <span class="tag">70% Starch</span> <span class="tag">K<sub>d</sub> 0.15</span>
                     Moderate fermentation rate.
                 </div>
-                <input type="range" id="dry" min="0" max="12" step="0.5" value="0" oninput="update()">
+                <input type="range" id="dry" min="0" max="12" step="0.5" value="0" oninput="schedule(update)">
             </div>
 
             <!-- Steam Flaked Corn -->
@@ -284,7 +292,7 @@ def create_integrated_rumen_simulation():
                     <span class="tag">75% Starch</span> <span class="tag">K<sub>d</sub> 0.40</span>
                     Rapid acid production. Acidosis risk.
                 </div>
-                <input type="range" id="wet" min="0" max="12" step="0.5" value="0" oninput="update()">
+                <input type="range" id="wet" min="0" max="12" step="0.5" value="0" oninput="schedule(update)">
             </div>
 
             <!-- Soybean Meal -->
@@ -297,7 +305,7 @@ def create_integrated_rumen_simulation():
                     <span class="tag">48% CP</span> <span class="tag">RDP</span>
                     Critical N source for microbes.
                 </div>
-                <input type="range" id="sbm" min="0" max="5" step="0.1" value="0" oninput="update()">
+                <input type="range" id="sbm" min="0" max="5" step="0.1" value="0" oninput="schedule(update)">
             </div>
 
             <!-- Fat -->
@@ -310,7 +318,20 @@ def create_integrated_rumen_simulation():
                     <span class="tag">100% Fat</span> <span class="tag">Inhibitor</span>
                     Energy dense. Inhibits methanogens.
                 </div>
-                <input type="range" id="fat" min="0" max="1.5" step="0.1" value="0" oninput="update()">
+                <input type="range" id="fat" min="0" max="1.5" step="0.1" value="0" oninput="schedule(update)">
+            </div>
+
+            <!-- Body Weight -->
+            <div class="feed-row">
+                <div class="feed-header">
+                    <span class="feed-name">Body Weight</span>
+                    <span class="feed-val" id="v_bw">600 kg</span>
+                </div>
+                <div class="feed-meta">
+                    <span class="tag">Passage K<sub>p</sub></span>
+                    Intake as % of BW sets passage rate.
+                </div>
+                <input type="range" id="bw" min="250" max="800" step="10" value="600" oninput="schedule(update)">
             </div>
         </div>
 
@@ -472,83 +493,90 @@ def create_integrated_rumen_simulation():
 
 </div>
 
-<script>
+<script id="model-core">
+    // Model core - pure math, no DOM. Runs in the compute worker (page_worker.py) and, as a
+    // fallback, on the page. Row in: kg DM of the slider feeds, then body weight (kg);
+    // row out: RUMEN_OUT fields.
     // Feed Database - Validated parameter ranges from literature
-    // ge: Mcal/kg GE, ndf/starch/fat/cp: % DM, kd: rate/h, pe: physical effectiveness (Mertens 1997)
-    const feeds = {
-        // Forage values from NRC (2001) Dairy, CNCPS Feed Library
-        hay: { ge: 4.4, cp: 7,  ndf: 65, starch: 1,  fat: 2.0, kd: 0.04, pe: 1.0 },  // Mature grass hay
-        alf: { ge: 4.5, cp: 17, ndf: 42, starch: 2,  fat: 2.5, kd: 0.06, pe: 0.85 }, // Mid-bloom alfalfa
-        
-        // Grain processing effects on starch kd (Owens et al. 1997)
-        dry: { ge: 4.5, cp: 9,  ndf: 9,  starch: 70, fat: 4.0, kd: 0.15, pe: 0.1 },  // Dry rolled corn
-        wet: { ge: 4.6, cp: 9,  ndf: 8,  starch: 75, fat: 4.0, kd: 0.40, pe: 0.05 }, // Steam flaked (high availability)
-        
-        // Protein supplement
-        sbm: { ge: 4.7, cp: 48, ndf: 12, starch: 2,  fat: 1.5, kd: 0.10, pe: 0.0 },  // 48% CP soybean meal
-        
-        // Fat supplement (inhibits methanogens via biohydrogenation)
-        fat: { ge: 9.4, cp: 0,  ndf: 0,  starch: 0,  fat: 100, kd: 0.00, pe: 0.0 }   // Protected fat
-    };
-
-    let chart;
+    // Columnar table injected from feeds/integrated.csv (NRC 2001 Dairy, CNCPS Feed Library, Owens et al. 1997)
+    // ge: Mcal/kg GE, ndf/starch/fat/cp: % DM, rdp: % of CP, kd: rate/h, pe: physical effectiveness (Mertens 1997)
+    // forage/grain/buffer: 0/1 flags for forage %, grain starch kd and cation buffering
+    const FEED_LIB = __FEED_LIBRARY__;
+    const feeds = {};
+    FEED_LIB.names.forEach((k, i) => {
+        feeds[k] = {};
+        FEED_LIB.attributes.forEach((attr, j) => feeds[k][attr] = FEED_LIB.matrix[i][j]);
+    });
 
-    function loadScenario(type) {
-        // Scenarios based on typical feeding systems
-        if(type === 'balanced') setVals(5, 4, 2, 2, 1.5, 0);      // Balanced dairy TMR
-        else if(type === 'feedlot') setVals(1, 0, 0, 9, 0.5, 0);  // High-energy finishing
-        else if(type === 'acidosis') setVals(0.5, 0, 0, 10, 0, 0);// Acute risk scenario
-        else if(type === 'methane_mitigation') setVals(6, 2, 2, 0, 1, 0.6); // Fat supplementation
+    // Diet composition: every attribute as a DM-weighted mean in one pass over the nutrient matrix
+    function dietComposition(x, dm) {
+        const diet = {};
+        FEED_LIB.attributes.forEach((attr, j) => {
+            let total = 0;
+            for(let i = 0; i < x.length; i++) total += x[i] * FEED_LIB.matrix[i][j];
+            diet[attr] = total / dm;
+        });
+        return diet;
     }
 
-    function setVals(h, a, d, w, s, f) {
-        document.getElementById('hay').value = h;
-        document.getElementById('alf').value = a;
-        document.getElementById('dry').value = d;
-        document.getElementById('wet').value = w;
-        document.getElementById('sbm').value = s;
-        document.getElementById('fat').value = f;
-        update();
+    const RUMEN_IN = FEED_LIB.names.length + 1;
+    const RUMEN_OUT = ['dm', 'cp', 'fat_pct', 'ndf', 'starch', 'total_ge', 'peNDF', 'ph', 'fiber_health',
+                       'forage_pct', 'Ym', 'energy_methane', 'energy_urine', 'energy_digestible', 'energy_fecal',
+                       'energy_me', 'intake_pct_bw', 'kp_forage', 'kp_concentrate', 'starch_digestibility',
+                       'ndf_digestibility', 'acetate', 'propionate', 'butyrate', 'total_vfa', 'ap_ratio', 'mcp',
+                       'n_intake', 'rdn', 'microbial_n', 'rumen_n_balance', 'metabolizable_protein',
+                       // Finding slots: the number each finding reports, NaN when not triggered
+                       'f_nitrogen', 'f_acute', 'f_sara', 'f_marginal', 'f_lipid', 'f_methanogen', 'f_paradox'];
+
+    // Murphy et al. (1982) share of fermented hexose to [acetate, propionate, butyrate];
+    // rows: starch, NDF (mean of cellulose and hemicellulose)
+    const VFA_ROUGHAGE = [[0.59, 0.14, 0.20], [0.615, 0.135, 0.195]];
+    const VFA_CONCENTRATE = [[0.40, 0.30, 0.20], [0.675, 0.16, 0.09]];
+    const VFA_PER_HEXOSE = [2, 2, 1];
+    const HEXOSE_KG_PER_MOL = 0.162;
+
+    // CNCPS microbial yield (Russell et al. 1992): g cells per g CHO fermented at rate kd
+    const YG_MICROBIAL = 0.4, KM_NFC = 0.15, KM_FC = 0.05;
+    function microbialYield(kd, km) {
+        return kd > 0 ? 1 / (km / kd + 1 / YG_MICROBIAL) : 0;
     }
 
-    function update() {
-        // 1. Retrieve Inputs
-        let h = +hay.value, a = +alf.value, d = +dry.value, w = +wet.value, s = +sbm.value, f = +fat.value;
-        
-        // Update display values
-        v_hay.innerText = h.toFixed(1); v_alf.innerText = a.toFixed(1); 
-        v_dry.innerText = d.toFixed(1); v_wet.innerText = w.toFixed(1); 
-        v_sbm.innerText = s.toFixed(1); v_fat.innerText = f.toFixed(1);
+    // Digestible energy from the digested fractions: GE of starch and NDF (Mcal/kg),
+    // intestinal share of escaping starch (Owens et al. 1986) and NDF, and the
+    // apparent digestibility of the remaining GE (protein, fat, sugars)
+    const CARBOHYDRATE_GE = 4.2, POSTRUMINAL_STARCH = 0.75, HINDGUT_NDF = 0.10, OTHER_DIGESTIBILITY = 0.70;
 
-        let dm = h + a + d + w + s + f;
-        if(dm <= 0) return;
+    function rumenRow(input, i, out, o) {
+        const x = Array.from(input.subarray(i, i + RUMEN_IN - 1));
+        const body_weight = input[i + RUMEN_IN - 1];
+        const slot = {};
+        let dm = 0;
+        x.forEach(kg => dm += kg);
 
         // 2. Calculate Weighted Diet Composition
-        function chem(attr) {
-            return ((h*feeds.hay[attr]) + (a*feeds.alf[attr]) + (d*feeds.dry[attr]) + 
-                    (w*feeds.wet[attr]) + (s*feeds.sbm[attr]) + (f*feeds.fat[attr])) / dm;
-        }
+        const diet = dietComposition(x, dm);
 
-        let cp = chem('cp');
-        let fat_pct = chem('fat');
-        let ndf = chem('ndf');
-        let starch = chem('starch');
-        let total_ge = chem('ge') * dm; // Total Mcal GE
+        let cp = diet.cp;
+        let fat_pct = diet.fat;
+        let ndf = diet.ndf;
+        let starch = diet.starch;
+        let total_ge = diet.ge * dm; // Total Mcal GE
 
         // 3. Rumen pH Model (CNCPS Framework - Fox et al. 2004)
         
         // 3a. Acid Load from Starch Fermentation
-        // Weighted average starch kd (higher kd = more rapid acid production)
-        let total_starch = d*feeds.dry.starch + w*feeds.wet.starch;
-        let starch_kd = total_starch > 0 ? 
-            (d*feeds.dry.starch*feeds.dry.kd + w*feeds.wet.starch*feeds.wet.kd) / total_starch : 0.10;
-        
+        // Weighted average grain starch kd (higher kd = more rapid acid production)
         // 3b. Physically Effective NDF (Mertens 1997, 2002)
         // Only forages contribute significantly to peNDF due to particle size
-        let peNDF = ((h*feeds.hay.ndf*feeds.hay.pe) + 
-                     (a*feeds.alf.ndf*feeds.alf.pe) + 
-                     (d*feeds.dry.ndf*feeds.dry.pe) + 
-                     (w*feeds.wet.ndf*feeds.wet.pe)) / dm;
+        let total_starch = 0, starch_kd_sum = 0, pendf_sum = 0;
+        x.forEach((kg, i) => {
+            const feed = feeds[FEED_LIB.names[i]];
+            total_starch += kg * feed.starch * feed.grain;
+            starch_kd_sum += kg * feed.starch * feed.grain * feed.kd;
+            pendf_sum += kg * feed.ndf * feed.pe;
+        });
+        let starch_kd = total_starch > 0 ? starch_kd_sum / total_starch : 0.10;
+        let peNDF = pendf_sum / dm;
         
         // 3c. pH Calculation
         // Base pH for moderate forage diet
@@ -560,7 +588,7 @@ def create_integrated_rumen_simulation():
         
         // Buffering from peNDF (stimulates chewing, saliva flow)
         // Alfalfa provides additional buffering via cations (K, Ca, Mg)
-        let buffer_capacity = (peNDF/100) * 2.0 + (a/dm) * 0.25;
+        let buffer_capacity = (peNDF/100) * 2.0 + diet.buffer * 0.25;
         
         let ph = base_ph - acid_load + buffer_capacity;
         
@@ -570,18 +598,13 @@ def create_integrated_rumen_simulation():
 
         // 4. Associative Effects on Fiber Digestion (CNCPS Logic)
         let fiber_health = 1.0; 
-        let findings = [];
 
         // 4a. Nitrogen Limitation (CP < 8% - CNCPS)
         // Microbial cellulolytic bacteria require adequate N for growth
         if(cp < 8.0) {
             let penalty = Math.min((8.0 - cp) * 0.12, 0.7); // Max 70% reduction
             fiber_health -= penalty;
-            findings.push({ 
-                type: 'f-crit', 
-                title: 'Nitrogen Deficiency', 
-                text: `CP ${cp.toFixed(1)}% below 8% threshold. Microbial protein synthesis limited. Fiber digestion reduced ${(penalty*100).toFixed(0)}%. [Ref 2,3]`
-            });
+            slot.f_nitrogen = penalty;
         }
 
         // 4b. pH Effect on Cellulolytic Bacteria
@@ -592,27 +615,15 @@ def create_integrated_rumen_simulation():
             if(ph < 5.6) {
                 // Acute acidosis range - severe inhibition
                 penalty = 0.85;
-                findings.push({ 
-                    type: 'f-crit', 
-                    title: 'Acute Acidosis', 
-                    text: `pH ${ph.toFixed(2)} in acute range (<5.6). Cellulolytic bacteria severely inhibited. Fiber digestion nearly ceased. [Ref 1,6]`
-                });
+                slot.f_acute = penalty;
             } else if(ph < 5.8) {
                 // SARA range
                 penalty = (6.0 - ph) * 0.6;
-                findings.push({ 
-                    type: 'f-warn', 
-                    title: 'Sub-Acute Ruminal Acidosis (SARA)', 
-                    text: `pH ${ph.toFixed(2)} below SARA threshold (5.8). Fiber-degrading bacteria inhibited ${(penalty*100).toFixed(0)}%. [Ref 6]`
-                });
+                slot.f_sara = penalty;
             } else {
                 // Marginal range (5.8-6.2)
                 penalty = (6.2 - ph) * 0.3;
-                findings.push({ 
-                    type: 'f-warn', 
-                    title: 'Marginal pH Suppression', 
-                    text: `pH ${ph.toFixed(2)} below optimal (6.2-6.8). Fiber digestion moderately reduced ${(penalty*100).toFixed(0)}%. [Ref 1]`
-                });
+                slot.f_marginal = penalty;
             }
             fiber_health -= penalty;
         }
@@ -622,12 +633,7 @@ def create_integrated_rumen_simulation():
         if(fat_pct > 6.0) {
             let penalty = Math.min((fat_pct - 6.0) * 0.15, 0.6);
             fiber_health -= penalty;
-            let severity = fat_pct > 8.0 ? 'f-crit' : 'f-warn';
-            findings.push({ 
-                type: severity, 
-                title: 'Lipid Interference', 
-                text: `Fat ${fat_pct.toFixed(1)}% exceeds safe limit (6%). Coating fiber, inhibiting protozoa. Digestion reduced ${(penalty*100).toFixed(0)}%. [Ref 2,3]`
-            });
+            slot.f_lipid = penalty;
         }
 
         // Ensure non-negative
@@ -637,7 +643,7 @@ def create_integrated_rumen_simulation():
         
         // 5a. Baseline Ym based on diet type (IPCC 2019) [Ref 5]
         let Ym;
-        let forage_pct = ((h + a) / dm) * 100;
+        let forage_pct = diet.forage * 100;
         
         if(forage_pct > 80) {
             // High forage - IPCC default
@@ -661,31 +667,19 @@ def create_integrated_rumen_simulation():
         if(fat_pct > 3.0) {
             let fat_reduction = (fat_pct - 3.0) * 0.006;
             Ym -= fat_reduction;
-            if(fat_pct > 4.5) {
-                findings.push({ 
-                    type: 'f-info', 
-                    title: 'Methanogen Inhibition', 
-                    text: `Dietary fat ${fat_pct.toFixed(1)}% suppressing methanogens via biohydrogenation. Ym reduced ${(fat_reduction*100).toFixed(1)}% of GE. [Ref 5,8]`
-                });
-            }
+            if(fat_pct > 4.5) slot.f_methanogen = fat_reduction;
         }
         
         // 5d. The Acidosis Paradox [Ref 8]
         // Low pH kills methanogens but also compromises overall rumen function
         if(ph < 5.8) {
-            let original_ym = Ym;
+            slot.f_paradox = Ym;
             Ym *= 0.55; // ~45% reduction in methanogen activity
-            findings.push({ 
-                type: 'f-info', 
-                title: 'Acidosis-Methanogen Paradox', 
-                text: `Severe acidosis inhibiting methanogens. CH₄ reduced from ${(original_ym*100).toFixed(2)}% to ${(Ym*100).toFixed(2)}% of GE, but rumen health critically compromised. [Ref 8]`
-            });
         }
         
         // 5e. Passage Rate Effect (rapid passage = less fermentation time)
         // High DMI increases passage rate, reducing retention time
-        // Assuming 600 kg animal
-        let intake_pct_bw = (dm / 600) * 100;
+        let intake_pct_bw = (dm / body_weight) * 100;
         if(intake_pct_bw > 2.5) {
             Ym *= 0.92; // Modest reduction
         }
@@ -693,6 +687,29 @@ def create_integrated_rumen_simulation():
         // Floor for Ym
         if(Ym < 0.015) Ym = 0.015; // Minimum 1.5%
 
+        // 5f. Passage vs Fermentation (NRC 2001 eq. 3-6b/3-6c; Waldo et al. 1972)
+        // Particle kp rises with intake % BW; each feed is digested in the rumen
+        // at kd/(kd+kp), with the forage or concentrate kp of its class
+        let concentrate_pct = 100 - forage_pct;
+        let kp_forage = (3.362 + 0.479*intake_pct_bw - 0.007*concentrate_pct - 0.017*ndf) / 100;
+        let kp_concentrate = (2.904 + 1.375*intake_pct_bw - 0.020*concentrate_pct) / 100;
+        let starch_sum = 0, starch_digested = 0, ndf_sum = 0, ndf_digested = 0;
+        let cells_starch = 0, cells_ndf = 0, rdp_sum = 0;
+        x.forEach((kg, i) => {
+            const feed = feeds[FEED_LIB.names[i]];
+            const kp = feed.forage > 0 ? kp_forage : kp_concentrate;
+            const digested = kg * feed.kd / (feed.kd + kp);
+            starch_sum += kg * feed.starch;
+            starch_digested += digested * feed.starch;
+            ndf_sum += kg * feed.ndf;
+            ndf_digested += digested * feed.ndf;
+            cells_starch += digested * feed.starch * microbialYield(feed.kd, KM_NFC);
+            cells_ndf += digested * feed.ndf * microbialYield(feed.kd, KM_FC);
+            rdp_sum += kg * feed.cp * feed.rdp / 100;
+        });
+        let starch_digestibility = starch_sum > 0 ? starch_digested / starch_sum : NaN;
+        let ndf_digestibility = ndf_sum > 0 ? ndf_digested / ndf_sum : NaN;
+
         // 6. Energy Partitioning Calculations
         
         // 6a. Methane Energy Loss
@@ -702,18 +719,163 @@ def create_integrated_rumen_simulation():
         let energy_urine = total_ge * 0.04;
         
         // 6c. Digestible Energy
-        // Base digestibility depends on fiber vs starch content
-        let base_digestibility = 0.65 + (starch/100) * 0.20 - (ndf/100) * 0.15;
-        
+        // Starch and NDF fermented in the rumen at kd/(kd+kp), the intestinal share of
+        // what escapes, and the rest of GE at a fixed digestibility
+        let starch_kg = starch_sum / 100, ndf_kg = ndf_sum / 100;
+        let starch_rumen = starch_digested / 100, ndf_rumen = ndf_digested / 100;
+        let digestible_ge = CARBOHYDRATE_GE * (starch_rumen + POSTRUMINAL_STARCH * (starch_kg - starch_rumen)
+                                               + ndf_rumen + HINDGUT_NDF * (ndf_kg - ndf_rumen))
+                          + OTHER_DIGESTIBILITY * Math.max(total_ge - CARBOHYDRATE_GE * (starch_kg + ndf_kg), 0);
+
         // Apply associative effects (fiber_health penalty)
-        let realized_digestibility = base_digestibility * fiber_health;
-        
-        let energy_digestible = total_ge * realized_digestibility;
+        let energy_digestible = digestible_ge * fiber_health;
         let energy_fecal = total_ge - energy_digestible;
         
         // 6d. Metabolizable Energy (DE - CH4 - Urine)
         let energy_me = energy_digestible - energy_methane - energy_urine;
+
+        // 7. Fermentation End-Products (Murphy et al. 1982)
+        // Fiber fermentation carries the fiber_health penalties; the hexose
+        // partition moves from the concentrate to the roughage pattern with forage %
+        let starch_fermented = starch_digested / 100;
+        let ndf_fermented = ndf_digested / 100 * fiber_health;
+        let w = forage_pct / 100;
+        const [acetate, propionate, butyrate] = VFA_PER_HEXOSE.map((mol, k) =>
+            (starch_fermented * (w * VFA_ROUGHAGE[0][k] + (1 - w) * VFA_CONCENTRATE[0][k]) +
+             ndf_fermented * (w * VFA_ROUGHAGE[1][k] + (1 - w) * VFA_CONCENTRATE[1][k])) * mol / HEXOSE_KG_PER_MOL);
+        let total_vfa = acetate + propionate + butyrate;
+        let ap_ratio = propionate > 0 ? acetate / propionate : NaN;
+
+        // 8. Microbial Protein and N Balance (CNCPS - Russell et al. 1992)
+        // Yield drops 2.5% per unit of peNDF below 20%; growth is capped by rumen-degradable N
+        let pendf_factor = Math.max(1 - 0.025 * Math.max(20 - peNDF, 0), 0);
+        let microbial_dm = (cells_starch + cells_ndf * fiber_health) / 100 * pendf_factor;
+        let microbial_n_energy = microbial_dm * 0.625 * 1000 / 6.25;
+        let n_intake = cp * dm * 10 / 6.25;                 // g N/day
+        let rdp = rdp_sum / 100;                            // kg RDP/day
+        let rdn = rdp * 1000 / 6.25;
+        let microbial_n = Math.min(microbial_n_energy, rdn);
+        let rumen_n_balance = rdn - microbial_n_energy;     // < 0: N limits microbial growth
+        let mcp = microbial_n * 6.25;                       // g microbial CP/day
+        let rup = (cp * dm / 100 - rdp) * 1000;
+        let metabolizable_protein = 0.64 * mcp + 0.8 * rup; // NRC (2000) beef
+
+        const row = { dm, cp, fat_pct, ndf, starch, total_ge, peNDF, ph, fiber_health, forage_pct, Ym,
+                      energy_methane, energy_urine, energy_digestible, energy_fecal, energy_me,
+                      intake_pct_bw, kp_forage, kp_concentrate, starch_digestibility, ndf_digestibility,
+                      acetate, propionate, butyrate, total_vfa, ap_ratio, mcp, n_intake, rdn, microbial_n,
+                      rumen_n_balance, metabolizable_protein };
+        RUMEN_OUT.forEach((name, j) => out[o + j] = name in row ? row[name] : (name in slot ? slot[name] : NaN));
+    }
+</script>
+
+<script>
+__COMPUTE_LAYER__
+    const compute = createCompute(rumenRow, RUMEN_IN, RUMEN_OUT.length);
+
+    let chart;
+
+    function loadScenario(type) {
+        // Scenarios based on typical feeding systems
+        if(type === 'balanced') setVals(5, 4, 2, 2, 1.5, 0);      // Balanced dairy TMR
+        else if(type === 'feedlot') setVals(1, 0, 0, 9, 0.5, 0);  // High-energy finishing
+        else if(type === 'acidosis') setVals(0.5, 0, 0, 10, 0, 0);// Acute risk scenario
+        else if(type === 'methane_mitigation') setVals(6, 2, 2, 0, 1, 0.6); // Fat supplementation
+    }
+
+    function setVals(h, a, d, w, s, f) {
+        document.getElementById('hay').value = h;
+        document.getElementById('alf').value = a;
+        document.getElementById('dry').value = d;
+        document.getElementById('wet').value = w;
+        document.getElementById('sbm').value = s;
+        document.getElementById('fat').value = f;
+        update();
+    }
+
+    function update() {
+        // 1. Retrieve Inputs
+        let h = +hay.value, a = +alf.value, d = +dry.value, w = +wet.value, s = +sbm.value, f = +fat.value;
+        let body_weight = +bw.value;
         
+        // Update display values
+        v_hay.innerText = h.toFixed(1); v_alf.innerText = a.toFixed(1); 
+        v_dry.innerText = d.toFixed(1); v_wet.innerText = w.toFixed(1); 
+        v_sbm.innerText = s.toFixed(1); v_fat.innerText = f.toFixed(1);
+        v_bw.innerText = body_weight.toFixed(0) + ' kg';
+
+        let dm = h + a + d + w + s + f;
+        if(dm <= 0) return;
+
+        // 2-6. Model runs in the compute worker; render when the result arrives
+        compute.run(Float64Array.of(h, a, d, w, s, f, body_weight)).then(out => {
+            if(out) render(outputRow(RUMEN_OUT, out));
+        });
+    }
+
+    function render(m) {
+        const { dm, cp, fat_pct, ndf, starch, total_ge, peNDF, ph, fiber_health, forage_pct, Ym,
+                energy_methane, energy_urine, energy_fecal, energy_me, intake_pct_bw, kp_forage, kp_concentrate,
+                starch_digestibility, ndf_digestibility, acetate, propionate, butyrate, total_vfa, ap_ratio,
+                mcp, rdn, rumen_n_balance, metabolizable_protein } = m;
+        const pct = v => isNaN(v) ? '-' : (v*100).toFixed(0) + '%';
+
+        // Findings from the core's slots [Refs as in the model comments]
+        let findings = [];
+        if(!isNaN(m.f_nitrogen)) {
+            findings.push({ 
+                type: 'f-crit', 
+                title: 'Nitrogen Deficiency', 
+                text: `CP ${cp.toFixed(1)}% below 8% threshold. Microbial protein synthesis limited. Fiber digestion reduced ${(m.f_nitrogen*100).toFixed(0)}%. [Ref 2,3]`
+            });
+        } else if(rumen_n_balance < 0) {
+            findings.push({
+                type: 'f-warn',
+                title: 'Rumen N Deficit',
+                text: `Degradable N (${rdn.toFixed(0)} g/d) falls ${(-rumen_n_balance).toFixed(0)} g N/d short of microbial demand. Microbial CP capped at ${mcp.toFixed(0)} g/d. [Ref 2]`
+            });
+        }
+        if(!isNaN(m.f_acute)) {
+            findings.push({ 
+                type: 'f-crit', 
+                title: 'Acute Acidosis', 
+                text: `pH ${ph.toFixed(2)} in acute range (<5.6). Cellulolytic bacteria severely inhibited. Fiber digestion nearly ceased. [Ref 1,6]`
+            });
+        } else if(!isNaN(m.f_sara)) {
+            findings.push({ 
+                type: 'f-warn', 
+                title: 'Sub-Acute Ruminal Acidosis (SARA)', 
+                text: `pH ${ph.toFixed(2)} below SARA threshold (5.8). Fiber-degrading bacteria inhibited ${(m.f_sara*100).toFixed(0)}%. [Ref 6]`
+            });
+        } else if(!isNaN(m.f_marginal)) {
+            findings.push({ 
+                type: 'f-warn', 
+                title: 'Marginal pH Suppression', 
+                text: `pH ${ph.toFixed(2)} below optimal (6.2-6.8). Fiber digestion moderately reduced ${(m.f_marginal*100).toFixed(0)}%. [Ref 1]`
+            });
+        }
+        if(!isNaN(m.f_lipid)) {
+            findings.push({ 
+                type: fat_pct > 8.0 ? 'f-crit' : 'f-warn', 
+                title: 'Lipid Interference', 
+                text: `Fat ${fat_pct.toFixed(1)}% exceeds safe limit (6%). Coating fiber, inhibiting protozoa. Digestion reduced ${(m.f_lipid*100).toFixed(0)}%. [Ref 2,3]`
+            });
+        }
+        if(!isNaN(m.f_methanogen)) {
+            findings.push({ 
+                type: 'f-info', 
+                title: 'Methanogen Inhibition', 
+                text: `Dietary fat ${fat_pct.toFixed(1)}% suppressing methanogens via biohydrogenation. Ym reduced ${(m.f_methanogen*100).toFixed(1)}% of GE. [Ref 5,8]`
+            });
+        }
+        if(!isNaN(m.f_paradox)) {
+            findings.push({ 
+                type: 'f-info', 
+                title: 'Acidosis-Methanogen Paradox', 
+                text: `Severe acidosis inhibiting methanogens. CH₄ reduced from ${(m.f_paradox*100).toFixed(2)}% to ${(m.f_paradox*0.55*100).toFixed(2)}% of GE, but rumen health critically compromised. [Ref 8]`
+            });
+        }
+
         // 7. Update UI Metrics
         d_ph.innerText = ph.toFixed(2);
         d_cp.innerHTML = cp.toFixed(1) + '<span class="m-unit">%</span>';
@@ -758,40 +920,30 @@ def create_integrated_rumen_simulation():
         else ym_el.innerText = 'ELEVATED';
 
         // 8. Generate Diagnostic Report
-        let diag = document.getElementById('diagnostics');
-        
-        let summary = `
-            <div class="summary-box">
-                <div class="sum-item"><span class="sum-lbl">Total Intake</span><span class="sum-val">${dm.toFixed(1)} kg DM</span></div>
-                <div class="sum-item"><span class="sum-lbl">Gross Energy</span><span class="sum-val">${total_ge.toFixed(1)} Mcal</span></div>
-                <div class="sum-item"><span class="sum-lbl">Metabolizable</span><span class="sum-val">${energy_me.toFixed(1)} Mcal</span></div>
-                <div class="sum-item"><span class="sum-lbl">ME Efficiency</span><span class="sum-val">${((energy_me/total_ge)*100).toFixed(1)}%</span></div>
-            </div>
-        `;
-        
-        // Add diet characterization
-        summary += `
-            <div class="finding f-info">
-                <span class="f-title">Diet Characterization</span>
-                Forage: ${forage_pct.toFixed(0)}% | 
-                Starch: ${starch.toFixed(1)}% | 
-                NDF: ${ndf.toFixed(1)}% | 
-                peNDF: ${peNDF.toFixed(1)}% (Mertens method) | 
-                Predicted Ym: ${(Ym*100).toFixed(2)}% GE (IPCC Tier 2)
-            </div>
-        `;
-        
+        let cards = [{
+            type: 'f-info',
+            title: 'Diet Characterization',
+            text: `Forage: ${forage_pct.toFixed(0)}% | Starch: ${starch.toFixed(1)}% | NDF: ${ndf.toFixed(1)}% | peNDF: ${peNDF.toFixed(1)}% (Mertens method) | Predicted Ym: ${(Ym*100).toFixed(2)}% GE (IPCC Tier 2)`
+        }, {
+            type: 'f-info',
+            title: 'Passage & Ruminal Digestion',
+            text: `Intake: ${intake_pct_bw.toFixed(2)}% BW | K<sub>p</sub> forage ${(kp_forage*100).toFixed(1)}%/h, concentrate ${(kp_concentrate*100).toFixed(1)}%/h (NRC 2001) | Ruminal digestion K<sub>d</sub>/(K<sub>d</sub>+K<sub>p</sub>): starch ${pct(starch_digestibility)}, NDF ${pct(ndf_digestibility)}`
+        }, {
+            type: 'f-info',
+            title: 'Fermentation & Microbial Protein',
+            text: `VFA: ${total_vfa.toFixed(1)} mol/d (acetate ${pct(acetate/total_vfa)}, propionate ${pct(propionate/total_vfa)}, butyrate ${pct(butyrate/total_vfa)}) | A:P ${isNaN(ap_ratio) ? '-' : ap_ratio.toFixed(2)} | Microbial CP: ${mcp.toFixed(0)} g/d | Rumen N balance: ${rumen_n_balance.toFixed(0)} g N/d | MP: ${metabolizable_protein.toFixed(0)} g/d (CNCPS)`
+        }];
         if(findings.length === 0) {
-            summary += `<div class="finding f-opt"><span class="f-title">System Status</span>Rumen function optimal. No significant metabolic constraints detected. All parameters within normal ranges per Cornell CNCPS and IPCC guidelines.</div>`;
+            cards.push({ type: 'f-opt', title: 'System Status', text: 'Rumen function optimal. No significant metabolic constraints detected. All parameters within normal ranges per Cornell CNCPS and IPCC guidelines.' });
         } else {
-            summary += findings.map(f => `
-                <div class="finding ${f.type}">
-                    <span class="f-title">${f.title}</span>${f.text}
-                </div>
-            `).join('');
+            cards = cards.concat(findings);
         }
-        
-        diag.innerHTML = summary;
+        renderReport({
+            dm: `${dm.toFixed(1)} kg DM`,
+            ge: `${total_ge.toFixed(1)} Mcal`,
+            me: `${energy_me.toFixed(1)} Mcal`,
+            efficiency: `${((energy_me/total_ge)*100).toFixed(1)}%`
+        }, cards);
 
         // 9. Update Chart
         updateChart(energy_me, energy_methane, energy_urine, energy_fecal);
@@ -825,10 +977,56 @@ def create_integrated_rumen_simulation():
         el.innerText = text;
     }
 
+    // Diagnostics report: the summary box and finding cards are built once,
+    // later updates rewrite the summary values and patch only cards that changed
+    const SUMMARY_ITEMS = [
+        ['dm', 'Total Intake'], ['ge', 'Gross Energy'], ['me', 'Metabolizable'], ['efficiency', 'ME Efficiency']
+    ];
+    let report = null;
+
+    function renderReport(values, cards) {
+        if(!report) {
+            document.getElementById('diagnostics').innerHTML = `
+            <div class="summary-box">
+                ${SUMMARY_ITEMS.map(([key, label]) => `<div class="sum-item"><span class="sum-lbl">${label}</span><span class="sum-val" id="sum_${key}"></span></div>`).join('')}
+            </div>
+            <div id="finding_cards"></div>`;
+            report = {
+                list: document.getElementById('finding_cards'), items: new Map(),
+                paint(el, f) {
+                    el.className = 'finding ' + f.type;
+                    el.innerHTML = `<span class="f-title">${f.title}</span>${f.text}`;
+                }
+            };
+        }
+        SUMMARY_ITEMS.forEach(([key]) => {
+            const el = document.getElementById('sum_' + key);
+            if(el.innerText !== values[key]) el.innerText = values[key];
+        });
+        patchFindings(report, cards);
+    }
+
+    // Input coalescing: slider events only request a frame, and update() runs
+    // at most once per animation frame however many events arrived
+    let frameRequest = 0;
+
+    function schedule(task) {
+        if(!frameRequest) {
+            frameRequest = requestAnimationFrame(() => {
+                frameRequest = 0;
+                task();
+            });
+        }
+    }
+
+    // One chart instance for the page; later calls only swap the bar values
     function updateChart(me, methane, urine, fecal) {
+        if(chart) {
+            [me, methane, urine, fecal].forEach((value, i) => chart.data.datasets[i].data[0] = value);
+            chart.update('none');
+            return;
+        }
         const ctx = document.getElementById('mainChart').getContext('2d');
-        if(chart) chart.destroy();
-        
         chart = new Chart(ctx, {
             type: 'bar',
             data: {
@@ -905,7 +1103,8 @@ def create_integrated_rumen_simulation():
 </script>
 </body>
 </html>
-"""
+""".replace("__FEED_LIBRARY__", json.dumps(library.to_js()))
+    html_content = page_worker.inject(html_content)
     
     filename = "rumen_integrated_model_validated.html"
     with open(filename, "w", encoding='utf-8') as f:
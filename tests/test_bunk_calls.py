@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import bunk_calls
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "deliveries.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_quoted_and_spaced_fields_match_plain_log(tmp_path):
+    plain = _write(tmp_path, "pen,date,ingredient,kg\nP1,2024-01-01,grass_hay,8\nP1,2024-01-01,drc,4\n")
+    days = list(bunk_calls.rolling_metrics(plain))
+    messy = tmp_path / "messy.csv"
+    messy.write_text('pen, date, ingredient, kg\n"P1", 2024-01-01, "grass_hay", 8\nP1, 2024-01-01, drc, 4\n')
+    messy_days = list(bunk_calls.rolling_metrics(str(messy)))
+    assert len(messy_days) == 1 and list(messy_days[0]["pens"]) == ["P1"]
+    assert np.allclose(messy_days[0]["ph_3d"], days[0]["ph_3d"])
+
+
+def test_rolling_windows_match_naive_sums():
+    rng = np.random.default_rng(0)
+    windows, n_pens, n_fields = (3, 7), 4, 2
+    state = bunk_calls._RollingWindows(windows, n_fields, capacity=2)
+    history = {}
+    fed_days = sorted(rng.choice(40, size=25, replace=False))
+    for day in fed_days:
+        today = rng.uniform(0, 10, (n_pens, n_fields))
+        state.grow(n_pens)
+        state.push(int(day), today)
+        history[int(day)] = today
+        for k, w in enumerate(windows):
+            naive = sum(v for d, v in history.items() if day - w < d <= day)
+            assert np.allclose(state.sums[:n_pens, k], naive)
+
+
+@pytest.mark.parametrize("header, row, message", [
+    ("pen,date,head,ingredient,kg", "P1,2024-01-02,,drc,4", "line 4: bad head ''"),
+    ("pen,date,head,ingredient,kg", "P1,2024-01-02,20,drc,", "line 4: bad kg ''"),
+    ("pen,date,head,ingredient,kg", "P1,2024-01-02,20,drc,4kg", "line 4: bad kg '4kg'"),
+    ("pen,date,head,grass_hay,drc", "P1,2024-01-02,20,8,", "line 4: bad drc ''"),
+])
+def test_malformed_number_raises_with_its_line(tmp_path, header, row, message):
+    good = "P1,2024-01-01,20,grass_hay,8" if "ingredient" in header else "P1,2024-01-01,20,8,4"
+    path = _write(tmp_path, f"{header}\n{good}\n\n{row}\n")
+    with pytest.raises(ValueError, match=message):
+        list(bunk_calls.rolling_metrics(path, block_rows=1))
@@ -0,0 +1,59 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import heterosis
+from dyadic_composition import CompositionTable
+
+
+def _table():
+    names, breeds, P = heterosis.database_matrix()
+    table = CompositionTable(breeds)
+    return table, dict(zip(names, table.intern(P).tolist()))
+
+
+def test_equal_compositions_share_an_id():
+    table, ids = _table()
+    assert table.intern([{"Angus": Fraction(1, 2), "Hereford": 0.5}])[0] == \
+        table.cross(ids["Angus"], ids["Hereford"])[0]
+
+
+def test_crosses_stay_exact_past_float_precision():
+    table, ids = _table()
+    rotation = [ids["Angus"], ids["Hereford"], ids["Charolais"]]
+    dam = ids["Brahman"]
+    expected = table.exact(dam)
+    for g in range(60):
+        sire = rotation[g % 3]
+        h_expected = table.heterosis_exact(sire, dam)
+        dam, h = table.cross(sire, dam)
+        dam = int(dam)
+        s = table.exact(sire)
+        expected = {b: (s.get(b, 0) + expected.get(b, 0)) / 2 for b in set(s) | set(expected)}
+        assert h == pytest.approx(float(h_expected), abs=1e-15)
+    assert table.exact(dam) == {b: f for b, f in expected.items() if f}
+    assert table.exact(dam)["Brahman"] == Fraction(1, 2 ** 60)
+
+
+def test_rounded_still_sums_to_one():
+    table, ids = _table()
+    rng = np.random.default_rng(0)
+    names = list(ids)
+    dams = np.array([ids[n] for n in rng.choice(names, 300)])
+    for g in range(8):
+        sires = np.array([ids[n] for n in rng.choice(names, 300)])
+        dams, _ = table.cross(sires, dams)
+    for bits in (3, 5):
+        rounded = table.rounded(dams, bits)
+        assert (table.exponents[rounded] <= bits).all()
+        assert (table.numerators[rounded].sum(axis=1) == 1 << table.exponents[rounded]).all()
+        assert np.abs(table.fractions(rounded) - table.fractions(dams)).max() < 2.0 ** -bits
+
+
+def test_repeated_crosses_hit_the_cache():
+    table, ids = _table()
+    table.cross(ids["Angus"], ids["Hereford"])
+    misses = table.misses
+    table.cross([ids["Angus"]] * 10, [ids["Hereford"]] * 10)
+    assert table.misses == misses and table.hits > 0
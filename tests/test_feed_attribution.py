@@ -0,0 +1,36 @@
+from itertools import permutations
+
+import numpy as np
+
+import feed_attribution
+import rumen_engine
+
+RATIONS = np.array([[5, 4, 2, 2, 1.5, 0], [1, 0, 0, 9, 0.5, 0], [6, 2, 2, 0, 1, 0.6]], dtype=float)
+
+
+def test_shares_sum_to_total_minus_base():
+    for exact_max in (12, 0):   # exact and sampled
+        res = feed_attribution.shapley(RATIONS, exact_max=exact_max, n_permutations=16, seed=0)
+        for key in feed_attribution.OUTPUTS:
+            assert np.allclose(res["base"][key] + res[key].sum(axis=1), res["total"][key])
+
+
+def test_exact_shares_match_permutation_definition():
+    x = RATIONS[1]
+    active = np.flatnonzero(x)
+
+    def score(held):
+        trial = np.where(np.isin(np.arange(len(x)), list(held)), x, 0.0)
+        if not trial.any():
+            return feed_attribution.EMPTY["ph"]
+        return rumen_engine.evaluate(trial[None, :])["ph"][0]
+
+    expected = np.zeros(len(x))
+    orders = list(permutations(active))
+    for order in orders:
+        for j, feed in enumerate(order):
+            expected[feed] += score(order[:j + 1]) - score(order[:j])
+    expected /= len(orders)
+
+    res = feed_attribution.shapley(x[None, :], outputs=("ph",))
+    assert np.allclose(res["ph"][0], expected)
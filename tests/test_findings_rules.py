@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import findings_rules
+
+TABLE = {
+    "state": {"health": 1.0, "loss": 0.0},
+    "groups": [
+        {"group": "x", "metric": "x", "bands": [
+            {"code": "LOW", "when": [["x", "<", 2.0]],
+             "effect": {"on": "health", "op": "subtract", "ref": 2.0, "slope": -0.1, "max": 0.15},
+             "title": "Low", "type": "warning", "text": "x {x:.1f}, down {effect_pct:.0f}%"},
+            {"code": "MID", "when": [["x", "<=", 4.0]]},         # overlaps LOW; LOW wins below 2
+            {"code": "HIGH", "when": [["x", "<", 8.0]],
+             "effect": {"on": "health", "op": "multiply", "ref": 0.0, "slope": 0.1, "min": 0.55, "max": 0.7}},
+            {"code": "TOP", "when": [],
+             "effect": {"on": "loss", "op": "set", "value": 0.25}},
+        ]},
+    ],
+}
+
+
+def _apply(x):
+    return findings_rules.apply_rules({"x": np.asarray(x, dtype=float)}, TABLE)
+
+
+def test_first_matching_band_wins():
+    _, codes, _ = _apply([0.0, 1.99, 2.0, 4.0, 4.01, 8.0])
+    assert codes[:, 0].tolist() == [0, 0, 1, 1, 2, 3]
+
+
+def test_subtract_is_capped_at_max():
+    state, _, amounts = _apply([1.0, 0.5, -10.0])
+    assert amounts[:, 0] == pytest.approx([0.1, 0.15, 0.15])
+    assert state["health"] == pytest.approx([0.9, 0.85, 0.85])
+
+
+def test_multiply_is_clipped_to_min_and_max():
+    state, _, amounts = _apply([5.0, 6.5, 7.9])
+    assert amounts[:, 0] == pytest.approx([0.55, 0.65, 0.7])
+    assert state["health"] == pytest.approx([0.55, 0.65, 0.7])
+    assert state["loss"] == pytest.approx([0.0, 0.0, 0.0])
+
+
+def test_set_assigns_the_value_and_effect_free_bands_leave_state():
+    state, _, amounts = _apply([9.0, 3.0])
+    assert state["loss"] == pytest.approx([0.25, 0.0])
+    assert state["health"] == pytest.approx([1.0, 1.0])
+    assert amounts[:, 0] == pytest.approx([0.25, 0.0])
+
+
+@pytest.mark.parametrize("value, digits, text", [
+    (0.125, 2, "0.13"),        # exact binary .5 rounds up
+    (2.5, 0, "3"),
+    (-2.5, 0, "-3"),           # half away from zero, as toFixed()
+    (1.005, 2, "1.00"),        # 1.005 is 1.00499999... in binary
+    (8.25, 1, "8.3"),
+    (0.35, 1, "0.3"),          # 0.34999999...
+])
+def test_to_fixed_rounds_the_binary_value_half_up(value, digits, text):
+    assert findings_rules._to_fixed(value, digits) == text
+
+
+def test_describe_formats_placeholders_like_the_page():
+    x = 1.25
+    state, codes, amounts = _apply([x])
+    findings = findings_rules.describe(codes[0], amounts[0], {"x": x}, TABLE)
+    assert findings == [{"code": "LOW", "type": "warning", "title": "Low", "text": "x 1.3, down 8%"}]
+
+
+def test_bundled_table_validates():
+    table = findings_rules.load_rules()
+    assert all(not group["bands"][-1]["when"] for group in table["groups"])
@@ -0,0 +1,30 @@
+import numpy as np
+
+import herd_crossbreeding
+
+
+def test_retain_draws_need_without_replacement():
+    rng = np.random.default_rng(0)
+    pool = rng.integers(0, 20, (200, 7))
+    need = np.minimum(rng.integers(0, 80, 200), pool.sum(axis=1))
+    taken = herd_crossbreeding.retain(pool, need, rng)
+    assert (taken.sum(axis=1) == need).all()
+    assert ((taken >= 0) & (taken <= pool)).all()
+
+
+def test_stationary_ages_sum_to_herd():
+    assert herd_crossbreeding.stationary_ages(10_007).sum() == 10_007
+
+
+def test_herd_stays_within_size_and_compositions_sum_to_one():
+    res = herd_crossbreeding.simulate_herd("Angus", ["Angus", "Hereford", "Charolais"], "best",
+                                           n_cows=500, years=30, n_reps=20, seed=0)
+    assert (res["cows"] <= 500).all()
+    assert np.allclose(res["composition"].sum(axis=2), 1.0)
+    # Settles near the three-breed rotation's 1 - 1/7 retained heterosis
+    assert abs(res["calf_heterosis"][-5:].mean() - 6 / 7) < 0.05
+
+
+def test_purebred_herd_has_no_heterosis():
+    res = herd_crossbreeding.simulate_herd("Angus", ["Angus"], "rotate", n_cows=200, years=5, n_reps=5, seed=0)
+    assert (res["calf_heterosis"] == 0).all() and (res["cow_heterosis"] == 0).all()
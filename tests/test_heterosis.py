@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import heterosis
+
+# runMath(sireComp, damComp) of the breeding_5.py page: retained heterosis % and calf composition
+RUN_MATH = [
+    ("Charolais", "F1 Black Baldy", 100.0, {"Charolais": 0.5, "Angus": 0.25, "Hereford": 0.25}),
+    ("Angus", "F1 Black Baldy", 50.0, {"Angus": 0.75, "Hereford": 0.25}),
+    ("Brangus", "Beefmaster", 81.25, {"Angus": 0.3125, "Brahman": 0.4375, "Hereford": 0.125, "Shorthorn": 0.125}),
+    ("Hereford", "Hereford", 0.0, {"Hereford": 1.0}),
+    ("F1 Tiger Stripe", "Braford", 50.0, {"Brahman": 0.4375, "Hereford": 0.5625}),
+    ("Simbrah", "F1 Charolais-Angus", 100.0,
+     {"Simmental": 0.3125, "Brahman": 0.1875, "Charolais": 0.25, "Angus": 0.25}),
+]
+
+
+@pytest.mark.parametrize("sire, dam, pct, calf", RUN_MATH)
+def test_database_pairs_match_run_math(sire, dam, pct, calf):
+    names, breeds, P = heterosis.database_matrix()
+    s, d = P[names.index(sire)], P[names.index(dam)]
+    assert heterosis.retained_heterosis(s, d)[0, 0] * 100 == pytest.approx(pct, abs=1e-12)
+    expected = heterosis.composition_matrix([calf], breeds)[0]
+    assert np.allclose(heterosis.offspring(s, d)[0, 0], expected)
+
+
+def test_generations_chain_like_run_math():
+    # Charolais x F1 Black Baldy, then Brahman and Brangus bulls on the retained heifers
+    names, breeds, P = heterosis.database_matrix()
+    calf = heterosis.offspring(P[names.index("Charolais")], P[names.index("F1 Black Baldy")])[0, 0]
+    h2 = heterosis.retained_heterosis(P[names.index("Brahman")], calf)[0, 0]
+    calf = heterosis.offspring(P[names.index("Brahman")], calf)[0, 0]
+    h3 = heterosis.retained_heterosis(P[names.index("Brangus")], calf)[0, 0]
+    calf = heterosis.offspring(P[names.index("Brangus")], calf)[0, 0]
+    assert (h2 * 100, h3 * 100) == pytest.approx((100.0, 73.4375))
+    assert heterosis.format_composition(calf, breeds) == "43.8% Brahman, 37.5% Angus, 12.5% Charolais, 6.3% Hereford"
+
+
+def test_table_agrees_with_pairwise_calls():
+    table = heterosis.heterosis_table(dams=[{"Angus": 0.75, "Hereford": 0.25}], dam_names=["herd cow"])
+    names, _, P = heterosis.database_matrix()
+    i = table["sires"].index("Charolais")
+    assert table["heterosis"][i, table["dams"].index("herd cow")] == pytest.approx(1.0)
+    j = table["dams"].index("Brangus")
+    assert table["heterosis"][:, j] == pytest.approx(heterosis.retained_heterosis(P, P[j])[:, 0])
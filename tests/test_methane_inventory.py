@@ -0,0 +1,59 @@
+import pytest
+
+import methane_inventory
+import rumen_engine
+
+LOG = """date,pen,head,hay,alf,dry,wet,sbm,fat,body_weight
+2024-01-30,A,10,5,3,3,0,1,0,
+2024-01-31,A,12,5,3,3,0,1,0,450
+
+2024-02-01,A,10,1.5,0.5,6,2,1.5,0.3,
+2024-01-31,B,20,1.5,0.5,6,2,1.5,0.3,
+2023-12-31,B,20,1.5,0.5,6,2,1.5,0.3,
+"""
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "ration_log.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_rows_roll_up_by_pen_and_calendar_month(tmp_path):
+    table = methane_inventory.methane_rollup(_write(tmp_path, LOG))
+    assert list(table) == [("A", "2024-01"), ("A", "2024-02"), ("B", "2023-12"), ("B", "2024-01")]
+    assert table[("A", "2024-01")]["head_days"] == 22
+
+    res = rumen_engine.evaluate([[5, 3, 3, 0, 1, 0]] * 2, body_weight=[rumen_engine.BODY_WEIGHT, 450])
+    assert table[("A", "2024-01")]["ch4_mcal"] == pytest.approx(res["energy_methane"] @ [10, 12])
+    assert table[("A", "2024-01")]["ym_pct"] == pytest.approx(
+        100 * (res["energy_methane"] @ [10, 12]) / (res["total_ge"] @ [10, 12]))
+
+
+def test_blocks_fold_into_the_same_totals(tmp_path):
+    path = _write(tmp_path, LOG)
+    whole = methane_inventory.methane_rollup(path)
+    blocked = methane_inventory.methane_rollup(path, block_rows=2)
+    assert whole.keys() == blocked.keys()
+    for key in whole:
+        for total, value in whole[key].items():
+            assert blocked[key][total] == pytest.approx(value)
+
+
+@pytest.mark.parametrize("bad, line", [
+    ("2024-1-31", 3),        # not zero padded
+    ("2024-02-30", 3),       # no such day
+    ("2024-01", 3),          # numpy would read this as 2024-01-01
+    ("", 3),                 # numpy would read this as NaT
+    ("31/01/2024", 3),
+])
+def test_malformed_date_raises_with_its_line(tmp_path, bad, line):
+    path = _write(tmp_path, LOG.replace("2024-01-31,A", f"{bad},A"))
+    with pytest.raises(ValueError, match=f"line {line}: bad date '{bad}'"):
+        methane_inventory.methane_rollup(path)
+
+
+def test_line_numbers_count_blank_lines_and_earlier_blocks(tmp_path):
+    path = _write(tmp_path, LOG.replace("2023-12-31", "2023-12-32"))
+    with pytest.raises(ValueError, match="line 7:"):
+        methane_inventory.methane_rollup(path, block_rows=2)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import pareto_frontier
+
+
+def _brute_force(cost, me, ch4):
+    # O(n^2): i is kept unless some j is no worse on all three and better on one
+    pts = np.stack([cost, -me, ch4], axis=1)
+    no_worse = (pts[None, :, :] <= pts[:, None, :]).all(axis=2)
+    better = (pts[None, :, :] < pts[:, None, :]).any(axis=2)
+    return {tuple(p) for p in pts[~(no_worse & better).any(axis=1)]}
+
+
+@pytest.mark.parametrize("seed, levels, block_size", [
+    (0, None, 4096),     # continuous values, one block
+    (1, None, 64),       # many blocks
+    (2, 6, 50),          # heavy ties and exact duplicates across blocks
+    (3, 3, 7),
+])
+def test_matches_the_quadratic_reference(seed, levels, block_size):
+    rng = np.random.default_rng(seed)
+    if levels is None:
+        cost, me, ch4 = rng.uniform(0, 1, (3, 1500))
+    else:
+        cost, me, ch4 = rng.integers(0, levels, (3, 1500)).astype(float)
+    front = pareto_frontier.non_dominated(cost, me, ch4, block_size=block_size)
+    kept = [(cost[i], -me[i], ch4[i]) for i in front]
+    assert len(kept) == len(set(kept))                 # duplicates reported once
+    assert set(kept) == _brute_force(cost, me, ch4)
+
+
+def test_front_of_the_sweep_is_ordered_by_cost():
+    front = pareto_frontier.pareto_frontier([0.18, 0.30, 0.22, 0.26, 0.45, 1.10], dmi_levels=[10.0, 12.0],
+                                            steps=10)
+    assert (np.diff(front["cost"]) >= 0).all()
+    assert set(_brute_force(front["cost"], front["energy_me"], front["energy_methane"])) == \
+        {(c, -m, h) for c, m, h in zip(front["cost"], front["energy_me"], front["energy_methane"])}
+
+
+def test_empty_input():
+    assert len(pareto_frontier.non_dominated([], [], [])) == 0
@@ -0,0 +1,62 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import pedigree_composition
+
+
+def _registry(tmp_path, text):
+    path = tmp_path / "registry.csv"
+    path.write_text(text)
+    return pedigree_composition.read_registry(str(path))
+
+
+def test_small_pedigree_with_messy_fields(tmp_path):
+    reg = _registry(tmp_path, 'animal, sire, dam, breed\n'
+                              '"A1", , 0, AN\n'
+                              'H1, NA, ., HH\n'
+                              ' C1 , "A1", H1, AN\n'
+                              'C2, X9, C1, AN\n')
+    res = pedigree_composition.propagate(reg)
+    table, comp = res["table"], res["composition"]
+    row = {a: i for i, a in enumerate(reg["animal"])}
+    assert reg["added"] == 1 and "X9" in row
+    assert table.exact(int(comp[row["C1"]])) == {"AN": Fraction(1, 2), "HH": Fraction(1, 2)}
+    assert table.exact(int(comp[row["C2"]])) == {"AN": Fraction(1, 4), "HH": Fraction(1, 4), "UNK": Fraction(1, 2)}
+    assert res["heterosis"][row["C1"]] == 1.0 and res["maternal_heterosis"][row["C2"]] == 1.0
+    assert np.isnan(res["maternal_heterosis"][row["A1"]])
+
+
+def test_matches_recursive_fractions_on_demo_registry(tmp_path):
+    path = str(tmp_path / "demo.csv")
+    pedigree_composition.write_demo_registry(path, n_animals=3000, n_founders=200, seed=1)
+    reg = pedigree_composition.read_registry(path)
+    res = pedigree_composition.propagate(reg)
+    memo = {}
+
+    def composition(i, code):
+        # An unknown parent is purebred of the calf's breed code
+        if i < 0:
+            return {reg["breeds"][code]: Fraction(1)}
+        if i not in memo:
+            s = composition(int(reg["sire"][i]), reg["breed"][i])
+            d = composition(int(reg["dam"][i]), reg["breed"][i])
+            memo[i] = {b: (s.get(b, 0) + d.get(b, 0)) / 2 for b in set(s) | set(d)}
+        return memo[i]
+
+    for i in range(len(reg["animal"])):
+        expected = {b: f for b, f in composition(i, reg["breed"][i]).items() if f}
+        assert res["table"].exact(int(res["composition"][i])) == expected
+    # Parents come before their calves
+    position = np.empty(len(res["order"]), dtype=np.int64)
+    position[res["order"]] = np.arange(len(res["order"]))
+    for parent in (reg["sire"], reg["dam"]):
+        known = parent >= 0
+        assert (position[parent[known]] < position[known]).all()
+
+
+def test_pedigree_loop_raises(tmp_path):
+    reg = _registry(tmp_path, "animal,sire,dam,breed\nA,B,,AN\nB,A,,AN\n")
+    with pytest.raises(ValueError, match="pedigree loop"):
+        pedigree_composition.propagate(reg)
@@ -0,0 +1,21 @@
+import numpy as np
+
+import pen_variation
+import rumen_engine
+
+
+def test_head_rations_keep_intake_and_sort_out_long_particles():
+    x = np.array([[4, 2, 4, 1, 1.2, 0]], dtype=float)
+    dmi_factor, sort_index = pen_variation.sample_animals(50, 20, rng=0)
+    heads = pen_variation.head_rations(x, dmi_factor, sort_index, rumen_engine.LIBRARY.column("pe"))
+    assert np.allclose(heads.sum(axis=3), x.sum() * dmi_factor)
+    # Sorters (s > 0) eat a smaller hay share than delivered
+    hay_share = heads[0, :, :, 0] / heads[0].sum(axis=2)
+    assert (hay_share[sort_index > 0] < x[0, 0] / x.sum()).all()
+
+
+def test_uniform_pen_matches_single_animal():
+    x = [4, 2, 4, 1, 1.2, 0]
+    res = pen_variation.simulate_pen(x, n_head=10, n_reps=5, dmi_cv=0.0, sort_mean=0.0, sort_sd=0.0, seed=0)
+    assert np.allclose(res["ph"], res["pen"]["ph"][0])
+    assert np.allclose(res["dmi"], sum(x))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import ration_optimizer
+import rumen_engine
+
+PRICES = np.array([0.18, 0.30, 0.22, 0.26, 0.45, 1.10])
+DMI = 12.0
+
+
+def _brute_force(prices, limits, steps):
+    cand = ration_optimizer._lattice_points(DMI, ration_optimizer.MAX_KG, steps)
+    feasible = cand[ration_optimizer.feasible_mask(rumen_engine.evaluate(cand), limits)]
+    return (feasible @ np.atleast_2d(prices).T).min(axis=0) if len(feasible) else None
+
+
+def _assert_limits_hold(res, limits):
+    for key, (lo, hi) in limits.items():
+        if lo is not None:
+            assert (res[key] >= lo - 1e-9).all(), key
+        if hi is not None:
+            assert (res[key] <= hi + 1e-9).all(), key
+
+
+def test_batch_is_no_worse_than_a_finer_lattice_search():
+    limits = ration_optimizer.make_limits(me_min=25.0, ym_max=0.06)
+    prices = PRICES * np.random.default_rng(3).uniform(0.7, 1.3, (5, 6))
+    res = ration_optimizer.least_cost_batch(prices, DMI, limits)
+    best = _brute_force(prices, limits, steps=30)
+    assert res["feasible"].all()
+    assert (res["cost"] <= best + 1e-9).all()
+    assert (res["cost"] >= 0.95 * best).all()
+
+
+@pytest.mark.parametrize("limits", [
+    ration_optimizer.make_limits(),
+    ration_optimizer.make_limits(me_min=25.0, ym_max=0.06),
+    ration_optimizer.make_limits(ph_min=6.6, cp_min=12.0, pendf_min=30.0, fat_max=4.0, me_min=28.0, ym_max=0.065),
+    ration_optimizer.make_limits(ph_min=6.6, me_min=36.0),   # feasible only on the finer retry lattice
+])
+def test_every_limit_holds_on_the_returned_mix(limits):
+    res = ration_optimizer.least_cost_ration(PRICES, DMI, limits)
+    assert res["feasible"]
+    assert res["rations"].sum() == pytest.approx(DMI)
+    assert ((res["rations"] >= 0) & (res["rations"] <= ration_optimizer.MAX_KG + 1e-12)).all()
+    _assert_limits_hold({k: np.atleast_1d(v) for k, v in res.items()}, limits)
+
+
+def test_infeasible_pen_returns_no_mix():
+    limits = ration_optimizer.make_limits(cp_min=30.0)
+    assert _brute_force(PRICES, limits, steps=40) is None
+    res = ration_optimizer.least_cost_batch([PRICES, PRICES * 0.9], DMI, limits)
+    assert not res["feasible"].any()
+    assert np.isnan(res["rations"]).all()
+    assert np.isnan(res["cost"]).all()
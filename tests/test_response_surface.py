@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import balance_3
+import findings_rules
+import response_surface
+import rumen_engine
+
+
+def test_tables_reproduce_the_rule_table_on_and_between_breakpoints():
+    rules = findings_rules.default_rules()
+    library = rumen_engine.TDN_LIBRARY.subset(balance_3.SLIDER_FEEDS)
+    tables = balance_3.build_rule_tables(library)
+    rng = np.random.default_rng(0)
+    values = {}
+    for group, table in zip(rules["groups"], tables):
+        nodes, _ = response_surface.decode_table(table)
+        points = np.concatenate([nodes, np.nextafter(nodes, -np.inf), np.nextafter(nodes, np.inf),
+                                 rng.uniform(nodes[0], nodes[-1], 500)])
+        values[group["metric"]] = np.clip(points, nodes[0], nodes[-1])
+    n = min(len(v) for v in values.values())
+    values = {k: rng.permutation(v)[:n] for k, v in values.items()}
+
+    expected, _, _ = findings_rules.apply_rules(dict(values, **{name: np.zeros(n) for name in library.names}), rules)
+    for i in range(n):
+        state = response_surface.lookup_state(tables, rules, {k: v[i] for k, v in values.items()})
+        for name, value in state.items():
+            assert value == pytest.approx(expected[name][i], abs=1e-12)
+
+
+def test_effect_conditioned_outside_the_metric_is_rejected():
+    group = {"group": "g", "metric": "cp", "bands": [
+        {"code": "A", "when": [["hay", ">", 4]]},
+        {"code": "B", "when": [["cp", "<", 8]], "effect": {"on": "s", "op": "set", "value": 1}},
+        {"code": "C", "when": []},
+    ]}
+    with pytest.raises(ValueError):
+        response_surface.build_rule_tables({"state": {"s": 0}, "groups": [group]}, {"cp": (0, 50)})
@@ -0,0 +1,42 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+import heterosis
+import rotation_search
+
+SIRES = list(heterosis.ANIMAL_DATABASE)[:5]
+VALUES = {"Angus": 25.0, "Charolais": 30.0, "Brahman": -20.0}
+
+
+def brute_force(dam, generations, breed_values, heterosis_weight, allowed, max_sires):
+    names, breeds, P = heterosis.database_matrix()
+    S = P[[names.index(s) for s in SIRES]]
+    values = np.array([breed_values.get(b, 0.0) for b in breeds])
+    dam0 = P[names.index(dam)]
+    best = -np.inf
+    for seq in product(range(len(SIRES)), repeat=generations):
+        if len(set(seq)) > max_sires or not all(allowed[g, s] for g, s in enumerate(seq)):
+            continue
+        d, total = dam0, 0.0
+        for s in seq:
+            total += heterosis_weight * (1.0 - S[s] @ d)
+            d = 0.5 * (S[s] + d)
+            total += d @ values
+        best = max(best, total)
+    return best
+
+
+@pytest.mark.parametrize("max_sires, terminal", [(5, False), (2, False), (3, True)])
+def test_search_matches_brute_force(max_sires, terminal):
+    generations = 5
+    allowed = np.ones((generations, len(SIRES)), dtype=bool)
+    if terminal:
+        allowed[-1] = [s == SIRES[-1] for s in SIRES]
+    res = rotation_search.search_rotation(SIRES[0], SIRES, generations, breed_values=VALUES, heterosis_weight=60.0,
+                                          allowed=allowed, max_sires=max_sires)
+    assert res["exact"]
+    assert res["objective"] == pytest.approx(brute_force(SIRES[0], generations, VALUES, 60.0, allowed, max_sires))
+    assert len(set(res["sires"])) <= max_sires
+    assert all(allowed[g, SIRES.index(s)] for g, s in enumerate(res["sires"]))
@@ -0,0 +1,29 @@
+import numpy as np
+
+import rumen_calibration
+import rumen_profiles
+
+TRUTH = {"base": 6.75, "bounds": [5.2, 7.0], "terms": {"starch_ferment": -0.95, "peNDF": 0.017, "buffer": 0.10}}
+
+
+def _survey(n_pens=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = np.array([[5, 3, 3, 0, 1.0, 0], [1.5, 0.5, 6, 2, 1.5, 0.3], [3, 1, 4, 2, 1.2, 0.1]])
+    rations = np.clip(centres[rng.integers(0, 3, n_pens)] + rng.normal(0, 0.8, (n_pens, 6)), 0, None)
+    truth = dict(rumen_profiles.default_profiles()["balance_3"], ph=TRUTH, name="truth")
+    return rations, rumen_profiles.evaluate_profile(rations, truth)["ph"]
+
+
+def test_fit_recovers_noise_free_coefficients():
+    rations, ph = _survey()
+    res = rumen_calibration.fit_ph(rations, ph, "balance_3", prior_weight=1e-9)
+    expected = [TRUTH["base"]] + [TRUTH["terms"][t] for t in res["terms"][1:]]
+    assert res["converged"]
+    assert np.allclose(res["coefficients"], expected, rtol=1e-3, atol=1e-4)
+    assert res["rmse"] < 1e-4 < res["rmse_prior"]
+
+
+def test_calibrated_profile_reproduces_the_fit():
+    rations, ph = _survey(seed=1)
+    res = rumen_calibration.fit_ph(rations, ph, "balance_3")
+    assert np.allclose(rumen_profiles.evaluate_profile(rations, res["profile"])["ph"], res["predicted"], atol=1e-5)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import rumen_engine
+
+BALANCED = [5, 4, 2, 2, 1.5, 0]
+
+
+def test_digestible_and_metabolizable_energy_fall_with_passage():
+    # Heavier cattle eat less per kg BW, pass feed slower and digest more of it
+    weights = [350, 450, 600, 750]
+    res = rumen_engine.evaluate([BALANCED] * len(weights), body_weight=weights)
+    assert (np.diff(res["kp_forage"]) < 0).all()
+    assert (np.diff(res["energy_digestible"]) > 0).all()
+    assert (np.diff(res["energy_me"]) > 0).all()
+    assert np.allclose(res["energy_fecal"] + res["energy_digestible"], res["total_ge"])
+
+
+# loadScenario() rations in ted_lecture_rum.py, 600 kg; expected values from the page's rumenRow()
+SCENARIOS = [[5, 4, 2, 2, 1.5, 0], [1, 0, 0, 9, 0.5, 0], [0.5, 0, 0, 10, 0, 0], [6, 2, 2, 0, 1, 0.6]]
+GOLDEN = {
+    "ph": [6.51046, 4.5, 4.5, 7.1],
+    "peNDF": [32.4414, 6.53333, 3.47619, 39.931],
+    "fiber_health": [1.0, 0.15, 0.15, 0.781466],
+    "Ym": [0.0576138, 0.015, 0.015, 0.0336724],
+    "energy_methane": [3.7593, 0.72225, 0.723, 1.84323],
+    "energy_me": [40.6638, 3.66137, 3.82844, 25.6759],
+    "total_vfa": [58.051, 63.3709, 69.8982, 35.2539],
+    "mcp": [1049.92, 703.0, 564.5, 589.284],
+}
+
+
+def test_demo_scenarios_match_the_page_model():
+    res = rumen_engine.evaluate(SCENARIOS)
+    for key, expected in GOLDEN.items():
+        assert res[key] == pytest.approx(expected, rel=1e-5), key
+
+
+def test_chunked_evaluation_matches_one_block():
+    x = np.random.default_rng(0).uniform(0, 1, (1001, 6)) * [15, 10, 12, 12, 5, 1.5]
+    bw = np.linspace(350, 750, len(x))
+    whole = rumen_engine.evaluate(x, body_weight=bw)
+    chunked = rumen_engine.evaluate(x, chunk_size=97, body_weight=bw)
+    assert whole.keys() == chunked.keys()
+    for key in whole:
+        np.testing.assert_array_equal(chunked[key], whole[key], err_msg=key)
+
+
+def test_vfa_molar_shares_sum_to_one():
+    x = np.random.default_rng(1).uniform(0, 1, (500, 6)) * [15, 10, 12, 12, 5, 1.5]
+    res = rumen_engine.evaluate(x)
+    shares = np.stack([res["acetate"], res["propionate"], res["butyrate"]]) / res["total_vfa"]
+    assert np.allclose(shares.sum(axis=0), 1.0)
+    assert (shares > 0).all()
+    # Each Murphy pattern leaves a remainder of hexose for valerate and minor acids
+    assert (rumen_engine.VFA_ROUGHAGE.sum(axis=1) <= 1).all()
+    assert (rumen_engine.VFA_CONCENTRATE.sum(axis=1) <= 1).all()
+
+
+def test_microbial_protein_hand_computed_cncps_case():
+    # 8 kg dry rolled corn + 2 kg SBM at 600 kg: no forage, so every feed passes at kp_concentrate
+    kp = (2.904 + 1.375 * (10 / 600 * 100) - 0.020 * 100) / 100
+    corn, sbm = 0.15 / (0.15 + kp), 0.10 / (0.10 + kp)
+    starch = 8 * 0.70 * corn, 2 * 0.02 * sbm
+    ndf = 8 * 0.09 * corn, 2 * 0.12 * sbm
+    yield_nfc = 1 / (0.15 / 0.15 + 2.5), 1 / (0.15 / 0.10 + 2.5)
+    yield_fc = 1 / (0.05 / 0.15 + 2.5), 1 / (0.05 / 0.10 + 2.5)
+    fiber_health = 0.15                              # pH 5.50 < 5.6
+    pendf_factor = 1 - 0.025 * (20 - (8 * 9 * 0.1) / 10)
+    cells = (starch[0] * yield_nfc[0] + starch[1] * yield_nfc[1]
+             + (ndf[0] * yield_fc[0] + ndf[1] * yield_fc[1]) * fiber_health) * pendf_factor
+    mcp = cells * 0.625 * 1000                       # g CP, below the RDN cap
+
+    res = rumen_engine.evaluate([[0, 0, 8, 0, 2, 0]])
+    assert res["fiber_health"][0] == pytest.approx(fiber_health)
+    assert res["mcp"][0] == pytest.approx(mcp)
+    assert res["rdn"][0] == pytest.approx((8 * 0.09 * 0.60 + 2 * 0.48 * 0.70) * 1000 / 6.25)
+    assert res["rumen_n_balance"][0] > 0
+
+
+def test_microbial_protein_is_capped_by_degradable_n():
+    # 10 kg grass hay: 0.49 kg RDP caps microbial CP at 490 g
+    res = rumen_engine.evaluate([[10, 0, 0, 0, 0, 0]])
+    assert res["mcp"][0] == pytest.approx(10 * 0.07 * 0.70 * 1000)
+    assert res["rumen_n_balance"][0] < 0
@@ -0,0 +1,34 @@
+import numpy as np
+
+import rumen_engine
+import rumen_inverse
+
+
+def test_max_inclusion_returns_feasible_kg():
+    rng = np.random.default_rng(0)
+    base = rng.uniform(0, 1, (300, 6)) * [4, 3, 5, 0, 1.5, 0.3] + [1, 0, 1, 0, 0.5, 0]
+    targets = {"ph": 5.8, "peNDF": 8.0, "fiber_health": 0.5}
+    res = rumen_inverse.max_inclusion(base, "wet", targets, tol_kg=1e-3)
+
+    found = np.isfinite(res["kg"])
+    x = base[found].copy()
+    x[:, 3] = res["kg"][found]
+    out = rumen_engine.evaluate(x)
+    for key, low in targets.items():
+        assert (out[key] >= low).all()
+        assert np.allclose(out[key], res[key][found])
+
+    # Just past a solved limit some target fails
+    solved = np.flatnonzero(res["status"] == rumen_inverse.STATUS.index("solved"))
+    assert len(solved) and (res["binding"][solved] >= 0).all()
+    past = base[solved].copy()
+    past[:, 3] = res["kg"][solved] + 1e-3
+    out = rumen_engine.evaluate(past)
+    assert not np.stack([out[key] >= low for key, low in targets.items()]).all(axis=0).any()
+
+
+def test_infeasible_pens_miss_a_target_at_zero_inclusion():
+    base = np.array([[0.5, 0, 0, 0, 0, 0], [5, 4, 2, 0, 1.5, 0]], dtype=float)
+    res = rumen_inverse.max_inclusion(base, "wet", {"cp": 10.0})
+    assert res["status"][0] == rumen_inverse.STATUS.index("infeasible") and np.isnan(res["kg"][0])
+    assert res["status"][1] != rumen_inverse.STATUS.index("infeasible")
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import rumen_kinetics
+
+DT_H = 0.05
+STEPS = int(round(24 / DT_H))
+
+
+def _trace(ph_low, hours, ph_rest=6.2):
+    ph = np.full((1, STEPS), ph_rest)
+    ph[0, :int(round(hours / DT_H))] = ph_low
+    return ph
+
+
+@pytest.mark.parametrize("ph_low, hours, sara", [
+    (5.7, 4.0, False),          # exactly 4 h below 5.8
+    (5.7, 4.05, True),
+    (5.5, 3.0, False),          # exactly 3 h below 5.6 (and below 5.8)
+    (5.5, 3.05, True),
+    (5.8, 24.0, False),         # on the threshold all day is not below it
+    (5.6, 4.0, False),          # below 5.8 for 4 h, never below 5.6
+])
+def test_sara_needs_strictly_more_than_the_limit(ph_low, hours, sara):
+    assert rumen_kinetics.sara_status(_trace(ph_low, hours), DT_H)[2][0] == sara
+
+
+def test_hours_do_not_drift_with_the_step():
+    # 30 steps of 0.1 h is 3.0000000000000004 h in floating point
+    ph = np.full((1, 240), 6.2)
+    ph[0, :30] = 5.5
+    hours_58, hours_56, sara = rumen_kinetics.sara_status(ph, 0.1)
+    assert hours_56[0] == 3.0
+    assert not sara[0]
+
+
+def test_constant_intake_gives_a_flat_curve():
+    rations = [[5, 4, 2, 2, 1.5, 0], [3, 0, 4, 2, 0.5, 0]]
+    res = rumen_kinetics.simulate_day(rations, meals=((0.0, 1.0),), meal_hours=24, spinup_days=5)
+    assert np.ptp(res["ph"], axis=1) == pytest.approx(0.0, abs=1e-5)
+    assert res["mean_ph"] == pytest.approx(res["static"]["ph"], abs=1e-5)
+
+
+def test_meals_swing_the_curve_around_the_static_ph():
+    res = rumen_kinetics.simulate_day([[3, 0, 4, 2, 0.5, 0]])
+    assert res["nadir"][0] < res["static"]["ph"][0] < res["ph"][0].max()
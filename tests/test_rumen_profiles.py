@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+import feed_library
+import rumen_engine
+import rumen_profiles
+
+RATIONS = np.random.default_rng(0).uniform(0, 1, (400, 6)) * [12, 8, 10, 10, 4, 1.5]
+
+
+def _balance_py(forage, corn, prot):
+    # updateModel() of balance.py: (ph, combined factor, expected TDN kg, realized TDN kg)
+    total_dm = forage + corn + prot
+    expected = forage * 0.45 + corn * 0.88 + prot * 0.80
+    ph = min(max(6.8 - (corn * 0.25 - forage * 0.05), 5.5), 7.0)
+    cp = (forage * 4 + corn * 9 + prot * 45) / total_dm
+    if cp < 6.0:
+        n_factor = 0.6
+    elif cp < 9.0:
+        n_factor = 0.6 + (cp - 6.0) / 3.0 * 0.4
+    else:
+        n_factor = 1.05
+    ph_factor = 1.0 - min((6.2 - ph) * 1.5, 0.5) if ph < 6.2 else 1.0
+    factor = n_factor * ph_factor
+    return ph, factor, expected, forage * 0.45 * factor + corn * 0.88 + prot * 0.80
+
+
+def _balance_1_py(kg, feeds):
+    # updateModel() of balance_1.py over its own feed table
+    total_dm = sum(kg.values())
+    chem = {k: sum(kg[f] * feeds[f][k] for f in kg) / total_dm for k in ("cp", "ndf", "starch", "tdn", "peNDF")}
+    ph = 6.8 - chem["starch"] * 0.028 + chem["peNDF"] * 0.012 + kg["alf"] / total_dm * 0.18
+    ph = min(max(ph, 5.3), 7.0)
+    health = 100.0
+    if chem["cp"] < 8.0:
+        health -= (8.0 - chem["cp"]) * 18
+    if ph < 6.0:
+        health -= min((6.0 - ph) * 70, 70)
+    elif ph < 6.2:
+        health -= (6.2 - ph) * 35
+    health = min(max(health, 0.0), 100.0)
+    ndf_contribution = chem["ndf"] * 0.45
+    non_fiber = chem["tdn"] - ndf_contribution
+    if ph < 5.5:
+        non_fiber *= 0.95
+    realized = non_fiber + ndf_contribution * health / 100
+    return ph, health / 100, total_dm * chem["tdn"] / 100, total_dm * realized / 100
+
+
+def _balance_2_py(x, lib):
+    # update() of balance_2.py
+    h, a, d, w, s, f = x
+    dm = x.sum()
+    diet = {attr: x @ lib.column(attr) / dm for attr in lib.attributes}
+    cp, fat_pct, peNDF = diet["cp"], diet["fat"], diet["peNDF"]
+    ph = 6.8 - diet["starch"] * diet["fermentRate"] * 0.85 + peNDF * 0.014 + diet["buffer"] * 0.18 + cp / 100 * 0.05
+    ph = min(max(ph, 5.0), 7.0)
+
+    health, passage_loss = 1.0, 0.0
+    rdp_pct = cp * diet["rdp"] / 100
+    if rdp_pct < 5.0:
+        health -= min((5.0 - rdp_pct) * 0.20, 0.85)
+    elif rdp_pct < 6.5:
+        health -= (6.5 - rdp_pct) * 0.12
+    if ph < 5.6:
+        health -= min((6.0 - ph) * 1.2, 0.90)
+    elif ph < 5.9:
+        health -= (6.0 - ph) * 0.85
+    elif ph < 6.15:
+        health -= (6.15 - ph) * 0.45
+    if fat_pct > 7.5:
+        health -= min((fat_pct - 7.0) * 0.15, 0.60)
+    elif fat_pct > 6.5:
+        health -= (fat_pct - 6.5) * 0.10
+    target = 12 if (w > 2 or d > 5) else 19
+    if peNDF < target - 8:
+        passage_loss = min((target - peNDF) * 0.018, 0.25)
+    elif peNDF < target - 3:
+        passage_loss = (target - peNDF) * 0.014
+    health = min(max(health, 0.0), 1.0)
+
+    fiber = x @ (lib.column("tdn") * lib.column("forage"))
+    nonfiber = x @ (lib.column("tdn") * (1 - lib.column("forage")))
+    nonfiber_eff = 0.88 if ph < 5.5 else 0.95 if ph < 5.8 else 1.0
+    return ph, health, fiber + nonfiber, fiber * max(health - passage_loss, 0.0) + nonfiber * nonfiber_eff
+
+
+def _assert_rows(res, expected):
+    ph, health, potential, realized = np.array(expected).T
+    np.testing.assert_allclose(res["ph"], ph, atol=1e-12)
+    np.testing.assert_allclose(res["fiber_health"], health, atol=1e-12)
+    np.testing.assert_allclose(res["potential"], potential, rtol=1e-12)
+    np.testing.assert_allclose(res["realized"], realized, rtol=1e-12, atol=1e-12)
+
+
+def test_balance_profile_matches_balance_py():
+    # balance.py's sliders: forage (hay), corn (dry), protein (sbm)
+    x = np.zeros((len(RATIONS), 6))
+    x[:, [0, 2, 4]] = RATIONS[:, [0, 2, 4]]
+    res = rumen_profiles.evaluate_profile(x, "balance")
+    _assert_rows(res, [_balance_py(*row[[0, 2, 4]]) for row in x])
+
+
+def test_balance_1_profile_matches_balance_1_py_on_its_feed_table():
+    # balance_1.py's own table (hay, alf, corn, sbm; no DDGS) in the slider layout
+    feeds = {
+        "hay": {"cp": 6.0, "ndf": 65.0, "starch": 1.0, "tdn": 52.0, "peNDF": 55.0},
+        "alf": {"cp": 17.0, "ndf": 42.0, "starch": 2.0, "tdn": 58.0, "peNDF": 35.0},
+        "corn": {"cp": 9.0, "ndf": 9.0, "starch": 72.0, "tdn": 88.0, "peNDF": 2.0},
+        "sbm": {"cp": 48.0, "ndf": 12.0, "starch": 2.0, "tdn": 84.0, "peNDF": 3.0},
+    }
+    attrs = ("cp", "ndf", "starch", "tdn", "peNDF", "buffer")
+    rows = [[feeds[k][a] for a in attrs[:-1]] + [k == "alf"] for k in ("hay", "alf", "corn")]
+    rows += [[0.0] * 6, [feeds["sbm"][a] for a in attrs[:-1]] + [0], [0.0] * 6]
+    lib = feed_library.FeedLibrary(("hay", "alf", "dry", "wet", "sbm", "fat"), attrs, rows)
+
+    x = RATIONS.copy()
+    x[:, [3, 5]] = 0.0
+    res = rumen_profiles.evaluate_profile(x, "balance_1", library=lib)
+    _assert_rows(res, [_balance_1_py(dict(zip(("hay", "alf", "corn", "sbm"), row[[0, 1, 2, 4]])), feeds)
+                       for row in x])
+
+
+def test_balance_2_profile_matches_balance_2_py():
+    lib = rumen_profiles.profile_library(rumen_profiles.default_profiles()["balance_2"])
+    res = rumen_profiles.evaluate_profile(RATIONS, "balance_2")
+    _assert_rows(res, [_balance_2_py(row, lib) for row in RATIONS])
+
+
+def test_balance_3_profile_matches_the_tdn_engine():
+    res = rumen_profiles.evaluate_profile(RATIONS, "balance_3")
+    tdn = rumen_engine.evaluate_tdn(RATIONS)
+    for key, engine_key in [("ph", "ph"), ("fiber_health", "fiber_health"),
+                            ("potential", "total_potential"), ("realized", "total_realized")]:
+        np.testing.assert_allclose(res[key], tdn[engine_key], rtol=1e-12, atol=1e-12, err_msg=key)
+
+
+@pytest.mark.parametrize("body_weight", [None, 420.0])
+def test_ted_profile_matches_the_rumen_engine(body_weight):
+    res = rumen_profiles.evaluate_profile(RATIONS, "ted", body_weight=body_weight)
+    ref = rumen_engine.evaluate(RATIONS, body_weight=body_weight)
+    for key, engine_key in [("ph", "ph"), ("fiber_health", "fiber_health"), ("realized", "energy_me")]:
+        np.testing.assert_allclose(res[key], ref[engine_key], rtol=1e-12, atol=1e-12, err_msg=key)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import feed_library
+import rumen_engine
+import rumen_uncertainty
+
+
+def test_one_draw_shares_composition_across_design_columns():
+    lib = rumen_engine.LIBRARY
+    D = rumen_uncertainty.sample_design(lib, rumen_uncertainty.SD_LIBRARY, 200, np.random.default_rng(0))
+    assert np.allclose(D[..., 6], D[..., 3] * lib.column("grain"))          # grain starch
+    assert np.allclose(D[..., 5], D[..., 2] * lib.column("pe"))             # peNDF
+    assert np.allclose(D[..., 11], D[..., 0] * lib.column("rdp") / 100)     # RDP
+
+
+def test_draws_stay_inside_bounds():
+    D = rumen_uncertainty.sample_design(rumen_engine.LIBRARY, rumen_uncertainty.SD_LIBRARY, 2000,
+                                        np.random.default_rng(1))
+    assert ((D[..., :4] >= 0) & (D[..., :4] <= 100)).all()
+
+
+def test_redraws_are_capped_for_an_sd_table_outside_the_bounds():
+    sd = rumen_uncertainty.SD_LIBRARY
+    matrix = np.array(sd.matrix)
+    matrix[:, sd.attributes.index("fat")] = 1e6
+    wild = feed_library.FeedLibrary(sd.names, sd.attributes, matrix)
+    with pytest.raises(ValueError, match="'fat' draws"):
+        rumen_uncertainty.sample_design(rumen_engine.LIBRARY, wild, 50, np.random.default_rng(0))
@@ -0,0 +1,62 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import ration_optimizer
+import rumen_engine
+import step_up_planner
+
+FINISHER = np.array([4, 1.5, 2.5, 3, 1.2, 0.2])
+LEVELS, MAX_DAYS = 6, 12
+
+
+def _levels(bw, target):
+    t = np.linspace(0.0, 1.0, LEVELS + 1)
+    x = (1 - t)[:, None] * step_up_planner.RECEIVING + t[:, None] * target
+    res = rumen_engine.evaluate(x, body_weight=np.full(len(t), bw))
+    ok = ration_optimizer.feasible_mask(res, step_up_planner.step_limits())
+    return res["ph"], ok, x @ rumen_engine.LIBRARY.column("grain") / bw * 100
+
+
+def _valid(path, ph, ok, grain, cap, max_ph_drop):
+    # path[0] is day 0 (receiving); every later day is checked
+    return all(path[d - 1] <= path[d] and ok[path[d]] and grain[path[d]] <= cap[d]
+               and ph[path[d - 1]] <= ph[path[d]] + max_ph_drop for d in range(1, len(path)))
+
+
+def _exhaustive(ph, ok, grain, cap, max_ph_drop):
+    # First day each level can be fed, over every non-decreasing blend sequence
+    first = {0: 0}
+    for seq in itertools.combinations_with_replacement(range(LEVELS + 1), MAX_DAYS):
+        path = (0,) + seq
+        for d in range(1, MAX_DAYS + 1):
+            if not _valid(path[:d + 1], ph, ok, grain, cap, max_ph_drop):
+                break
+            first[path[d]] = min(first.get(path[d], d), d)
+    goal = LEVELS if LEVELS in first else max(first)
+    return goal, first[goal]
+
+
+@pytest.mark.parametrize("bw, target, max_ph_drop, adapt", [
+    (350, FINISHER, 0.4, 0.12),
+    (250, FINISHER, 0.4, 0.12),      # grain tolerance binds
+    (450, FINISHER, 0.2, 0.2),       # pH drop binds
+    (350, step_up_planner.FEEDLOT, 0.6, 0.2),   # target fails the limits
+    (300, FINISHER, 0.1, 0.1),       # stalls after the first step
+])
+def test_fewest_days_match_exhaustive_search(bw, target, max_ph_drop, adapt):
+    plan = step_up_planner.plan_step_up([bw], target, levels=LEVELS, max_days=MAX_DAYS,
+                                        max_ph_drop=max_ph_drop, adapt_pct_bw=adapt)
+    ph, ok, grain = _levels(bw, target)
+    cap = step_up_planner.GRAIN_START_PCT_BW + adapt * np.arange(MAX_DAYS + 1)
+    goal, days = _exhaustive(ph, ok, grain, cap, max_ph_drop)
+
+    assert plan["days"][0] == days
+    assert plan["blend"][0, days] == pytest.approx(goal / LEVELS)
+    status = "reached" if goal == LEVELS else "not_reached" if ok[-1] else "target_infeasible"
+    assert step_up_planner.STATUS[plan["status"][0]] == status
+
+    path = np.rint(plan["blend"][0, :days + 1] * LEVELS).astype(int)
+    assert path[0] == 0
+    assert _valid(tuple(path), ph, ok, grain, cap, max_ph_drop)